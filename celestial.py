@@ -45,17 +45,28 @@ a host using the following command:
 
 Then, you can start the emulation run:
 
-    python3 celestial.py [celestial.zip] [host1_addr] [host2_addr] ... [hostN_addr]
+    python3 celestial.py [celestial.zip] [host1_addr] [host2_addr] ... [hostN_addr] [--filter-updates (optional)]
+
+Instead of a .zip file, you can also use a .trace file generated by satgen.py
+or a .updates file generated by encode.py. With a .updates file, the update
+requests are sent to the hosts as they are stored in the file.
 
 You can specify as many hosts as you want. The hosts will be assigned machines
 in a round-robin fashion.
 
+By default, every host receives all updates of the constellation. With
+--filter-updates, each host only receives the updates for its own machines and
+the links from or to them. This reduces the data sent to and parsed by each
+host, but the info server of a host then only knows about the state of its own
+machines and their links. This cannot be used with a .updates file.
+
 Note that the Celestial emulation run will only for as long as specified in the
 `duration` field of the configuration file. If you want to stop the emulation
 run before that, you can send a SIGTERM signal to celestial.py. It will then
 stop the emulation run and exit gracefully, including on the hosts.
 """
 
+import collections
 import concurrent.futures
 import logging
 import signal
@@ -65,18 +76,34 @@ import typing
 
 import celestial.host
 import celestial.proto_util
+import celestial.trace_serializer
 import celestial.types
+import celestial.update_serializer
 import celestial.zip_serializer
 import proto.celestial.celestial_pb2
 import proto.celestial.celestial_pb2_grpc
 
 DEBUG = True
 DEFAULT_PORT = 1969
+# number of timesteps whose updates are prepared ahead of time
+PREFETCH_STEPS = 4
+
+# the update requests for a host, either as messages or already encoded
+Updates = typing.Union[
+    typing.List[proto.celestial.celestial_pb2.StateUpdateRequest],
+    typing.List[bytes],
+]
 
 if __name__ == "__main__":
-    if len(sys.argv) < 3:
+    args = sys.argv[1:]
+
+    filter_updates = "--filter-updates" in args
+    if filter_updates:
+        args.remove("--filter-updates")
+
+    if len(args) < 2:
         exit(
-            "Usage: python3 celestial.py [celestial.zip] [host1_addr] [host2_addr] ... [hostN_addr]"
+            "Usage: python3 celestial.py [celestial.zip] [host1_addr] [host2_addr] ... [hostN_addr] [--filter-updates (optional)]"
         )
 
     if DEBUG:
@@ -84,13 +111,25 @@ if __name__ == "__main__":
     else:
         logging.basicConfig(level=logging.INFO)
 
-    celestial_zip = sys.argv[1]
+    celestial_zip = args[0]
 
-    serializer = celestial.zip_serializer.ZipDeserializer(celestial_zip)
+    serializer: typing.Union[
+        celestial.zip_serializer.ZipDeserializer,
+        celestial.trace_serializer.TraceDeserializer,
+        celestial.update_serializer.UpdateDeserializer,
+    ]
+    if celestial_zip.endswith(celestial.trace_serializer.FILE_EXTENSION):
+        serializer = celestial.trace_serializer.TraceDeserializer(celestial_zip)
+    elif celestial_zip.endswith(celestial.update_serializer.FILE_EXTENSION):
+        if filter_updates:
+            exit("--filter-updates cannot be used with a .updates file")
+        serializer = celestial.update_serializer.UpdateDeserializer(celestial_zip)
+    else:
+        serializer = celestial.zip_serializer.ZipDeserializer(celestial_zip)
 
     config = serializer.config()
 
-    host_addrs = sys.argv[2:]
+    host_addrs = args[1:]
 
     for i in range(len(host_addrs)):
         if ":" not in host_addrs[i]:
@@ -140,25 +179,88 @@ if __name__ == "__main__":
 
     logging.info("Hosts initialized!")
 
+    host_index = celestial.proto_util.make_host_index(machines)
+
     def get_diff(
         t: celestial.types.timestamp_s,
-    ) -> typing.List[proto.celestial.celestial_pb2.StateUpdateRequest]:
-        # we get iterators of the deserialized diffs
+    ) -> typing.List[Updates]:
+        # returns the updates for each host
         t1 = time.perf_counter()
-        s = [
-            *celestial.proto_util.make_update_request_iter(
-                serializer.diff_machines(t), serializer.diff_links(t)
-            )
-        ]
+        s: typing.List[Updates]
+        if isinstance(serializer, celestial.update_serializer.UpdateDeserializer):
+            # the update requests are already encoded
+            s = [serializer.updates(t)] * len(hosts)
+        elif filter_updates:
+            # every host only gets the diffs of its own machines
+            s = [
+                [
+                    *celestial.proto_util.make_packed_update_request_iter_from_arrays(
+                        m, l
+                    )
+                ]
+                for m, l in celestial.proto_util.split_diff_arrays_by_host(
+                    serializer.diff_machines_array(t),
+                    serializer.diff_links_array(t),
+                    host_index,
+                    len(hosts),
+                )
+            ]
+        else:
+            # we get arrays of the deserialized diffs
+            s = [
+                [
+                    *celestial.proto_util.make_packed_update_request_iter_from_arrays(
+                        serializer.diff_machines_array(t),
+                        serializer.diff_links_array(t),
+                    )
+                ]
+            ] * len(hosts)
 
         logging.debug(f"diffs took {time.perf_counter() - t1} seconds")
 
         return s
 
+    def prefetch_diffs() -> typing.Generator[
+        typing.Tuple[celestial.types.timestamp_s, int, typing.List[Updates]],
+        None,
+        None,
+    ]:
+        # prepares the updates of the next PREFETCH_STEPS timesteps in a
+        # background thread while the current updates are sent to the hosts
+        # yields each timestep with the number of timesteps that were ready
+        # when it was taken from the queue
+        p = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        pending: typing.Deque[
+            typing.Tuple[
+                celestial.types.timestamp_s,
+                concurrent.futures.Future[typing.List[Updates]],
+            ]
+        ] = collections.deque()
+        next_t: celestial.types.timestamp_s = 0 + config.offset
+
+        try:
+            while True:
+                while (
+                    len(pending) < PREFETCH_STEPS
+                    and next_t <= config.duration + config.offset
+                ):
+                    pending.append((next_t, p.submit(get_diff, next_t)))
+                    next_t += config.resolution
+
+                if len(pending) == 0:
+                    return
+
+                ready = sum(f.done() for _, f in pending)
+                t, f = pending.popleft()
+
+                yield t, ready, f.result()
+        finally:
+            p.shutdown(wait=False, cancel_futures=True)
+
     # start the simulation
-    timestep: celestial.types.timestamp_s = 0 + config.offset
+    diffs = prefetch_diffs()
 
-    updates = get_diff(timestep)
+    timestep, _, updates = next(diffs)
 
     start_time = time.perf_counter()
     logging.info("Starting emulation...")
@@ -169,21 +271,44 @@ if __name__ == "__main__":
     try:
         while True:
             logging.info(f"Updating for timestep {timestep}")
+            logging.debug(
+                f"timestep {timestep} is {time.perf_counter() - start_time - (timestep - config.offset)} seconds late"
+            )
 
             with concurrent.futures.ThreadPoolExecutor() as e:
                 for i in range(len(hosts)):
                     # need to make some generators
-                    e.submit(hosts[i].update, (u for u in updates))
-
-            timestep += config.resolution
-
-            if timestep > config.duration + config.offset:
+                    if isinstance(
+                        serializer, celestial.update_serializer.UpdateDeserializer
+                    ):
+                        e.submit(
+                            hosts[i].update_raw,
+                            (typing.cast(bytes, u) for u in updates[i]),
+                        )
+                    else:
+                        e.submit(
+                            hosts[i].update,
+                            (
+                                typing.cast(
+                                    proto.celestial.celestial_pb2.StateUpdateRequest,
+                                    u,
+                                )
+                                for u in updates[i]
+                            ),
+                        )
+
+            logging.debug("getting update for next timestep")
+
+            # the next timesteps are already prepared in the background
+            try:
+                timestep, ready, updates = next(diffs)
+            except StopIteration:
                 break
 
-            logging.debug(f"getting update for timestep {timestep}")
+            logging.debug(f"{ready} timesteps prefetched")
 
-            # already getting the next timestep to be faster
-            updates = get_diff(timestep)
+            if ready == 0:
+                logging.warning(f"updates for timestep {timestep} were not ready")
 
             logging.debug(
                 f"waiting for {timestep - config.offset - (time.perf_counter() - start_time)} seconds"
@@ -192,6 +317,8 @@ if __name__ == "__main__":
                 time.sleep(0.001)
 
     finally:
+        diffs.close()
+
         logging.info("got keyboard interrupt, stopping...")
         with concurrent.futures.ThreadPoolExecutor() as e:
             for i in range(len(hosts)):
@@ -100,6 +100,11 @@ class AnimationConstellation:
                 isl_bandwidth_kbits=sc.isl_bandwidth_kbits,
                 bbox=config.bbox,
                 ground_stations=config.ground_stations,
+                propagator=sc.propagator,
+                path_engine=sc.path_engine,
+                threads=sc.threads,
+                incremental_paths=sc.incremental_paths,
+                incremental_tolerance_m=sc.incremental_tolerance_m,
             )
 
             self.shells.append(s)
@@ -40,6 +40,29 @@ class GroundStationConnectionType(Enum):
         return self.value
 
 
+class Propagator(Enum):
+    """
+    Propagator used to calculate satellite positions, can be `SGP4` (the
+    full SGP4 model), `KEPLER` (a two-body circular or elliptical orbit), or
+    `KEPLER_J2` (a two-body orbit with secular J2 perturbations).
+    """
+
+    SGP4 = 0
+    KEPLER = 1
+    KEPLER_J2 = 2
+
+
+class PathEngine(Enum):
+    """
+    Algorithm used to calculate shortest paths between satellites, can be
+    `FLOYD_WARSHALL` (dense all-pairs shortest paths) or `DIJKSTRA` (one
+    sparse single-source search per satellite).
+    """
+
+    FLOYD_WARSHALL = 0
+    DIJKSTRA = 1
+
+
 class MachineConfig:
     """
     Configuration of a Firecracker VM.
@@ -87,6 +110,11 @@ class Shell:
         eccentricity: float,
         isl_bandwidth_kbits: int,
         machine_config: MachineConfig,
+        propagator: Propagator = Propagator.SGP4,
+        path_engine: PathEngine = PathEngine.FLOYD_WARSHALL,
+        threads: int = 0,
+        incremental_paths: bool = False,
+        incremental_tolerance_m: float = 0.0,
     ):
         """
         Shell configuration.
@@ -99,6 +127,11 @@ class Shell:
         :param eccentricity: The eccentricity of the orbits.
         :param isl_bandwidth_kbits: The bandwidth of the inter-satellite links in kbit/s.
         :param machine_config: The machine configuration to use for the satellites.
+        :param propagator: The propagator to use for satellite positions.
+        :param path_engine: The algorithm to use for shortest paths between satellites.
+        :param threads: The number of threads used to calculate paths, 0 for all cores.
+        :param incremental_paths: Whether to update paths incrementally between timesteps.
+        :param incremental_tolerance_m: How much longer (in meters per hop) a kept path may be.
         """
         self.planes = planes
         self.sats = sats
@@ -110,6 +143,12 @@ class Shell:
 
         self.machine_config = machine_config
 
+        self.propagator = propagator
+        self.path_engine = path_engine
+        self.threads = threads
+        self.incremental_paths = incremental_paths
+        self.incremental_tolerance_m = incremental_tolerance_m
+
         self.total_sats = planes * sats
 
 
@@ -218,6 +257,36 @@ COMPUTE_PARAMS_SCHEMA = {
     },
 }
 
+SATGEN_PARAMS_SCHEMA = {
+    "propagator": {
+        "type": "string",
+        "allowed": ["sgp4", "kepler", "kepler_j2"],
+    },
+    "path_engine": {
+        "type": "string",
+        "allowed": ["floyd_warshall", "dijkstra"],
+    },
+    "threads": {
+        "type": "integer",
+        "min": 0,
+    },
+    "incremental_paths": {
+        "type": "boolean",
+    },
+    "incremental_tolerance_m": {
+        "type": "float",
+        "min": 0,
+    },
+}
+
+SATGEN_PARAMS_DEFAULTS: typing.Dict[str, typing.Any] = {
+    "propagator": "sgp4",
+    "path_engine": "floyd_warshall",
+    "threads": 0,
+    "incremental_paths": False,
+    "incremental_tolerance_m": 0.0,
+}
+
 LAT = {
     "type": "float",
     "min": -90.0,
@@ -267,6 +336,11 @@ CONFIG_SCHEMA = {
         "require_all": True,
         "required": True,
     },
+    "satgen_params": {
+        "type": "dict",
+        "schema": SATGEN_PARAMS_SCHEMA,
+        "required": False,
+    },
     "shell": {
         "type": "list",
         "empty": False,
@@ -292,6 +366,7 @@ CONFIG_SCHEMA = {
                     "type": "dict",
                     "schema": COMPUTE_PARAMS_SCHEMA,
                 },
+                "satgen_params": {"type": "dict", "schema": SATGEN_PARAMS_SCHEMA},
             },
         },
     },
@@ -406,6 +481,25 @@ def _fill_configuration(
 
         shell["network_params"] = network
 
+    if "satgen_params" not in config:
+        config["satgen_params"] = {}
+
+    for key, value in SATGEN_PARAMS_DEFAULTS.items():
+        if key not in config["satgen_params"]:
+            config["satgen_params"][key] = value
+
+    for shell in config["shell"]:
+        satgen = {}
+
+        for key, value in config["satgen_params"].items():
+            satgen[key] = value
+
+        if "satgen_params" in shell:
+            for key, value in shell["satgen_params"].items():
+                satgen[key] = value
+
+        shell["satgen_params"] = satgen
+
     if "ground_station" not in config:
         config["ground_station"] = []
 
@@ -497,6 +591,13 @@ class Config:
                     rootfs=s["compute_params"]["rootfs"],
                     boot_parameters=s["compute_params"]["boot_parameters"],
                 ),
+                propagator=Propagator[s["satgen_params"]["propagator"].upper()],
+                path_engine=PathEngine[s["satgen_params"]["path_engine"].upper()],
+                threads=s["satgen_params"]["threads"],
+                incremental_paths=s["satgen_params"]["incremental_paths"],
+                incremental_tolerance_m=s["satgen_params"][
+                    "incremental_tolerance_m"
+                ],
             )
             for s in config["shell"]
         ]
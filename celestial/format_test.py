@@ -0,0 +1,112 @@
+#
+# This file is part of Celestial (https://github.com/OpenFogStack/celestial).
+# Copyright (c) 2024 Tobias Pfandzelter, The OpenFogStack Team.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import os
+import tempfile
+import typing
+import zipfile
+
+import celestial.config
+import celestial.format_util
+import celestial.types
+import celestial.zip_serializer
+
+INITS: typing.List[
+    typing.Tuple[celestial.types.MachineID_dtype, celestial.config.MachineConfig]
+] = [
+    (
+        celestial.types.MachineID(1, 0),
+        celestial.config.MachineConfig(
+            2, 512, 10, "vmlinux.bin", "sat.img", ["ip=dhcp", "quiet"]
+        ),
+    ),
+    (
+        celestial.types.MachineID(0, 1, "gst"),
+        celestial.config.MachineConfig(
+            4, 1024, 20, "vmlinux.bin", "gst.img", ["ip=dhcp"]
+        ),
+    ),
+]
+
+
+def check_init(
+    init: typing.Tuple[celestial.types.MachineID_dtype, celestial.config.MachineConfig],
+    expected: typing.Tuple[
+        celestial.types.MachineID_dtype, celestial.config.MachineConfig
+    ],
+) -> None:
+    (m, c), (m_exp, c_exp) = init, expected
+
+    assert m == m_exp, f"{m} != {m_exp}"
+    assert c.vcpu_count == c_exp.vcpu_count
+    assert c.mem_size_mib == c_exp.mem_size_mib
+    assert c.disk_size == c_exp.disk_size
+    assert c.kernel == c_exp.kernel
+    assert c.rootfs == c_exp.rootfs
+    # no line ending may leak into the last boot parameter
+    assert (
+        c.boot_parameters == c_exp.boot_parameters
+    ), f"{c.boot_parameters} != {c_exp.boot_parameters}"
+
+
+def check_inits(
+    inits: typing.List[
+        typing.Tuple[celestial.types.MachineID_dtype, celestial.config.MachineConfig]
+    ],
+) -> None:
+    assert len(inits) == len(INITS)
+
+    for init, expected in zip(inits, INITS):
+        check_init(init, expected)
+
+
+def test_init_str() -> None:
+    # one line at a time, with and without line ending
+    for m, c in INITS:
+        s = celestial.format_util.init_to_str(m, c)
+        check_init(celestial.format_util.init_from_str(s), (m, c))
+        check_init(celestial.format_util.init_from_str(f"{s}\n"), (m, c))
+
+    # a whole init file
+    b = celestial.format_util.inits_to_bytes(
+        [celestial.format_util.init_to_str(m, c) for m, c in INITS]
+    )
+    check_inits(celestial.format_util.inits_from_bytes(b))
+
+
+def test_zip_inits() -> None:
+    # write the init file the same way earlier versions of the ZipSerializer
+    # did, with every line terminated by a newline
+    with tempfile.TemporaryDirectory() as d:
+        filename = os.path.join(d, "inits.zip")
+
+        with zipfile.ZipFile(filename, "w") as z:
+            z.writestr(
+                "i",
+                "".join(
+                    f"{celestial.format_util.init_to_str(m, c)}\n" for m, c in INITS
+                ),
+            )
+
+        check_inits(celestial.zip_serializer.ZipDeserializer(filename).init_machines())
+
+
+if __name__ == "__main__":
+    test_init_str()
+    test_zip_inits()
+
+    print("Test passed successfully!")
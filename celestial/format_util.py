@@ -0,0 +1,485 @@
+#
+# This file is part of Celestial (https://github.com/OpenFogStack/celestial).
+# Copyright (c) 2024 Tobias Pfandzelter, The OpenFogStack Team.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""Encodings and file layout shared by the Celestial output formats."""
+
+import io
+import mmap
+import pickle
+import struct
+import typing
+
+import numpy as np
+
+import celestial.config
+import celestial.types
+
+
+def config_to_bytes(config: celestial.config.Config) -> bytes:
+    """
+    Serialize a Celestial configuration to bytes.
+
+    :param config: The configuration to serialize.
+    :returns: The serialized configuration.
+    """
+    return pickle.dumps(config)
+
+
+def config_from_bytes(b: bytes) -> celestial.config.Config:
+    """
+    Restore a Celestial configuration from bytes.
+
+    :param b: The serialized configuration.
+    :returns: The restored configuration.
+    :raises TypeError: If the serialized configuration is not a valid
+        configuration.
+    """
+    c = pickle.loads(b)
+
+    if not isinstance(c, celestial.config.Config):
+        raise TypeError(f"Invalid config: {c}")
+
+    return c
+
+
+# INIT commands include too many strings, hence we use CSV
+INIT_HEAD = "machine_id_group,machine_id_id,machine_id_name,config_vcpu_count,config_mem_size_mib,config_disk_size,config_kernel,config_rootfs,config_boot_parameters"
+LIST_SEP = "|"
+
+
+def init_to_str(
+    machine: celestial.types.MachineID_dtype, config: celestial.config.MachineConfig
+) -> str:
+    """
+    Serialize the initialization of a Celestial emulation VM to a string.
+    We serialize to CSV instead of a binary format as we may have to deal
+    with strings (mostly for VM parameters such as boot parameters, kernel
+    path, and image path). This is not optimal but good enough, as we only
+    have to read the initialization file once.
+
+    :param machine: The machine ID of the machine to initialize.
+    :param config: The configuration of the machine to initialize.
+    :returns: The serialized initialization.
+    """
+    b = LIST_SEP.join(config.boot_parameters)
+
+    return f"{machine[0]},{machine[1]},{machine[2]},{config.vcpu_count},{config.mem_size_mib},{config.disk_size},{config.kernel},{config.rootfs},{b}"
+
+
+def init_from_str(
+    s: str,
+) -> typing.Tuple[celestial.types.MachineID_dtype, celestial.config.MachineConfig]:
+    """
+    Restore the machine initialization parameters from a CSV line.
+
+    :param s: The serialized initialization.
+    :returns: The machine ID and its configuration.
+    :raises ValueError: If the serialized initialization is not a valid
+        initialization.
+    """
+
+    (
+        group,
+        id,
+        name,
+        vcpu_count,
+        mem_size_mib,
+        disk_size,
+        kernel,
+        rootfs,
+        boot_parameters,
+    ) = s.rstrip("\n").split(",")
+    try:
+        return (
+            celestial.types.MachineID(int(group), int(id), name),
+            celestial.config.MachineConfig(
+                int(vcpu_count),
+                int(mem_size_mib),
+                int(disk_size),
+                kernel,
+                rootfs,
+                boot_parameters.split(LIST_SEP),
+            ),
+        )
+    except ValueError as e:
+        raise ValueError(f"Invalid init string: {s}: {e}")
+
+
+def inits_to_bytes(inits: typing.List[str]) -> bytes:
+    """
+    Join serialized machine initializations to the contents of an init file,
+    one CSV line per machine.
+
+    :param inits: The serialized initializations.
+    :returns: The contents of the init file.
+    """
+    return "".join(f"{i}\n" for i in inits).encode("utf-8")
+
+
+def inits_from_bytes(
+    b: bytes,
+) -> typing.List[
+    typing.Tuple[celestial.types.MachineID_dtype, celestial.config.MachineConfig]
+]:
+    """
+    Restore the machine initializations from the contents of an init file.
+
+    :param b: The contents of the init file.
+    :returns: A list of the restored machine initializations.
+    """
+    with io.TextIOWrapper(io.BytesIO(b), encoding="utf-8") as f:
+        return [init_from_str(line) for line in f.readlines()]
+
+
+# struct format strings
+# https://docs.python.org/3/library/struct.html
+#  we always force little-endian byte order
+# diff_link
+# (source_machine_id_group:uint8/B,source_machine_id_id:uint16/H,target_machine_id_group:uint8/B,target_machine_id_id:uint16/H,link_latency:uint32/I,link_bandwidth:uint32/I,link_blocked:bool/?,link_next_hop_machine_id_group:uint8/B,link_next_hop_machine_id_id:uint16/H,link_prev_hop_machine_id_group:uint8/B,link_prev_hop_machine_id_id:uint16/H)
+DIFF_LINK_FMT = "<BHBHII?BHBH"
+# diff_machine
+# (machine_id_group:uint8/B,machine_id_id:uint16/H,vm_state:uint8/B)
+DIFF_MACHINE_FMT = "<BHB"
+
+# batches of diffs are written as the raw bytes of a structured array, so the
+# dtypes must have exactly the same layout as the format strings
+assert struct.calcsize(DIFF_LINK_FMT) == celestial.types.LINK_DIFF_DTYPE.itemsize
+assert struct.calcsize(DIFF_MACHINE_FMT) == celestial.types.MACHINE_DIFF_DTYPE.itemsize
+
+
+def diff_link_to_bytes(
+    source: celestial.types.MachineID_dtype,
+    target: celestial.types.MachineID_dtype,
+    link: celestial.types.Link_dtype,
+) -> bytes:
+    """
+    Serialize a link diff to bytes using the struct format string.
+
+    :param source: The source machine ID of the link.
+    :param target: The target machine ID of the link.
+    :param link: The link to serialize.
+    :returns: The serialized link as bytes.
+    """
+    return struct.pack(
+        DIFF_LINK_FMT,
+        celestial.types.MachineID_group(source),
+        celestial.types.MachineID_id(source),
+        celestial.types.MachineID_group(target),
+        celestial.types.MachineID_id(target),
+        celestial.types.Link_latency_us(link),
+        celestial.types.Link_bandwidth_kbits(link),
+        celestial.types.Link_blocked(link),
+        celestial.types.MachineID_group(celestial.types.Link_next_hop(link)),
+        celestial.types.MachineID_id(celestial.types.Link_next_hop(link)),
+        celestial.types.MachineID_group(celestial.types.Link_prev_hop(link)),
+        celestial.types.MachineID_id(celestial.types.Link_prev_hop(link)),
+    )
+
+
+def diff_link_from_bytes(
+    b: bytes,
+) -> typing.Iterator[
+    typing.Tuple[
+        celestial.types.MachineID_dtype,
+        celestial.types.MachineID_dtype,
+        celestial.types.Link_dtype,
+    ]
+]:
+    """
+    Restore link diffs from bytes using the struct format string.
+
+    :param b: Bytes of all serialized links in a timestep.
+    :returns: The restored links as an iterator.
+    """
+
+    # conveniently, we don't have to type-cast everything
+    # let's hope our types never change!
+    return (
+        (
+            (source_machine_id_group, source_machine_id_id, ""),
+            (target_machine_id_group, target_machine_id_id, ""),
+            (
+                link_latency_us,
+                link_bandwidth_kbits,
+                link_blocked,
+                (link_next_hop_machine_id_group, link_next_hop_machine_id_id, ""),
+                (link_prev_hop_machine_id_group, link_prev_hop_machine_id_id, ""),
+            ),
+        )
+        for (
+            source_machine_id_group,
+            source_machine_id_id,
+            target_machine_id_group,
+            target_machine_id_id,
+            link_latency_us,
+            link_bandwidth_kbits,
+            link_blocked,
+            link_next_hop_machine_id_group,
+            link_next_hop_machine_id_id,
+            link_prev_hop_machine_id_group,
+            link_prev_hop_machine_id_id,
+        ) in struct.iter_unpack(DIFF_LINK_FMT, b)
+    )
+
+
+def diff_machine_to_bytes(
+    machine: celestial.types.MachineID_dtype, s: celestial.types.VMState
+) -> bytes:
+    """
+    Serialize a machine diff to bytes using the struct format string.
+
+    :param machine: The machine ID of the machine to serialize.
+    :param s: The VM state of the machine to serialize.
+    :returns: The serialized machine diff as bytes.
+    """
+    return struct.pack(
+        DIFF_MACHINE_FMT,
+        celestial.types.MachineID_group(machine),
+        celestial.types.MachineID_id(machine),
+        s.value,
+    )
+
+
+def diff_machine_from_bytes(
+    b: bytes,
+) -> typing.Iterator[
+    typing.Tuple[celestial.types.MachineID_dtype, celestial.types.VMState]
+]:
+    """
+    Restore machine diffs from bytes using the struct format string.
+
+    :param b: Bytes of all serialized machines in a timestep.
+    :returns: The restored machines as an iterator.
+    """
+
+    return (
+        (
+            celestial.types.MachineID(machine_id_group, machine_id_id),
+            celestial.types.VMState(vm_state),
+        )
+        for machine_id_group, machine_id_id, vm_state in struct.iter_unpack(
+            DIFF_MACHINE_FMT, b
+        )
+    )
+
+
+# Indexed files (.trace and .updates) are written front to back and never
+# seeked:
+#
+#   header:   magic, format version, length of the config, pickled config
+#   data:     the data of each timestep, the layout depends on the format
+#   init:     the machine initializations as CSV lines as in the .zip files
+#   index:    one entry per timestep, the fields depend on the format, but
+#             the first field is always the timestep "t", sorted by timestep
+#   trailer:  offset and length of the init section, offset and number of
+#             entries of the index, magic
+#
+# we always force little-endian byte order
+# (magic:8s,version:uint32/I,config_length:uint64/Q)
+HEADER_FMT = "<8sIQ"
+# (init_offset:uint64/Q,init_length:uint64/Q,index_offset:uint64/Q,index_entries:uint64/Q,magic:8s)
+TRAILER_FMT = "<QQQQ8s"
+
+
+class IndexedFileWriter:
+    """
+    Writes the header, init, index, and trailer of an indexed file. The data
+    of each timestep is written by the format in between.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        magic: bytes,
+        version: int,
+        config: celestial.config.Config,
+    ):
+        """
+        Open the file and write the header.
+
+        :param filename: The file to write to.
+        :param magic: The 8 byte magic of the format.
+        :param version: The version of the format.
+        :param config: The Celestial configuration.
+        """
+        self.magic = magic
+        self.f = open(filename, "wb")
+
+        c = config_to_bytes(config)
+        self.f.write(struct.pack(HEADER_FMT, magic, version, len(c)))
+        self.f.write(c)
+
+        self.inits: typing.List[str] = []
+
+    def init_machine(
+        self,
+        machine: celestial.types.MachineID_dtype,
+        config: celestial.config.MachineConfig,
+    ) -> None:
+        """
+        Add an initialization for a machine, the initializations are written
+        when the file is closed.
+
+        :param machine: The machine ID of the machine to initialize.
+        :param config: The configuration of the machine to initialize.
+        """
+        self.inits.append(init_to_str(machine, config))
+
+    def tell(self) -> int:
+        """
+        Get the current offset in the file.
+
+        :returns: The current offset.
+        """
+        return self.f.tell()
+
+    def write(self, b: bytes) -> None:
+        """
+        Write data of a timestep to the file.
+
+        :param b: The data to write.
+        """
+        self.f.write(b)
+
+    def close(self, index: np.ndarray) -> None:  # type: ignore
+        """
+        Write the initializations, the index, and the trailer and close the
+        file.
+
+        :param index: The index as a structured array whose first field is
+            the timestep.
+        """
+        init_offset = self.f.tell()
+        init = inits_to_bytes(self.inits)
+        self.f.write(init)
+
+        index_offset = self.f.tell()
+        self.f.write(index.tobytes())
+
+        self.f.write(
+            struct.pack(
+                TRAILER_FMT,
+                init_offset,
+                len(init),
+                index_offset,
+                len(index),
+                self.magic,
+            )
+        )
+
+        self.f.close()
+
+
+class IndexedFileReader:
+    """
+    Memory-maps an indexed file and restores its configuration, machine
+    initializations, and index.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        magic: bytes,
+        version: int,
+        index_dtype: np.dtype,  # type: ignore
+    ):
+        """
+        Open and check the file.
+
+        :param filename: The file to read from.
+        :param magic: The 8 byte magic of the format.
+        :param version: The version of the format.
+        :param index_dtype: The dtype of the index entries.
+        :raises ValueError: If the file is not a valid or complete file of
+            this format.
+        """
+        self.filename = filename
+
+        with open(self.filename, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        header_size = struct.calcsize(HEADER_FMT)
+        trailer_size = struct.calcsize(TRAILER_FMT)
+
+        if len(self.mm) < header_size + trailer_size:
+            raise ValueError(f"Invalid file: {self.filename}")
+
+        file_magic, file_version, self.config_length = struct.unpack_from(
+            HEADER_FMT, self.mm, 0
+        )
+
+        if file_magic != magic or file_version != version:
+            raise ValueError(
+                f"Invalid file: {self.filename} ({file_magic!r} version {file_version})"
+            )
+
+        self.config_offset = header_size
+
+        (
+            self.init_offset,
+            self.init_length,
+            index_offset,
+            index_entries,
+            file_magic,
+        ) = struct.unpack_from(TRAILER_FMT, self.mm, len(self.mm) - trailer_size)
+
+        # the trailer is only written when the writer is done
+        if file_magic != magic:
+            raise ValueError(f"Incomplete file: {self.filename}")
+
+        self.index = np.frombuffer(
+            self.mm, dtype=index_dtype, count=index_entries, offset=index_offset
+        )
+
+        self.timesteps = {int(t): i for i, t in enumerate(self.index["t"])}
+
+    def config(self) -> celestial.config.Config:
+        """
+        Restore the Celestial configuration from the header of the file.
+
+        :returns: The restored configuration.
+        """
+        return config_from_bytes(
+            self.mm[self.config_offset : self.config_offset + self.config_length]
+        )
+
+    def init_machines(
+        self,
+    ) -> typing.List[
+        typing.Tuple[celestial.types.MachineID_dtype, celestial.config.MachineConfig]
+    ]:
+        """
+        Restore the machine initializations from the file.
+
+        :returns: A list of the restored machine initializations.
+        """
+        return inits_from_bytes(
+            self.mm[self.init_offset : self.init_offset + self.init_length]
+        )
+
+    def entry(self, t: celestial.types.timestamp_s) -> typing.Optional[np.void]:
+        """
+        Find the index entry of a timestep.
+
+        :param t: The timestep to find.
+        :returns: The index entry or None if the file has no data for the
+            timestep.
+        """
+        if t not in self.timesteps:
+            return None
+
+        return typing.cast(np.void, self.index[self.timesteps[t]])
@@ -44,6 +44,14 @@ class Host:
         c = grpc.insecure_channel(self.addr)
         self.stub = proto.celestial.celestial_pb2_grpc.CelestialStub(c)
 
+        # the same Update RPC as in the stub, but without a request
+        # serializer, so that pre-encoded update requests are sent as is
+        self.raw_update = c.stream_unary(
+            "/openfogstack.celestial.celestial.Celestial/Update",
+            request_serializer=None,
+            response_deserializer=proto.celestial.celestial_pb2.Empty.FromString,
+        )
+
         self.public_key = ""
 
     def register(self) -> proto.celestial.celestial_pb2.RegisterResponse:
@@ -116,3 +124,22 @@ class Host:
         logging.debug(f"update transmission took {t2-t1} seconds")
 
         return
+
+    def update_raw(
+        self,
+        update_requests: typing.Iterator[bytes],
+    ) -> None:
+        """
+        Send a `update` request to the host with update requests that have
+        already been serialized, e.g., with celestial.update_serializer.
+
+        :param update_requests: An iterator of serialized StateUpdateRequest
+            messages.
+        """
+
+        t1 = time.perf_counter()
+        self.raw_update(update_requests)
+        t2 = time.perf_counter()
+        logging.debug(f"update transmission took {t2-t1} seconds")
+
+        return
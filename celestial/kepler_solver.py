@@ -0,0 +1,213 @@
+#
+# This file is part of Celestial (https://github.com/OpenFogStack/celestial).
+# Copyright (c) 2024 Tobias Pfandzelter, The OpenFogStack Team.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""Solve satellite positions using a closed-form Keplerian orbit model"""
+
+import math
+import numba
+import numpy as np
+import numpy.typing as npt
+
+import celestial.sgp4_solver
+
+### CONSTANTS ###
+SECONDS_PER_MINUTE = 60
+MINUTES_PER_DAY = 1440
+KEPLER_MAX_ITERATIONS = 10
+KEPLER_TOLERANCE = 1e-12
+
+
+class KeplerSolver(celestial.sgp4_solver.SGP4Solver):
+    """
+    Implements routines to solve satellite positions with a closed-form
+    two-body orbit model, optionally with the secular effects of the J2
+    perturbation (nodal regression, apsidal precession, and the change in
+    mean motion).
+
+    Orbital elements and secular rates are taken from the same SGP4
+    initialization that the SGP4Solver uses, so both solvers agree on the
+    initial state of each satellite. Positions are then calculated for the
+    entire shell in a single numba kernel, which is more than an order of
+    magnitude faster than SGP4.
+
+    Compared to SGP4, we omit the short-period J2 and long-period J3 terms.
+    For circular LEO shells (tested with 550km/53°, 780km/86.4°, and
+    1200km/87.9°), the J2-corrected model stays within 20km of the SGP4
+    positions at all times, and the error does not grow over time. Without
+    J2 correction, the error is dominated by nodal regression and grows by
+    up to 20km per hour of simulated time, so that model is only suitable
+    for short runs.
+    """
+
+    def __init__(
+        self,
+        planes: int,
+        sats: int,
+        altitude_km: float,
+        inclination: float,
+        arc_of_ascending_nodes: float = 360.0,
+        eccentricity: float = 0.0,
+        j2: bool = True,
+    ):
+        """
+        Initialize the Kepler solver.
+
+        :param planes: The number of planes in the constellation.
+        :param sats: The number of satellites per plane.
+        :param altitude_km: The altitude of the satellites in km.
+        :param inclination: The inclination of the satellites in degrees.
+        :param arc_of_ascending_nodes: The arc of ascending nodes in degrees.
+        :param eccentricity: The eccentricity of the orbits.
+        :param j2: Whether to include secular J2 perturbations.
+        """
+        super().__init__(
+            planes=planes,
+            sats=sats,
+            altitude_km=altitude_km,
+            inclination=inclination,
+            arc_of_ascending_nodes=arc_of_ascending_nodes,
+            eccentricity=eccentricity,
+        )
+
+        self.j2 = j2
+
+    def _init_sgp4_solvers(self) -> None:
+        """
+        Initialize one SGP4 satellite record for each satellite and take the
+        orbital elements and secular rates for the closed-form model from
+        them.
+        """
+        super()._init_sgp4_solvers()
+
+        # all satellites share the same orbit shape
+        sat = self.sgp4_solvers[0]
+
+        self.epoch_offset_min = (
+            (self.start_jd - sat.jdsatepoch) + (self.start_fr - sat.jdsatepochF)
+        ) * MINUTES_PER_DAY
+
+        self.kepler_inclination = sat.inclo
+        self.kepler_eccentricity = sat.ecco
+        self.kepler_argpo = sat.argpo
+
+        if self.j2:
+            self.kepler_a_km = sat.a * sat.radiusearthkm
+            self.kepler_mdot = sat.mdot
+            self.kepler_argpdot = sat.argpdot
+            self.kepler_nodedot = sat.nodedot
+        else:
+            # two-body orbit with the mean motion given to SGP4
+            self.kepler_a_km = (
+                math.pow(sat.xke / sat.no_kozai, 2.0 / 3.0) * sat.radiusearthkm
+            )
+            self.kepler_mdot = sat.no_kozai
+            self.kepler_argpdot = 0.0
+            self.kepler_nodedot = 0.0
+
+        self.kepler_mo = np.array([s.mo for s in self.sgp4_solvers], dtype=np.float64)
+        self.kepler_nodeo = np.array(
+            [s.nodeo for s in self.sgp4_solvers], dtype=np.float64
+        )
+
+    def get_positions(self, times: npt.NDArray[np.int64]) -> npt.NDArray[np.int32]:
+        """
+        Calculate the satellite positions for a number of timesteps at once.
+
+        :param times: The times in seconds since the start of the simulation.
+        :return: An array of shape (len(times), total_sats, 3) with the x, y,
+            and z positions of all satellites in meters.
+        """
+        positions = np.empty((len(times), self.total_sats, 3), dtype=np.int32)
+
+        self._numba_kepler_positions(
+            times_min=times / SECONDS_PER_MINUTE + self.epoch_offset_min,
+            mo=self.kepler_mo,
+            nodeo=self.kepler_nodeo,
+            inclination=self.kepler_inclination,
+            eccentricity=self.kepler_eccentricity,
+            argpo=self.kepler_argpo,
+            a_km=self.kepler_a_km,
+            mdot=self.kepler_mdot,
+            argpdot=self.kepler_argpdot,
+            nodedot=self.kepler_nodedot,
+            positions=positions,
+        )
+
+        return positions
+
+    @staticmethod
+    @numba.njit(nogil=True)  # type: ignore
+    def _numba_kepler_positions(
+        times_min: np.ndarray,  # type: ignore
+        mo: np.ndarray,  # type: ignore
+        nodeo: np.ndarray,  # type: ignore
+        inclination: float,
+        eccentricity: float,
+        argpo: float,
+        a_km: float,
+        mdot: float,
+        argpdot: float,
+        nodedot: float,
+        positions: np.ndarray,  # type: ignore
+    ) -> None:
+        """
+        Actual implementation of get_positions optimized with numba. Angles
+        are in radians, rates in radians per minute.
+        """
+        cos_i = math.cos(inclination)
+        sin_i = math.sin(inclination)
+        b_km = a_km * math.sqrt(1.0 - eccentricity * eccentricity)
+
+        for t in range(len(times_min)):
+            tm = times_min[t]
+
+            argp = argpo + argpdot * tm
+            cos_w = math.cos(argp)
+            sin_w = math.sin(argp)
+
+            for n in range(len(mo)):
+                m = mo[n] + mdot * tm
+
+                # solve Kepler's equation for the eccentric anomaly
+                # for circular orbits, this is just the mean anomaly
+                e_anomaly = m
+                if eccentricity > 0.0:
+                    for _ in range(KEPLER_MAX_ITERATIONS):
+                        delta = (e_anomaly - eccentricity * math.sin(e_anomaly) - m) / (
+                            1.0 - eccentricity * math.cos(e_anomaly)
+                        )
+                        e_anomaly -= delta
+                        if abs(delta) < KEPLER_TOLERANCE:
+                            break
+
+                # position in the orbital plane, perigee along the x axis
+                px = a_km * (math.cos(e_anomaly) - eccentricity)
+                py = b_km * math.sin(e_anomaly)
+
+                # rotate by argument of perigee
+                qx = px * cos_w - py * sin_w
+                qy = px * sin_w + py * cos_w
+
+                # rotate by inclination and right ascension of ascending node
+                node = nodeo[n] + nodedot * tm
+                cos_o = math.cos(node)
+                sin_o = math.sin(node)
+
+                # same rounding as for SGP4: whole kilometers
+                positions[t, n, 0] = np.int32(qx * cos_o - qy * sin_o * cos_i) * 1000
+                positions[t, n, 1] = np.int32(qx * sin_o + qy * cos_o * cos_i) * 1000
+                positions[t, n, 2] = np.int32(qy * sin_i) * 1000
@@ -0,0 +1,169 @@
+#
+# This file is part of Celestial (https://github.com/OpenFogStack/celestial).
+# Copyright (c) 2024 Tobias Pfandzelter, The OpenFogStack Team.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+# Benchmark the shortest path engines of a shell. Each engine is timed as the
+# original serial kernel (the same code compiled without numba's parallel
+# mode), as the parallel kernel with one thread, and as the parallel kernel
+# with all available threads. Run from the repository root with:
+#
+#   python3 -m celestial.parallel_benchmark
+#
+# Set NUMBA_NUM_THREADS to limit the number of threads. Note that a shell with
+# 10,000 satellites needs about 1GB of memory and that Floyd-Warshall takes
+# a very long time for large shells (about 15 minutes per run with 10,000
+# satellites on one core), so set MAX_FLOYD_WARSHALL_SATS accordingly.
+
+import numba
+import numpy as np
+import time
+import typing
+
+import celestial.config
+import celestial.shell
+
+# planes, sats per plane
+SHELLS = [(40, 25), (80, 50), (100, 100)]
+MAX_FLOYD_WARSHALL_SATS = 4000
+GROUND_STATIONS = 16
+REPEATS = 3
+
+# the original kernels, i.e., the parallel kernels compiled without parallel
+# mode, where numba.prange is a normal range
+SERIAL_KERNELS = {
+    celestial.config.PathEngine.FLOYD_WARSHALL: numba.njit(
+        celestial.shell.Shell._numba_floyd_warshall.py_func
+    ),
+    celestial.config.PathEngine.DIJKSTRA: numba.njit(
+        celestial.shell.Shell._numba_dijkstra.py_func
+    ),
+}
+
+PARALLEL_KERNELS = {
+    celestial.config.PathEngine.FLOYD_WARSHALL: celestial.shell.Shell._numba_floyd_warshall,
+    celestial.config.PathEngine.DIJKSTRA: celestial.shell.Shell._numba_dijkstra,
+}
+
+
+def make_ground_stations(n: int) -> typing.List[celestial.config.GroundStation]:
+    rng = np.random.default_rng(2)
+
+    return [
+        celestial.config.GroundStation(
+            name=f"gst{i}",
+            lat=rng.uniform(-60.0, 60.0),
+            lng=rng.uniform(-180.0, 180.0),
+            gts_bandwidth_kbits=10_000_000,
+            min_elevation=25.0,
+            connection_type=celestial.config.GroundStationConnectionType.ALL,
+            machine_config=celestial.config.MachineConfig(
+                vcpu_count=1,
+                mem_size_mib=128,
+                disk_size=1024,
+                kernel="test.bin",
+                rootfs="rootfs.img",
+                boot_parameters=[],
+            ),
+        )
+        for i in range(n)
+    ]
+
+
+def make_shell(
+    planes: int, sats: int, engine: celestial.config.PathEngine
+) -> celestial.shell.Shell:
+    s = celestial.shell.Shell(
+        shell_identifier=1,
+        planes=planes,
+        sats=sats,
+        altitude_km=550,
+        inclination=53.0,
+        arc_of_ascending_nodes=360.0,
+        eccentricity=0.0,
+        isl_bandwidth_kbits=10_000_000,
+        bbox=celestial.config.BoundingBox(
+            lat1=-90.0, lon1=-180.0, lat2=90.0, lon2=180.0
+        ),
+        ground_stations=make_ground_stations(GROUND_STATIONS),
+        path_engine=engine,
+    )
+    s.step(0)
+
+    return s
+
+
+def time_kernel(
+    kernel: typing.Callable[..., None],
+    s: celestial.shell.Shell,
+    threads: int,
+    repeats: int,
+) -> float:
+    numba.set_num_threads(threads)
+
+    dist_matrix = np.empty((s.total_sats, s.total_sats), dtype=np.float32)
+    next_hops = np.empty((s.total_sats, s.total_sats), dtype=np.int16)
+
+    t1 = time.perf_counter()
+    for _ in range(repeats):
+        kernel(
+            sat_link_array=s.link_array,
+            total_isl_links=s.total_isl_links,
+            total_sats=s.total_sats,
+            dist_matrix=dist_matrix,
+            next_hops=next_hops,
+        )
+    t2 = time.perf_counter()
+
+    return (t2 - t1) / repeats
+
+
+if __name__ == "__main__":
+    max_threads = numba.config.NUMBA_NUM_THREADS  # type: ignore
+
+    print(f"using up to {max_threads} threads")
+
+    # compile everything on a small shell first
+    for engine in celestial.config.PathEngine:
+        s = make_shell(4, 4, engine)
+        time_kernel(SERIAL_KERNELS[engine], s, 1, 1)
+        time_kernel(PARALLEL_KERNELS[engine], s, 1, 1)
+        time_kernel(PARALLEL_KERNELS[engine], s, max_threads, 1)
+
+    for planes, sats in SHELLS:
+        for engine in celestial.config.PathEngine:
+            if (
+                engine == celestial.config.PathEngine.FLOYD_WARSHALL
+                and planes * sats > MAX_FLOYD_WARSHALL_SATS
+            ):
+                print(f"{planes * sats} sats, {engine.name}: skipped")
+                continue
+
+            s = make_shell(planes, sats, engine)
+
+            # large shells take long enough to only run once
+            repeats = REPEATS if planes * sats <= 1000 else 1
+
+            # shell_test.py checks that all kernels have the same results
+            serial = time_kernel(SERIAL_KERNELS[engine], s, 1, repeats)
+            one = time_kernel(PARALLEL_KERNELS[engine], s, 1, repeats)
+            parallel = time_kernel(PARALLEL_KERNELS[engine], s, max_threads, repeats)
+
+            print(
+                f"{planes * sats} sats, {engine.name}: serial {serial:.3f}s, "
+                f"1 thread {one:.3f}s ({serial / one:.2f}x), "
+                f"{max_threads} threads {parallel:.3f}s ({serial / parallel:.2f}x)",
+                flush=True,
+            )
@@ -20,6 +20,8 @@
 import logging
 import typing
 
+import numpy as np
+
 import celestial.config
 import celestial.host
 import celestial.types
@@ -86,108 +88,132 @@ def make_init_request(
     return init_request
 
 
-T = typing.TypeVar("T")
-
-
-def _islice(iterable: typing.Iterator[T], n: int) -> typing.Iterator[T]:
-    count = 0
-
-    for i in iterable:
-        if count >= n:
-            break
-
-        yield i
-
-        count += 1
-
-    if count == 0:
-        raise StopIteration
-
-
-def make_update_request_iter(
-    machine_diff_iter: typing.Iterator[
-        typing.Tuple[celestial.types.MachineID_dtype, celestial.types.VMState]
-    ],
-    link_diff_iter: typing.Iterator[
-        typing.Tuple[
-            celestial.types.MachineID_dtype,
-            celestial.types.MachineID_dtype,
-            celestial.types.Link_dtype,
-        ]
-    ],
-) -> typing.Iterator[proto.celestial.celestial_pb2.StateUpdateRequest]:
-    """
-    A function that returns a combined iterator of StateUpdateRequests based on
-    iterating over machine_diff_iter and link_diff_iter.
+def _make_machine_diff_request(
+    machine_diffs: np.ndarray,  # type: ignore
+) -> proto.celestial.celestial_pb2.StateUpdateRequest:
     """
+    Make a StateUpdateRequest with all machine diffs of a timestep.
 
-    yield proto.celestial.celestial_pb2.StateUpdateRequest(
+    :param machine_diffs: The machine diffs as a MACHINE_DIFF_DTYPE array.
+    :returns: The update request.
+    """
+    return proto.celestial.celestial_pb2.StateUpdateRequest(
         machine_diffs=[
             proto.celestial.celestial_pb2.StateUpdateRequest.MachineDiff(
                 id=proto.celestial.celestial_pb2.MachineID(
-                    group=_machineID_group(m_id),
-                    id=_machineID_id(m_id),
+                    group=m_group,
+                    id=m_id,
                 ),
                 active=proto.celestial.celestial_pb2.VM_STATE_STOPPED
-                if m_state == celestial.types.VMState.STOPPED
+                if m_state == celestial.types.VMState.STOPPED.value
                 else proto.celestial.celestial_pb2.VM_STATE_ACTIVE,
             )
-            for m_id, m_state in machine_diff_iter
+            for m_group, m_id, m_state in zip(
+                machine_diffs["group"].tolist(),
+                machine_diffs["id"].tolist(),
+                machine_diffs["state"].tolist(),
+            )
         ],
     )
 
-    try:
-        while True:
-            t = proto.celestial.celestial_pb2.StateUpdateRequest(
-                network_diffs=[
-                    proto.celestial.celestial_pb2.StateUpdateRequest.NetworkDiff(
-                        source=proto.celestial.celestial_pb2.MachineID(
-                            group=_machineID_group(source),
-                            id=_machineID_id(source),
-                        ),
-                        target=proto.celestial.celestial_pb2.MachineID(
-                            group=_machineID_group(target),
-                            id=_machineID_id(target),
-                        ),
-                        latency_us=typing.cast(
-                            int, celestial.types.Link_latency_us(link)
-                        ),
-                        bandwidth_kbps=typing.cast(
-                            int, celestial.types.Link_bandwidth_kbits(link)
-                        ),
-                        blocked=False,
-                        next=proto.celestial.celestial_pb2.MachineID(
-                            group=_machineID_group(celestial.types.Link_next_hop(link)),
-                            id=_machineID_id(celestial.types.Link_next_hop(link)),
-                        ),
-                        prev=proto.celestial.celestial_pb2.MachineID(
-                            group=_machineID_group(celestial.types.Link_prev_hop(link)),
-                            id=_machineID_id(celestial.types.Link_prev_hop(link)),
-                        ),
-                    )
-                    if not celestial.types.Link_blocked(link)
-                    else proto.celestial.celestial_pb2.StateUpdateRequest.NetworkDiff(
-                        source=proto.celestial.celestial_pb2.MachineID(
-                            group=_machineID_group(source),
-                            id=_machineID_id(source),
-                        ),
-                        target=proto.celestial.celestial_pb2.MachineID(
-                            group=_machineID_group(target),
-                            id=_machineID_id(target),
-                        ),
-                        blocked=True,
-                    )
-                    for source, target, link in _islice(
-                        link_diff_iter, MAX_DIFF_UPDATE_SIZE
-                    )
-                ]
+
+def make_packed_update_request_iter_from_arrays(
+    machine_diffs: np.ndarray,  # type: ignore
+    link_diffs: np.ndarray,  # type: ignore
+) -> typing.Iterator[proto.celestial.celestial_pb2.StateUpdateRequest]:
+    """
+    A function that returns an iterator of StateUpdateRequests for the machine
+    and link diffs of a timestep, given as structured arrays (see
+    celestial.types.MACHINE_DIFF_DTYPE and celestial.types.LINK_DIFF_DTYPE).
+    The link diffs are sent as packed_network_diffs with one repeated field
+    per column instead of one NetworkDiff message per diff. Columns are copied
+    into the request as a whole, no Python object is created per diff.
+    """
+
+    yield _make_machine_diff_request(machine_diffs)
+
+    for start in range(0, len(link_diffs), MAX_DIFF_UPDATE_SIZE):
+        chunk = link_diffs[start : start + MAX_DIFF_UPDATE_SIZE]
+
+        yield proto.celestial.celestial_pb2.StateUpdateRequest(
+            packed_network_diffs=proto.celestial.celestial_pb2.StateUpdateRequest.PackedNetworkDiffs(
+                blocked=chunk["blocked"].tolist(),
+                source_group=chunk["source_group"].tolist(),
+                source_id=chunk["source_id"].tolist(),
+                target_group=chunk["target_group"].tolist(),
+                target_id=chunk["target_id"].tolist(),
+                latency_us=chunk["latency_us"].tolist(),
+                bandwidth_kbps=chunk["bandwidth_kbits"].tolist(),
+                next_group=chunk["next_hop_group"].tolist(),
+                next_id=chunk["next_hop_id"].tolist(),
+                prev_group=chunk["prev_hop_group"].tolist(),
+                prev_id=chunk["prev_hop_id"].tolist(),
             )
-            yield t
-    except RuntimeError:
-        # we reached the end of the link diff iterator
-        # we just yield an empty update request
-        # yield proto.celestial.celestial_pb2.StateUpdateRequest()
-
-        # and we are done
-        logging.debug("generating update requests done")
-        return
+        )
+
+    logging.debug("generating update requests done")
+
+
+def make_host_index(
+    machines: typing.Dict[
+        int,
+        typing.List[
+            typing.Tuple[
+                celestial.types.MachineID_dtype, celestial.config.MachineConfig
+            ]
+        ],
+    ],
+) -> np.ndarray:  # type: ignore
+    """
+    Build a lookup table from machine group and ID to the host that runs
+    the machine.
+
+    :param machines: The machines assigned to each host.
+    :returns: An array indexed by [group, id] with the number of the host
+        that runs the machine, -1 for unknown machines.
+    """
+
+    ids = [m_id for h in machines for m_id, _ in machines[h]]
+
+    max_group = max((_machineID_group(m) for m in ids), default=0)
+    max_id = max((_machineID_id(m) for m in ids), default=0)
+
+    host_index = np.full((max_group + 1, max_id + 1), -1, dtype=np.int32)
+
+    for h in machines:
+        for m_id, _ in machines[h]:
+            host_index[_machineID_group(m_id), _machineID_id(m_id)] = h
+
+    return host_index
+
+
+def split_diff_arrays_by_host(
+    machine_diffs: np.ndarray,  # type: ignore
+    link_diffs: np.ndarray,  # type: ignore
+    host_index: np.ndarray,  # type: ignore
+    num_hosts: int,
+) -> typing.List[typing.Tuple[np.ndarray, np.ndarray]]:  # type: ignore
+    """
+    Split the diffs of a timestep into the diffs each host needs. A host gets
+    the machine diffs of its own machines and the link diffs where its
+    machines are the source or the target, as hosts set up links in both
+    directions.
+
+    :param machine_diffs: The machine diffs as a MACHINE_DIFF_DTYPE array.
+    :param link_diffs: The link diffs as a LINK_DIFF_DTYPE array.
+    :param host_index: The lookup table from make_host_index.
+    :param num_hosts: The number of hosts.
+    :returns: A tuple of machine diffs and link diffs for each host.
+    """
+
+    m_host = host_index[machine_diffs["group"], machine_diffs["id"]]
+    source_host = host_index[link_diffs["source_group"], link_diffs["source_id"]]
+    target_host = host_index[link_diffs["target_group"], link_diffs["target_id"]]
+
+    return [
+        (
+            machine_diffs[m_host == h],
+            link_diffs[(source_host == h) | (target_host == h)],
+        )
+        for h in range(num_hosts)
+    ]
@@ -0,0 +1,192 @@
+#
+# This file is part of Celestial (https://github.com/OpenFogStack/celestial).
+# Copyright (c) 2024 Tobias Pfandzelter, The OpenFogStack Team.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import typing
+
+import numpy as np
+
+import celestial.config
+import celestial.format_test
+import celestial.proto_util
+import celestial.trace_serializer_test
+import celestial.types
+import proto.celestial.celestial_pb2
+
+# the columns of PackedNetworkDiffs and the LINK_DIFF_DTYPE fields they hold
+PACKED_COLUMNS = {
+    "blocked": "blocked",
+    "source_group": "source_group",
+    "source_id": "source_id",
+    "target_group": "target_group",
+    "target_id": "target_id",
+    "latency_us": "latency_us",
+    "bandwidth_kbps": "bandwidth_kbits",
+    "next_group": "next_hop_group",
+    "next_id": "next_hop_id",
+    "prev_group": "prev_hop_group",
+    "prev_id": "prev_hop_id",
+}
+
+
+def check_update_requests(
+    requests: typing.List[proto.celestial.celestial_pb2.StateUpdateRequest],
+    machine_diffs: np.ndarray,  # type: ignore
+    link_diffs: np.ndarray,  # type: ignore
+) -> None:
+    # the machine diffs come first, then the link diffs in packed chunks
+    assert len(requests) == 1 + -(
+        -len(link_diffs) // celestial.proto_util.MAX_DIFF_UPDATE_SIZE
+    )
+
+    m = requests[0]
+    assert len(m.network_diffs) == 0
+    assert not m.HasField("packed_network_diffs")
+    assert [(d.id.group, d.id.id) for d in m.machine_diffs] == list(
+        zip(machine_diffs["group"].tolist(), machine_diffs["id"].tolist())
+    )
+    assert [d.active for d in m.machine_diffs] == [
+        (
+            proto.celestial.celestial_pb2.VM_STATE_STOPPED
+            if s == celestial.types.VMState.STOPPED.value
+            else proto.celestial.celestial_pb2.VM_STATE_ACTIVE
+        )
+        for s in machine_diffs["state"].tolist()
+    ]
+
+    columns: typing.Dict[str, typing.List[typing.Any]] = {c: [] for c in PACKED_COLUMNS}
+
+    for r in requests[1:]:
+        assert len(r.machine_diffs) == 0
+        assert len(r.network_diffs) == 0
+
+        p = r.packed_network_diffs
+        n = len(p.blocked)
+        assert 0 < n <= celestial.proto_util.MAX_DIFF_UPDATE_SIZE
+
+        for c in PACKED_COLUMNS:
+            # all columns of a chunk must have the same length
+            assert len(getattr(p, c)) == n, f"{c}: {len(getattr(p, c))} != {n}"
+            columns[c].extend(getattr(p, c))
+
+    for c, field in PACKED_COLUMNS.items():
+        assert columns[c] == link_diffs[field].tolist(), c
+
+
+def test_packed_update_requests() -> None:
+    # no link diffs, a few, and more than fit into one request
+    for n in (0, 7, celestial.proto_util.MAX_DIFF_UPDATE_SIZE + 3):
+        machine_diffs = celestial.trace_serializer_test.make_machine_diffs(5, n)
+        link_diffs = celestial.trace_serializer_test.make_link_diffs(n, n)
+
+        requests = list(
+            celestial.proto_util.make_packed_update_request_iter_from_arrays(
+                machine_diffs, link_diffs
+            )
+        )
+
+        # requests must survive serialization
+        requests = [
+            proto.celestial.celestial_pb2.StateUpdateRequest.FromString(
+                r.SerializeToString()
+            )
+            for r in requests
+        ]
+
+        check_update_requests(requests, machine_diffs, link_diffs)
+
+
+def test_split_diff_arrays_by_host() -> None:
+    rng = np.random.default_rng(0)
+
+    num_hosts = 3
+    c = celestial.format_test.INITS[0][1]
+
+    # machines of groups 0 to 2 round-robin on the hosts, except one machine
+    # that is on no host
+    machines: typing.Dict[
+        int,
+        typing.List[
+            typing.Tuple[
+                celestial.types.MachineID_dtype, celestial.config.MachineConfig
+            ]
+        ],
+    ] = {h: [] for h in range(num_hosts)}
+    expected_host = {}
+    for group in range(3):
+        for m_id in range(10):
+            if (group, m_id) == (1, 3):
+                continue
+            h = (group + m_id) % num_hosts
+            machines[h].append((celestial.types.MachineID(group, m_id), c))
+            expected_host[(group, m_id)] = h
+
+    host_index = celestial.proto_util.make_host_index(machines)
+
+    machine_diffs = np.zeros(20, dtype=celestial.types.MACHINE_DIFF_DTYPE)
+    machine_diffs["group"] = rng.integers(0, 3, size=20)
+    machine_diffs["id"] = rng.integers(0, 10, size=20)
+    machine_diffs["state"] = rng.integers(0, 2, size=20)
+
+    link_diffs = celestial.trace_serializer_test.make_link_diffs(200, 0)
+    for end in ("source", "target"):
+        link_diffs[f"{end}_group"] = rng.integers(0, 3, size=200)
+        link_diffs[f"{end}_id"] = rng.integers(0, 10, size=200)
+
+    split = celestial.proto_util.split_diff_arrays_by_host(
+        machine_diffs, link_diffs, host_index, num_hosts
+    )
+
+    assert len(split) == num_hosts
+
+    for h, (m, l) in enumerate(split):
+        # diffs keep their order
+        assert np.array_equal(
+            m,
+            machine_diffs[
+                [
+                    expected_host.get((g, i)) == h
+                    for g, i in zip(machine_diffs["group"], machine_diffs["id"])
+                ]
+            ],
+        )
+        assert np.array_equal(
+            l,
+            link_diffs[
+                [
+                    expected_host.get((sg, si)) == h or expected_host.get((tg, ti)) == h
+                    for sg, si, tg, ti in zip(
+                        link_diffs["source_group"],
+                        link_diffs["source_id"],
+                        link_diffs["target_group"],
+                        link_diffs["target_id"],
+                    )
+                ]
+            ],
+        )
+
+    # every diff of a machine on a host goes somewhere
+    assert sum(len(m) for m, _ in split) == sum(
+        (int(g), int(i)) in expected_host
+        for g, i in zip(machine_diffs["group"], machine_diffs["id"])
+    )
+
+
+if __name__ == "__main__":
+    test_packed_update_requests()
+    test_split_diff_arrays_by_host()
+
+    print("Test passed successfully!")
@@ -20,14 +20,286 @@ A constellation of satellite shells that takes updates and sends them to
 the serializer
 """
 
+import collections
+import concurrent.futures
+import multiprocessing
+import multiprocessing.pool
+import multiprocessing.shared_memory
 import typing
 
+import numba
+import numpy as np
+
 import celestial.serializer
 import celestial.config
 import celestial.types
 import celestial.shell
 
 DELAY_UPDATE_THRESHOLD_US = 500
+# number of timesteps for which satellite positions are calculated at once
+POSITION_WINDOW_STEPS = 600
+# number of consecutive timesteps that a worker process calculates at once
+WORKER_CHUNK_STEPS = 4
+# number of chunks per worker that may be calculated ahead of the diffs
+WORKER_CHUNKS_AHEAD = 2
+# maximum size of the path states that may be calculated ahead of the diffs
+WORKER_MAX_BYTES = 2**30
+
+
+def _make_shells(config: celestial.config.Config) -> typing.List[celestial.shell.Shell]:
+    """
+    Create the shells of a constellation.
+
+    :param config: The configuration of the constellation.
+    :return: The shells of the constellation.
+    """
+    return [
+        celestial.shell.Shell(
+            shell_identifier=i + 1,
+            planes=sc.planes,
+            sats=sc.sats,
+            altitude_km=sc.altitude_km,
+            inclination=sc.inclination,
+            arc_of_ascending_nodes=sc.arc_of_ascending_nodes,
+            eccentricity=sc.eccentricity,
+            isl_bandwidth_kbits=sc.isl_bandwidth_kbits,
+            bbox=config.bbox,
+            ground_stations=config.ground_stations,
+            propagator=sc.propagator,
+            path_engine=sc.path_engine,
+            threads=sc.threads,
+            incremental_paths=sc.incremental_paths,
+            incremental_tolerance_m=sc.incremental_tolerance_m,
+        )
+        for i, sc in enumerate(config.shells)
+    ]
+
+
+# dtype, number of entries, and byte offset of each array of the path state of
+# each shell within one timestep
+PathStateLayout = typing.List[typing.List[typing.Tuple[typing.Any, int, int]]]
+
+
+def _path_state_layout(
+    config: celestial.config.Config,
+) -> typing.Tuple[PathStateLayout, int]:
+    """
+    Lay out the path states of all shells of one timestep in a buffer.
+
+    :param config: The configuration of the constellation.
+    :return: The layout and the size of the path states of one timestep in
+        bytes.
+    """
+    layout: PathStateLayout = []
+    offset = 0
+
+    for sc in config.shells:
+        total_nodes = sc.total_sats + len(config.ground_stations)
+        total_paths = total_nodes * (total_nodes - 1) // 2
+
+        arrays = []
+        for i, dtype in enumerate(celestial.shell.PATH_STATE_DTYPES):
+            count = sc.total_sats if i == 0 else total_paths
+            arrays.append((dtype, count, offset))
+
+            # keep all arrays aligned
+            offset += (count * np.dtype(dtype).itemsize + 7) // 8 * 8
+
+        layout.append(arrays)
+
+    return layout, offset
+
+
+def _path_state_views(
+    shm: multiprocessing.shared_memory.SharedMemory,
+    offset: int,
+    layout: PathStateLayout,
+) -> typing.List[celestial.shell.PathState]:
+    """
+    Get the path states of all shells of one timestep in a buffer.
+
+    :param shm: The shared memory buffer.
+    :param offset: The byte offset of the timestep in the buffer.
+    :param layout: The layout of the path states of one timestep.
+    :return: Arrays that are views of the buffer, one path state per shell.
+    """
+    buf = typing.cast(memoryview, shm.buf)
+    states = []
+
+    for arrays in layout:
+        a, b, c, d, e, f = (
+            np.ndarray(count, dtype=dtype, buffer=buf, offset=offset + o)
+            for dtype, count, o in arrays
+        )
+        states.append((a, b, c, d, e, f))
+
+    return states
+
+
+# the shells of a worker process
+_worker_shells: typing.List[celestial.shell.Shell] = []
+# the layout of the path states of one timestep
+_worker_layout: PathStateLayout = []
+_worker_step_bytes = 0
+# the shared memory buffers that the worker process has attached to
+_worker_buffers: typing.Dict[str, multiprocessing.shared_memory.SharedMemory] = {}
+
+
+def _init_worker(config: celestial.config.Config, threads: int) -> None:
+    """
+    Initialize a worker process that calculates path states.
+
+    :param config: The configuration of the constellation.
+    :param threads: The maximum number of threads per shell in this worker.
+    """
+    global _worker_shells, _worker_layout, _worker_step_bytes
+    _worker_shells = _make_shells(config)
+    _worker_layout, _worker_step_bytes = _path_state_layout(config)
+
+    for s in _worker_shells:
+        s.threads = min(s.threads, threads)
+
+
+def _calculate_path_states(
+    times: typing.List[celestial.types.timestamp_s], buffer: str
+) -> None:
+    """
+    Calculate the path states of all shells for consecutive timesteps in a
+    worker process and write them to a shared memory buffer, one timestep
+    after the other.
+
+    :param times: The timesteps to calculate.
+    :param buffer: The name of the shared memory buffer.
+    """
+    if buffer not in _worker_buffers:
+        _worker_buffers[buffer] = multiprocessing.shared_memory.SharedMemory(buffer)
+
+    for s in _worker_shells:
+        s.precompute_positions(times)
+
+    for i, t in enumerate(times):
+        states = _path_state_views(
+            _worker_buffers[buffer], i * _worker_step_bytes, _worker_layout
+        )
+
+        for s, state in zip(_worker_shells, states):
+            s.step(t, calculate_paths=True)
+            s.get_path_state(out=state)
+
+        # views must not outlive the buffer
+        del states
+
+
+def calculate_path_states(
+    config: celestial.config.Config,
+    workers: int,
+    max_bytes: int = WORKER_MAX_BYTES,
+) -> typing.Iterator[
+    typing.Tuple[celestial.types.timestamp_s, typing.List[celestial.shell.PathState]]
+]:
+    """
+    Calculate the path states of all shells for all timesteps of the
+    simulation in a number of worker processes. Each worker calculates
+    chunks of consecutive timesteps, the path states are yielded in order.
+
+    Paths only depend on the current timestep, but the differences between
+    timesteps depend on all previous timesteps because delay changes below
+    the update threshold accumulate. Hence, pass the path states to `step`
+    of a single constellation in order to calculate the differences.
+
+    Workers write the path states to shared memory buffers instead of
+    sending them back, as the delays of almost all paths change in every
+    timestep. To bound memory, there are only as many buffers as fit into
+    max_bytes, but at least one.
+
+    Incremental paths depend on the paths of the previous timestep and can
+    thus not be calculated in parallel.
+
+    :param config: The configuration of the constellation.
+    :param workers: The number of worker processes.
+    :param max_bytes: The maximum size of all path states that have been
+        calculated but not yet yielded.
+    :return: An iterator over the timesteps and the path states of all shells.
+    """
+    if any(sc.incremental_paths for sc in config.shells):
+        raise ValueError("incremental paths cannot be calculated in parallel")
+
+    layout, step_bytes = _path_state_layout(config)
+
+    # make chunks smaller rather than leave workers idle, and use as many
+    # buffers as fit, up to a few per worker
+    chunk_steps = max(1, min(WORKER_CHUNK_STEPS, max_bytes // (step_bytes * workers)))
+    total_buffers = max(
+        1, min(WORKER_CHUNKS_AHEAD * workers, max_bytes // (step_bytes * chunk_steps))
+    )
+
+    times = list(
+        range(config.offset, config.offset + config.duration, config.resolution)
+    )
+    chunks = [times[i : i + chunk_steps] for i in range(0, len(times), chunk_steps)]
+
+    # share the available cores between the workers
+    threads = max(1, numba.config.NUMBA_NUM_THREADS // workers)  # type: ignore
+
+    buffers = [
+        multiprocessing.shared_memory.SharedMemory(
+            create=True, size=step_bytes * chunk_steps
+        )
+        for _ in range(total_buffers)
+    ]
+
+    try:
+        # numba's threading layers are not fork-safe, so we spawn the workers
+        with multiprocessing.get_context("spawn").Pool(
+            workers, initializer=_init_worker, initargs=(config, threads)
+        ) as pool:
+            pending: typing.Deque[
+                typing.Tuple[
+                    typing.List[celestial.types.timestamp_s],
+                    multiprocessing.shared_memory.SharedMemory,
+                    "multiprocessing.pool.AsyncResult[typing.Any]",
+                ]
+            ] = collections.deque()
+            free = collections.deque(buffers)
+            next_chunk = 0
+
+            while pending or next_chunk < len(chunks):
+                # a buffer is only reused once all its path states have been
+                # yielded, so the path states do not pile up in memory if the
+                # diffs are slower
+                while next_chunk < len(chunks) and free:
+                    shm = free.popleft()
+                    pending.append(
+                        (
+                            chunks[next_chunk],
+                            shm,
+                            pool.apply_async(
+                                _calculate_path_states, (chunks[next_chunk], shm.name)
+                            ),
+                        )
+                    )
+                    next_chunk += 1
+
+                chunk, shm, result = pending.popleft()
+                result.get()
+
+                for i, t in enumerate(chunk):
+                    # copy so that the buffer can be reused and closed while
+                    # the caller still holds the path states
+                    states = _path_state_views(shm, i * step_bytes, layout)
+                    copies = [
+                        (a.copy(), b.copy(), c.copy(), d.copy(), e.copy(), f.copy())
+                        for a, b, c, d, e, f in states
+                    ]
+                    del states
+
+                    yield t, copies
+
+                free.append(shm)
+    finally:
+        for shm in buffers:
+            shm.close()
+            shm.unlink()
 
 
 class SatgenConstellation:
@@ -40,34 +312,39 @@ class SatgenConstellation:
         self,
         config: celestial.config.Config,
         writer: celestial.serializer.Serializer,
+        parallel_shells: bool = False,
     ):
         """
         Initialize the constellation.
 
         :param config: The configuration of the constellation.
         :param writer: The serializer to use for writing updates.
+        :param parallel_shells: Whether to step the shells concurrently in a
+            thread pool. The numba kernels release the GIL, so shells are
+            calculated in parallel. Updates are still written in shell order.
+            This requires a threadsafe numba threading layer. Call `close`
+            when done to stop the thread pool.
         """
         self.current_time: celestial.types.timestamp_s = config.offset
-        self.shells: typing.List[celestial.shell.Shell] = []
+        self.resolution = config.resolution
+        self.end_time = config.offset + config.duration
         self.ground_stations: typing.List[celestial.types.MachineID_dtype] = []
 
         self.writer = writer
 
-        for i, sc in enumerate(config.shells):
-            s = celestial.shell.Shell(
-                shell_identifier=i + 1,
-                planes=sc.planes,
-                sats=sc.sats,
-                altitude_km=sc.altitude_km,
-                inclination=sc.inclination,
-                arc_of_ascending_nodes=sc.arc_of_ascending_nodes,
-                eccentricity=sc.eccentricity,
-                isl_bandwidth_kbits=sc.isl_bandwidth_kbits,
-                bbox=config.bbox,
-                ground_stations=config.ground_stations,
-            )
+        self.shells = _make_shells(config)
 
-            self.shells.append(s)
+        self.executor: typing.Optional[concurrent.futures.ThreadPoolExecutor] = None
+        if parallel_shells and len(self.shells) > 1:
+            # all shells run at the same time, so they share the cores
+            threads = max(1, numba.config.NUMBA_NUM_THREADS // len(self.shells))  # type: ignore
+
+            for s in self.shells:
+                s.threads = min(s.threads, threads)
+
+            self.executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=len(self.shells)
+            )
 
         self.nodes: typing.Dict[
             celestial.types.MachineID_dtype, celestial.config.MachineConfig
@@ -97,21 +374,6 @@ class SatgenConstellation:
             m: celestial.types.VMState.STOPPED for m in self.nodes.keys()
         }
 
-        self.links_state = {
-            m1: {
-                m2: celestial.types.Link(
-                    latency_us=0,
-                    bandwidth_kbits=0,
-                    blocked=True,
-                    next_hop=m1,
-                    prev_hop=m2,
-                )
-                for m2 in self.nodes.keys()
-                if m1 != m2
-            }
-            for m1 in self.nodes.keys()
-        }
-
         for machine, machine_config in self.nodes.items():
             self.writer.init_machine(machine, machine_config)
 
@@ -124,25 +386,79 @@ class SatgenConstellation:
                 celestial.types.VMState.ACTIVE,
             )
 
-    def step(self, t: celestial.types.timestamp_s) -> None:
+    def step(
+        self,
+        t: celestial.types.timestamp_s,
+        path_states: typing.Optional[typing.List[celestial.shell.PathState]] = None,
+    ) -> None:
         """
         Step the constellation forward in time to a given timestamp.
 
         :param t: The timestamp to step to.
+        :param path_states: The path states of all shells at this timestep if
+            they have already been calculated, e.g., by `calculate_path_states`.
         """
         self.current_time = t
 
+        states: typing.List[typing.Optional[celestial.shell.PathState]] = (
+            [None] * len(self.shells) if path_states is None else list(path_states)
+        )
+
+        if self.executor is not None:
+            # list() waits for all shells and re-raises their exceptions
+            list(self.executor.map(self._step_shell, self.shells, states))
+        else:
+            for s, path_state in zip(self.shells, states):
+                self._step_shell(s, path_state)
+
         for s in self.shells:
-            s.step(
+            self.writer.diff_machines_batch(
+                self.current_time, s.get_sat_node_diffs_array()
+            )
+
+            self.writer.diff_links_batch(self.current_time, s.get_link_diff_array())
+
+    def close(self) -> None:
+        """
+        Stop the thread pool used to step shells concurrently.
+        """
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def _step_shell(
+        self,
+        s: celestial.shell.Shell,
+        path_state: typing.Optional[celestial.shell.PathState],
+    ) -> None:
+        """
+        Step a single shell to the current timestamp and calculate its diffs.
+
+        :param s: The shell to step.
+        :param path_state: The path state of the shell at the current
+            timestamp if it has already been calculated.
+        """
+        if path_state is not None:
+            s.step_from_path_state(
                 self.current_time,
-                calculate_diffs=True,
+                path_state,
                 delay_update_threshold_us=DELAY_UPDATE_THRESHOLD_US,
             )
+            return
 
-        for s in self.shells:
-            for machine, state in s.get_sat_node_diffs().items():
-                self.writer.diff_machine(self.current_time, machine, state)
+        if self.current_time not in s.position_window:
+            # propagate the orbits for the next window of timesteps in
+            # one go, but never for less than the current timestep
+            window_end = min(
+                self.current_time + POSITION_WINDOW_STEPS * self.resolution,
+                max(self.end_time, self.current_time + 1),
+            )
+            s.precompute_positions(
+                range(self.current_time, window_end, self.resolution)
+            )
 
-            for source, links in s.get_link_diff().items():
-                for target, link in links.items():
-                    self.writer.diff_link(self.current_time, source, target, link)
+        s.step(
+            self.current_time,
+            calculate_diffs=True,
+            delay_update_threshold_us=DELAY_UPDATE_THRESHOLD_US,
+        )
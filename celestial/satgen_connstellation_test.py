@@ -0,0 +1,102 @@
+#
+# This file is part of Celestial (https://github.com/OpenFogStack/celestial).
+# Copyright (c) 2024 Tobias Pfandzelter, The OpenFogStack Team.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import os
+import tempfile
+import typing
+
+import toml
+
+import celestial.config
+import celestial.satgen_connstellation
+import celestial.trace_serializer
+import celestial.trace_serializer_test
+
+
+def make_config() -> celestial.config.Config:
+    text_config = toml.load(celestial.trace_serializer_test.CONFIG_FILE)
+
+    text_config["duration"] = 30
+
+    # two small shells so that the path states of both share a buffer
+    shell = text_config["shell"][0]
+    text_config["shell"] = [
+        {**shell, "planes": 6, "sats": 6},
+        {**shell, "planes": 4, "sats": 5, "altitude_km": 600},
+    ]
+
+    return celestial.config.Config(text_config)
+
+
+def generate(
+    config: celestial.config.Config,
+    filename: str,
+    workers: int,
+    max_bytes: typing.Optional[int] = None,
+) -> None:
+    serializer = celestial.trace_serializer.TraceSerializer(config, filename)
+    constellation = celestial.satgen_connstellation.SatgenConstellation(
+        config, serializer
+    )
+
+    try:
+        if workers > 1:
+            assert max_bytes is not None
+
+            for t, path_states in celestial.satgen_connstellation.calculate_path_states(
+                config, workers, max_bytes=max_bytes
+            ):
+                constellation.step(t, path_states)
+        else:
+            for t in range(
+                config.offset, config.offset + config.duration, config.resolution
+            ):
+                constellation.step(t)
+    finally:
+        constellation.close()
+
+    serializer.persist()
+
+
+def test_workers() -> None:
+    config = make_config()
+
+    _, step_bytes = celestial.satgen_connstellation._path_state_layout(config)
+
+    with tempfile.TemporaryDirectory() as d:
+        serial = os.path.join(d, f"serial{celestial.trace_serializer.FILE_EXTENSION}")
+        generate(config, serial, 1)
+
+        with open(serial, "rb") as f:
+            expected = f.read()
+
+        # a single buffer for a single timestep, and two buffers for chunks
+        # of four timesteps, the last of which is shorter
+        for max_bytes in (step_bytes, 8 * step_bytes):
+            parallel = os.path.join(
+                d, f"parallel{celestial.trace_serializer.FILE_EXTENSION}"
+            )
+            generate(config, parallel, 2, max_bytes=max_bytes)
+
+            with open(parallel, "rb") as f:
+                assert f.read() == expected
+
+
+if __name__ == "__main__":
+    test_workers()
+
+    print("Test passed successfully!")
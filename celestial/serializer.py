@@ -18,6 +18,10 @@
 """A protocol for serializers and deserializers"""
 
 import typing
+
+import numpy as np
+
+import celestial.config
 import celestial.types
 
 
@@ -57,6 +61,22 @@ class Serializer(typing.Protocol):
         """
         ...
 
+    def diff_links_batch(
+        self,
+        t: celestial.types.timestamp_s,
+        links: np.ndarray,  # type: ignore
+    ) -> None:
+        """
+        Serialize a batch of link updates, e.g., all updates of a shell in a
+        timestep. The result is the same as calling diff_link for each row
+        in order.
+
+        :param t: The timestamp of the updates.
+        :param links: A structured array of links with dtype
+            celestial.types.LINK_DIFF_DTYPE.
+        """
+        ...
+
     def diff_machine(
         self,
         t: celestial.types.timestamp_s,
@@ -72,6 +92,21 @@ class Serializer(typing.Protocol):
         """
         ...
 
+    def diff_machines_batch(
+        self,
+        t: celestial.types.timestamp_s,
+        machines: np.ndarray,  # type: ignore
+    ) -> None:
+        """
+        Serialize a batch of machine state updates. The result is the same as
+        calling diff_machine for each row in order.
+
+        :param t: The timestamp of the updates.
+        :param machines: A structured array of machine states with dtype
+            celestial.types.MACHINE_DIFF_DTYPE.
+        """
+        ...
+
     def persist(self) -> None:
         """
         Persist the serialized state. Called at the end of the simulation.
@@ -133,3 +168,24 @@ class Deserializer(typing.Protocol):
         :return: A list of machine state updates.
         """
         ...
+
+    def diff_links_array(self, t: celestial.types.timestamp_s) -> np.ndarray:  # type: ignore
+        """
+        Deserialize the link updates into a structured array without creating
+        objects for individual links.
+
+        :param t: The timestamp of the update.
+        :return: An array of link updates with dtype
+            celestial.types.LINK_DIFF_DTYPE.
+        """
+        ...
+
+    def diff_machines_array(self, t: celestial.types.timestamp_s) -> np.ndarray:  # type: ignore
+        """
+        Deserialize the machine state updates into a structured array.
+
+        :param t: The timestamp of the update.
+        :return: An array of machine state updates with dtype
+            celestial.types.MACHINE_DIFF_DTYPE.
+        """
+        ...
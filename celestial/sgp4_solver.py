@@ -19,6 +19,7 @@
 
 import datetime
 import numpy as np
+import numpy.typing as npt
 import math
 import sgp4.api as sgp4
 
@@ -97,6 +98,15 @@ class SGP4Solver:
         :param satellites_array: The satellite array to initialize.
         :return: The initialized satellite array.
         """
+        self._init_sgp4_solvers()
+
+        # calculate initial positions
+        return self.set_time(0, satellites_array)
+
+    def _init_sgp4_solvers(self) -> None:
+        """
+        Initialize one SGP4 satellite record for each satellite.
+        """
         raan_offsets = [
             (self.arc_of_ascending_nodes / self.number_of_planes) * i
             for i in range(0, self.number_of_planes)
@@ -161,18 +171,36 @@ class SGP4Solver:
                     ),  # nodeo: right ascension of ascending node (radians)
                 )
 
-                # calculate initial position
-                e, r, d = self.sgp4_solvers[unique_id].sgp4(
-                    self.start_jd, self.start_fr
-                )
+        # in a circular shell, satellites in the same plane differ only in
+        # their mean anomaly and planes differ only in their right ascension
+        # of ascending node, so it is enough to propagate the first plane and
+        # rotate those positions around the z axis for all other planes
+        # this does not hold for eccentric orbits and for deep-space orbits,
+        # where SGP4 considers lunar and solar perturbations
+        self.symmetric = self.eccentricity == 0.0 and all(
+            s.method == "n" for s in self.sgp4_solvers
+        )
 
-                # update satellties array
+        self.propagated_solvers = self.sgp4_solvers
 
-                satellites_array[unique_id]["x"] = np.int32(r[0]) * 1000
-                satellites_array[unique_id]["y"] = np.int32(r[1]) * 1000
-                satellites_array[unique_id]["z"] = np.int32(r[2]) * 1000
+        if self.symmetric:
+            self.propagated_solvers = self.sgp4_solvers[: self.nodes_per_plane]
 
-        return satellites_array
+            node_offsets = np.array(
+                [
+                    self.sgp4_solvers[plane * self.nodes_per_plane].nodeo
+                    - self.sgp4_solvers[0].nodeo
+                    for plane in range(self.number_of_planes)
+                ]
+            )
+
+            self.plane_cos = np.cos(node_offsets)
+            self.plane_sin = np.sin(node_offsets)
+
+        # with the C++ API, we can propagate all satellites of the shell in
+        # one call instead of looping over them in Python
+        if sgp4.accelerated:
+            self.sgp4_array = sgp4.SatrecArray(self.propagated_solvers)
 
     def set_time(
         self,
@@ -186,13 +214,61 @@ class SGP4Solver:
         :param satellites_array: The satellite array to update.
         :return: The updated satellite array.
         """
-        fr = self.start_fr + (time / SECONDS_PER_DAY)
+        positions = self.get_positions(np.array([time]))[0]
 
-        for sat_id in range(len(satellites_array)):
-            e, r, d = self.sgp4_solvers[sat_id].sgp4(self.start_jd, fr)
-
-            satellites_array[sat_id]["x"] = np.int32(r[0]) * 1000
-            satellites_array[sat_id]["y"] = np.int32(r[1]) * 1000
-            satellites_array[sat_id]["z"] = np.int32(r[2]) * 1000
+        satellites_array["x"] = positions[:, 0]
+        satellites_array["y"] = positions[:, 1]
+        satellites_array["z"] = positions[:, 2]
 
         return satellites_array
+
+    def get_positions(self, times: npt.NDArray[np.int64]) -> npt.NDArray[np.int32]:
+        """
+        Calculate the satellite positions for a number of timesteps at once.
+
+        :param times: The times in seconds since the start of the simulation.
+        :return: An array of shape (len(times), total_sats, 3) with the x, y,
+            and z positions of all satellites in meters.
+        """
+        fr = self.start_fr + (times / SECONDS_PER_DAY)
+        jd = np.full(len(times), self.start_jd)
+
+        if sgp4.accelerated:
+            # r has shape (sats, times, 3) in km
+            e, r, d = self.sgp4_array.sgp4(jd, fr)
+
+        else:
+            r = np.empty((len(self.propagated_solvers), len(times), 3))
+
+            for sat_id in range(len(self.propagated_solvers)):
+                e, r[sat_id], d = self.propagated_solvers[sat_id].sgp4_array(jd, fr)
+
+        if self.symmetric:
+            r = self._rotate_planes(r)
+
+        positions: npt.NDArray[np.int32] = np.ascontiguousarray(
+            (r.astype(np.int32) * 1000).transpose(1, 0, 2)
+        )
+
+        return positions
+
+    def _rotate_planes(self, r: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+        """
+        Calculate the positions of all satellites in a symmetric shell from
+        the positions of the satellites in the first plane.
+
+        :param r: The positions of the first plane with shape (sats, times, 3).
+        :return: The positions of all satellites with shape
+            (total_sats, times, 3).
+        """
+        c = self.plane_cos[:, np.newaxis, np.newaxis]
+        s = self.plane_sin[:, np.newaxis, np.newaxis]
+
+        # shape (planes, sats, times, 3)
+        rotated = np.empty((self.number_of_planes,) + r.shape)
+
+        rotated[..., 0] = r[..., 0] * c - r[..., 1] * s
+        rotated[..., 1] = r[..., 0] * s + r[..., 1] * c
+        rotated[..., 2] = r[..., 2]
+
+        return rotated.reshape(self.total_sats, r.shape[1], 3)
@@ -17,6 +17,7 @@
 
 """Behavior of a shell of a constellation"""
 
+import logging
 import math
 import numpy as np
 import numpy.typing as npt
@@ -24,6 +25,7 @@ import numba
 import typing
 
 import celestial.config
+import celestial.kepler_solver
 import celestial.sgp4_solver
 import celestial.types
 
@@ -33,6 +35,23 @@ SECONDS_PER_DAY = 86_400
 MIN_COMMS_ALTITUDE_M = 80_000  # meters, height of thermosphere
 LINK_PROPAGATION_S_M = 3.336e-9  # s/m, about 1/c
 CROSSLINK_INTERPOLATION = 1
+# maximum number of cells per axis of the grid used to find the satellites in
+# range of a ground station
+GST_GRID_MAX_CELLS = 32
+
+# bounding box flags of all satellites and the active, next hop, previous hop,
+# delay, and bandwidth arrays of all paths
+PathState = typing.Tuple[
+    np.ndarray,  # type: ignore
+    np.ndarray,  # type: ignore
+    np.ndarray,  # type: ignore
+    np.ndarray,  # type: ignore
+    np.ndarray,  # type: ignore
+    np.ndarray,  # type: ignore
+]
+# the dtypes of the arrays of a PathState, the first array has one entry per
+# satellite, the others one entry per path
+PATH_STATE_DTYPES = (np.bool_, np.bool_, np.int16, np.int16, np.uint32, np.uint32)
 
 ### DTYPES ###
 SATELLITE_DTYPE = np.dtype(
@@ -90,25 +109,347 @@ GST_SAT_LINK_DTYPE = np.dtype(
     ]
 )
 
-PATH_DTYPE = np.dtype(
-    [
-        ("active", np.bool_),  # can this link be active?
-        ("next_hop", np.int16),  # the next node in the path
-        ("prev_hop", np.int16),  # the previous node in the path
-        ("bandwidth_kbits", np.uint32),  # distance of the link in meters
-        ("delay_us", np.uint32),  # delay of this link in microseconds
-    ]
-)
-
-PATH_LINK_DTYPE = np.dtype(
+# a path that has changed since the last diff
+PATH_DIFF_DTYPE = np.dtype(
     [
         ("node_1", np.int16),  # an endpoint of the link
         ("node_2", np.int16),  # the other endpoint of the link
-        ("path", PATH_DTYPE),  # the path between the two endpoints
+        ("index", np.int32),  # index of the path in the packed path arrays
     ]
 )
 
 
+@numba.njit  # type: ignore
+def _numba_pair_index(node_1: int, node_2: int, total_nodes: int) -> int:
+    """
+    Get the index of the path between two nodes (with node_1 < node_2) in
+    the packed upper triangle of a (total_nodes x total_nodes) matrix.
+    """
+    return node_1 * (2 * total_nodes - node_1 - 1) // 2 + node_2 - node_1 - 1
+
+
+@numba.njit  # type: ignore
+def _numba_sat_grid(
+    satellites_array: np.ndarray,  # type: ignore
+    total_sats: int,
+    cell_size: int,
+) -> typing.Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:  # type: ignore
+    """
+    Sort the satellites into a uniform grid of cubic cells in ECEF
+    coordinates. Returns the origin and number of cells per axis of the
+    grid, and the satellites per cell in CSR format (offsets and satellite
+    indices). Within a cell, satellites are sorted by their index.
+    """
+    origin = np.empty(3, dtype=np.int64)
+    dims = np.empty(3, dtype=np.int64)
+
+    origin[0] = satellites_array["x"][:total_sats].min()
+    origin[1] = satellites_array["y"][:total_sats].min()
+    origin[2] = satellites_array["z"][:total_sats].min()
+
+    dims[0] = (satellites_array["x"][:total_sats].max() - origin[0]) // cell_size + 1
+    dims[1] = (satellites_array["y"][:total_sats].max() - origin[1]) // cell_size + 1
+    dims[2] = (satellites_array["z"][:total_sats].max() - origin[2]) // cell_size + 1
+
+    cells = np.empty(total_sats, dtype=np.int64)
+    offsets = np.zeros(dims[0] * dims[1] * dims[2] + 1, dtype=np.int64)
+
+    for sat_idx in range(total_sats):
+        cx = (satellites_array[sat_idx]["x"] - origin[0]) // cell_size
+        cy = (satellites_array[sat_idx]["y"] - origin[1]) // cell_size
+        cz = (satellites_array[sat_idx]["z"] - origin[2]) // cell_size
+
+        cells[sat_idx] = (cx * dims[1] + cy) * dims[2] + cz
+        offsets[cells[sat_idx] + 1] += 1
+
+    offsets = np.cumsum(offsets)
+
+    # counting sort keeps satellites within a cell in order of their index
+    fill = offsets[:-1].copy()
+    sats = np.empty(total_sats, dtype=np.int64)
+
+    for sat_idx in range(total_sats):
+        sats[fill[cells[sat_idx]]] = sat_idx
+        fill[cells[sat_idx]] += 1
+
+    return origin, dims, offsets, sats
+
+
+@numba.njit  # type: ignore
+def _numba_sat_grid_candidates(
+    origin: np.ndarray,  # type: ignore
+    dims: np.ndarray,  # type: ignore
+    cell_size: int,
+    offsets: np.ndarray,  # type: ignore
+    sats: np.ndarray,  # type: ignore
+    x: int,
+    y: int,
+    z: int,
+    max_range: int,
+    candidates: np.ndarray,  # type: ignore
+) -> int:
+    """
+    Find all satellites in grid cells that overlap the cube of the given
+    range around a position. This includes all satellites within that range
+    of the position. Candidates are written in order of their index, the
+    number of candidates is returned.
+    """
+    lo = np.empty(3, dtype=np.int64)
+    hi = np.empty(3, dtype=np.int64)
+
+    lo[0] = (x - max_range - origin[0]) // cell_size
+    lo[1] = (y - max_range - origin[1]) // cell_size
+    lo[2] = (z - max_range - origin[2]) // cell_size
+    hi[0] = (x + max_range - origin[0]) // cell_size
+    hi[1] = (y + max_range - origin[1]) // cell_size
+    hi[2] = (z + max_range - origin[2]) // cell_size
+
+    for a in range(3):
+        lo[a] = max(lo[a], 0)
+        hi[a] = min(hi[a], dims[a] - 1)
+
+        if lo[a] > hi[a]:
+            return 0
+
+    n = 0
+
+    for cx in range(lo[0], hi[0] + 1):
+        for cy in range(lo[1], hi[1] + 1):
+            for cz in range(lo[2], hi[2] + 1):
+                c = (cx * dims[1] + cy) * dims[2] + cz
+
+                for i in range(offsets[c], offsets[c + 1]):
+                    candidates[n] = sats[i]
+                    n += 1
+
+    # each satellite is in exactly one cell, so there are no duplicates
+    candidates[:n].sort()
+
+    return n
+
+
+@numba.njit  # type: ignore
+def _numba_isl_adjacency(
+    sat_link_array: np.ndarray,  # type: ignore
+    total_isl_links: int,
+    total_sats: int,
+) -> typing.Tuple[np.ndarray, np.ndarray, np.ndarray]:  # type: ignore
+    """
+    Build a sparse adjacency list in CSR format (offsets, neighbors, and
+    weights) from the active inter-satellite links.
+    """
+    degree = np.zeros(total_sats + 1, dtype=np.int32)
+
+    for link in sat_link_array[:total_isl_links]:
+        if not link["active"]:
+            continue
+
+        degree[link["node_1"] + 1] += 1
+        degree[link["node_2"] + 1] += 1
+
+    offsets = np.cumsum(degree).astype(np.int32)
+
+    neighbors = np.empty(offsets[total_sats], dtype=np.int32)
+    weights = np.empty(offsets[total_sats], dtype=np.float32)
+
+    fill = offsets[:total_sats].copy()
+
+    for link in sat_link_array[:total_isl_links]:
+        if not link["active"]:
+            continue
+
+        n1 = link["node_1"]
+        n2 = link["node_2"]
+
+        neighbors[fill[n1]] = n2
+        weights[fill[n1]] = np.float32(link["distance_m"])
+        fill[n1] += 1
+
+        neighbors[fill[n2]] = n1
+        weights[fill[n2]] = np.float32(link["distance_m"])
+        fill[n2] += 1
+
+    return offsets, neighbors, weights
+
+
+@numba.njit  # type: ignore
+def _numba_heap_push(
+    heap_d: np.ndarray,  # type: ignore
+    heap_v: np.ndarray,  # type: ignore
+    size: int,
+    d: np.float32,
+    v: int,
+) -> int:
+    """
+    Push an item onto a binary min-heap stored in two arrays. Returns the new
+    size of the heap.
+    """
+    i = size
+    heap_d[i] = d
+    heap_v[i] = v
+
+    while i > 0:
+        parent = (i - 1) // 2
+
+        if heap_d[parent] <= heap_d[i]:
+            break
+
+        heap_d[i], heap_d[parent] = heap_d[parent], heap_d[i]
+        heap_v[i], heap_v[parent] = heap_v[parent], heap_v[i]
+        i = parent
+
+    return size + 1
+
+
+@numba.njit  # type: ignore
+def _numba_heap_pop(
+    heap_d: np.ndarray,  # type: ignore
+    heap_v: np.ndarray,  # type: ignore
+    size: int,
+) -> typing.Tuple[np.float32, int, int]:
+    """
+    Pop the smallest item from a binary min-heap stored in two arrays.
+    Returns the distance and node of the item and the new size of the heap.
+    """
+    d = heap_d[0]
+    v = heap_v[0]
+
+    size -= 1
+    heap_d[0] = heap_d[size]
+    heap_v[0] = heap_v[size]
+
+    i = 0
+    while True:
+        left = 2 * i + 1
+        right = left + 1
+        smallest = i
+
+        if left < size and heap_d[left] < heap_d[smallest]:
+            smallest = left
+
+        if right < size and heap_d[right] < heap_d[smallest]:
+            smallest = right
+
+        if smallest == i:
+            break
+
+        heap_d[i], heap_d[smallest] = heap_d[smallest], heap_d[i]
+        heap_v[i], heap_v[smallest] = heap_v[smallest], heap_v[i]
+        i = smallest
+
+    return d, v, size
+
+
+@numba.njit  # type: ignore
+def _numba_dijkstra_search(
+    offsets: np.ndarray,  # type: ignore
+    neighbors: np.ndarray,  # type: ignore
+    weights: np.ndarray,  # type: ignore
+    dist_row: np.ndarray,  # type: ignore
+    first_row: np.ndarray,  # type: ignore
+    prev_row: np.ndarray,  # type: ignore
+    via_row: np.ndarray,  # type: ignore
+    heap_d: np.ndarray,  # type: ignore
+    heap_v: np.ndarray,  # type: ignore
+    size: int,
+) -> None:
+    """
+    Run Dijkstra's algorithm on a CSR adjacency list, starting with the nodes
+    that are already on the heap. Fills the distances, the first hop on the
+    path to each node, and the previous hop, i.e., the next hop from each
+    node back towards the start.
+
+    Of all paths with the same length, Floyd-Warshall keeps the one whose
+    highest intermediate node is lowest, and so do we: via_row holds that
+    node for each node. It is -1 for nodes reached directly from the start,
+    whose first hop is the node itself, and -2 for the start itself. The
+    first hop to a node is the first hop to its via node, which is always
+    closer to the start.
+    """
+    while size > 0:
+        d, u, size = _numba_heap_pop(heap_d, heap_v, size)
+
+        # stale heap entry, we have already found a shorter path
+        if d > dist_row[u]:
+            continue
+
+        # all paths to u are known now, and so is its first hop
+        if via_row[u] == -1:
+            first_row[u] = u
+        elif via_row[u] >= 0:
+            first_row[u] = first_row[via_row[u]]
+
+        # the highest intermediate node of paths via u
+        via = -1 if via_row[u] == -2 else max(via_row[u], u)
+
+        for x in range(offsets[u], offsets[u + 1]):
+            v = neighbors[x]
+            d_v = d + weights[x]
+
+            if d_v > dist_row[v]:
+                continue
+
+            if d_v == dist_row[v]:
+                if via < via_row[v]:
+                    prev_row[v] = u
+                    via_row[v] = via
+
+                continue
+
+            dist_row[v] = d_v
+            prev_row[v] = u
+            via_row[v] = via
+
+            size = _numba_heap_push(heap_d, heap_v, size, d_v, v)
+
+
+@numba.njit  # type: ignore
+def _numba_dijkstra_row(
+    source: int,
+    offsets: np.ndarray,  # type: ignore
+    neighbors: np.ndarray,  # type: ignore
+    weights: np.ndarray,  # type: ignore
+    dist_row: np.ndarray,  # type: ignore
+    first_row: np.ndarray,  # type: ignore
+    prev_row: np.ndarray,  # type: ignore
+    via_row: np.ndarray,  # type: ignore
+    heap_d: np.ndarray,  # type: ignore
+    heap_v: np.ndarray,  # type: ignore
+) -> None:
+    """
+    Run Dijkstra's algorithm from a single source on a CSR adjacency list.
+    Fills the distances from the source, the first hop on the path from the
+    source to each node, and the previous hop, i.e., the next hop from each
+    node towards the source (-1 if unreachable).
+    """
+    for v in range(len(dist_row)):
+        dist_row[v] = np.inf
+        first_row[v] = -1
+        prev_row[v] = -1
+        via_row[v] = -1
+
+    dist_row[source] = 0
+    via_row[source] = -2
+
+    size = _numba_heap_push(heap_d, heap_v, 0, np.float32(0), source)
+
+    _numba_dijkstra_search(
+        offsets,
+        neighbors,
+        weights,
+        dist_row,
+        first_row,
+        prev_row,
+        via_row,
+        heap_d,
+        heap_v,
+        size,
+    )
+
+    first_row[source] = source
+    prev_row[source] = source
+
+
 class Shell:
     """
     A shell is a group of satellites of a constellation that share orbital
@@ -129,6 +470,11 @@ class Shell:
         isl_bandwidth_kbits: int,
         bbox: celestial.config.BoundingBox,
         ground_stations: typing.List[celestial.config.GroundStation],
+        propagator: celestial.config.Propagator = celestial.config.Propagator.SGP4,
+        path_engine: celestial.config.PathEngine = celestial.config.PathEngine.FLOYD_WARSHALL,
+        threads: int = 0,
+        incremental_paths: bool = False,
+        incremental_tolerance_m: float = 0.0,
     ):
         """
         Initialize a shell.
@@ -145,6 +491,18 @@ class Shell:
             in kilobits per second.
         :param bbox: The bounding box of the constellation.
         :param ground_stations: The ground stations of the constellations.
+        :param propagator: The propagator to use for satellite positions.
+        :param path_engine: The algorithm to use for shortest paths between
+            satellites.
+        :param threads: The number of threads used to calculate paths, 0 for
+            all available cores.
+        :param incremental_paths: Whether to keep the paths of the previous
+            timestep instead of recalculating them if the set of active
+            inter-satellite links has not changed.
+        :param incremental_tolerance_m: How much longer (in meters per hop)
+            a kept path may be than the path through a neighboring satellite
+            before all paths are recalculated. With 0, paths are always
+            recalculated.
         """
 
         self.shell_identifier = shell_identifier
@@ -187,17 +545,68 @@ class Shell:
 
         self.total_gst_links = 0
 
-        self.path_matrix = np.zeros(
-            (PATH_MATRIX_SIZE, PATH_MATRIX_SIZE), dtype=PATH_DTYPE
-        )
-
-        self.curr_paths = np.zeros(
-            (PATH_MATRIX_SIZE, PATH_MATRIX_SIZE), dtype=PATH_DTYPE
+        # links in gst_links_array are sorted by ground station, the links of
+        # ground station g are at gst_link_offsets[g] to gst_link_offsets[g+1]
+        self.gst_link_offsets = np.zeros(self.total_gst + 1, dtype=np.int32)
+
+        # paths between all pairs of nodes (satellites and ground stations),
+        # stored as the packed upper triangle of a matrix with one array per
+        # field, see _numba_pair_index
+        # the direction of a path is always from the node with the lower index
+        # to the node with the higher index, except for paths between ground
+        # stations and satellites, which start at the ground station
+        self.total_nodes = PATH_MATRIX_SIZE
+        PATHS_SIZE = PATH_MATRIX_SIZE * (PATH_MATRIX_SIZE - 1) // 2
+
+        self.path_active = np.zeros(PATHS_SIZE, dtype=np.bool_)
+        self.path_next_hop = np.zeros(PATHS_SIZE, dtype=np.int16)
+        self.path_prev_hop = np.zeros(PATHS_SIZE, dtype=np.int16)
+        self.path_delay_us = np.zeros(PATHS_SIZE, dtype=np.uint32)
+        self.path_bandwidth_kbits = np.zeros(PATHS_SIZE, dtype=np.uint32)
+
+        # the paths as of the last diff
+        self.curr_path_active = np.zeros(PATHS_SIZE, dtype=np.bool_)
+        self.curr_path_next_hop = np.zeros(PATHS_SIZE, dtype=np.int16)
+        self.curr_path_delay_us = np.zeros(PATHS_SIZE, dtype=np.uint32)
+        self.curr_path_bandwidth_kbits = np.zeros(PATHS_SIZE, dtype=np.uint32)
+
+        # reused between timesteps, grows when there are more changes
+        self.path_diff = np.empty(PATH_MATRIX_SIZE, dtype=PATH_DIFF_DTYPE)
+
+        self.total_link_diff = 0
+        self.link_diff_array = np.empty(0, dtype=celestial.types.LINK_DIFF_DTYPE)
+
+        # shortest paths between satellites, calculated by the path engine
+        self.path_engine = path_engine
+        self.threads = threads if threads > 0 else numba.config.NUMBA_NUM_THREADS  # type: ignore
+
+        # incremental path updates: the paths are kept between timesteps
+        # with a tolerance of 0, the paths are always recalculated: there are
+        # many paths of the same length in a +GRID, and only the path engine
+        # knows which of them to choose
+        self.incremental_paths = incremental_paths and incremental_tolerance_m > 0
+        self.incremental_tolerance_m = incremental_tolerance_m
+        self.paths_valid = False
+        self.path_isl_active = np.zeros(LINK_ARRAY_SIZE, dtype=np.bool_)
+
+        # these are N^2, so they are only kept for incremental paths, see
+        # _update_incremental_sat_paths
+        self.dist_matrix = np.empty((0, 0), dtype=np.float32)
+        self.next_hops = np.empty((0, 0), dtype=np.int16)
+
+        # for each target satellite, all satellites ordered by their distance
+        # to the target at the last full calculation
+        self.path_order = np.empty(
+            (self.total_sats, self.total_sats) if self.incremental_paths else (0, 0),
+            dtype=np.int16,
         )
 
-        self.link_diff: celestial.types.LinkDiff = {}
+        # satellite positions that have been calculated ahead of time, see
+        # precompute_positions
+        self.position_window: typing.Dict[celestial.types.timestamp_s, int] = {}
+        self.position_block = np.empty((0, self.total_sats, 3), dtype=np.int32)
 
-        self.nodes_diff: celestial.types.MachineDiff = {}
+        self.nodes_diff_array = np.empty(0, dtype=celestial.types.MACHINE_DIFF_DTYPE)
 
         # init nodes
         for plane in range(0, self.number_of_planes):
@@ -211,14 +620,27 @@ class Shell:
                     celestial.types.MachineID(group=self.shell_identifier, id=unique_id)
                 )
 
-        self.solver = celestial.sgp4_solver.SGP4Solver(
-            planes=self.number_of_planes,
-            sats=self.nodes_per_plane,
-            altitude_km=self.altitude_km,
-            inclination=inclination,
-            arc_of_ascending_nodes=arc_of_ascending_nodes,
-            eccentricity=eccentricity,
-        )
+        self.solver: celestial.sgp4_solver.SGP4Solver
+
+        if propagator == celestial.config.Propagator.SGP4:
+            self.solver = celestial.sgp4_solver.SGP4Solver(
+                planes=self.number_of_planes,
+                sats=self.nodes_per_plane,
+                altitude_km=self.altitude_km,
+                inclination=inclination,
+                arc_of_ascending_nodes=arc_of_ascending_nodes,
+                eccentricity=eccentricity,
+            )
+        else:
+            self.solver = celestial.kepler_solver.KeplerSolver(
+                planes=self.number_of_planes,
+                sats=self.nodes_per_plane,
+                altitude_km=self.altitude_km,
+                inclination=inclination,
+                arc_of_ascending_nodes=arc_of_ascending_nodes,
+                eccentricity=eccentricity,
+                j2=propagator == celestial.config.Propagator.KEPLER_J2,
+            )
 
         self.satellites_array = self.solver.init_sat_array(self.satellites_array)
 
@@ -227,15 +649,33 @@ class Shell:
 
         self._init_ground_stations(ground_stations)
 
+        # machine ID group and ID of each node to look up many nodes at once
+        self.machine_id_groups = np.array(
+            [celestial.types.MachineID_group(m) for m in self.machine_ids],
+            dtype=np.uint8,
+        )
+        self.machine_id_ids = np.array(
+            [celestial.types.MachineID_id(m) for m in self.machine_ids],
+            dtype=np.uint16,
+        )
+
         self._init_plus_grid_links()
 
         self.max_isl_range = self._calculate_max_ISL_distance()
 
+        # cells of the grid to find satellites in range of ground stations
+        # should be about as large as that range, but we don't want too many
+        self.gst_grid_cell_size = max(
+            int(self.gst_array["max_stg_range"].min(initial=2**31 - 1)),
+            int(2 * self.semi_major_axis) // GST_GRID_MAX_CELLS + 1,
+        )
+
     def step(
         self,
         time: celestial.types.timestamp_s,
         calculate_diffs: bool = False,
         delay_update_threshold_us: int = 0,
+        calculate_paths: bool = False,
     ) -> None:
         """
         Advance the simulation to a given timestep, trigger the calculation of
@@ -247,48 +687,36 @@ class Shell:
             previous timestep (disable this, e.g., if you just need to animate
             the constellation).
         :param delay_update_threshold_us: The threshold for the delay in microseconds. Link differences will only be calculated if the delay is above this threshold.
+        :param calculate_paths: Whether to calculate the paths even if the
+            differences are not calculated, e.g., to get the path state.
         """
         self.current_time = int(time)
 
         self.old_machines = self.satellites_array.copy()
 
-        self.satellites_array = self.solver.set_time(time, self.satellites_array)
+        if self.current_time in self.position_window:
+            positions = self.position_block[self.position_window[self.current_time]]
+            self.satellites_array["x"] = positions[:, 0]
+            self.satellites_array["y"] = positions[:, 1]
+            self.satellites_array["z"] = positions[:, 2]
+        else:
+            self.satellites_array = self.solver.set_time(time, self.satellites_array)
 
         degrees_to_rotate = 360.0 * (self.current_time / SECONDS_PER_DAY)
 
         rotation_matrix = self._get_rotation_matrix(degrees_to_rotate)
         neg_rotation_matrix = self._get_rotation_matrix(-degrees_to_rotate)
 
-        for sat_id in range(len(self.satellites_array)):
-            sat_is_in_bbox = self._is_in_bbox(
+        self.satellites_array["in_bbox"] = self._is_in_bbox(
+            np.column_stack(
                 (
-                    self.satellites_array[sat_id]["x"],
-                    self.satellites_array[sat_id]["y"],
-                    self.satellites_array[sat_id]["z"],
-                ),  # type: ignore
-                neg_rotation_matrix,
-            )
-
-            self.satellites_array[sat_id]["in_bbox"] = sat_is_in_bbox
-
-        # xyz_pos = np.vectorize(rot)(self.satellites_array)
-        # unfortunately it won't let me do the np.dot within the numba function
-        # xyz_pos = np.array(
-        #     [
-        #         np.dot(neg_rotation_matrix, np.array([x["x"], x["y"], x["z"]]))
-        #         for x in self.satellites_array
-        #     ]
-        # )
-
-        # self._numba_is_in_bbox(
-        #     self.bbox.lat1,
-        #     self.bbox.lat2,
-        #     self.bbox.lon1,
-        #     self.bbox.lon2,
-        #     self.semi_major_axis,
-        #     self.satellites_array,
-        #     xyz_pos=xyz_pos,
-        # )
+                    self.satellites_array["x"],
+                    self.satellites_array["y"],
+                    self.satellites_array["z"],
+                )
+            ),
+            neg_rotation_matrix,
+        )
 
         for gst in self.gst_array:
             new_pos = np.dot(
@@ -300,54 +728,169 @@ class Shell:
 
         self._update_plus_grid_links()
 
+        if not calculate_diffs and not calculate_paths:
+            return
+
+        self._update_paths()
+
         if not calculate_diffs:
             return
 
-        self.nodes_diff = {}
-        # calculate the node diffs
-        for sat in self.satellites_array:
-            if sat["in_bbox"] != self.old_machines[sat["ID"]]["in_bbox"]:
-                m_id = celestial.types.MachineID(
-                    group=self.shell_identifier, id=sat["ID"]
-                )
+        self._calculate_diffs(delay_update_threshold_us)
 
-                self.nodes_diff[m_id] = (
-                    celestial.types.VMState.ACTIVE
-                    if sat["in_bbox"]
-                    else celestial.types.VMState.STOPPED
-                )
+    def get_path_state(self, out: typing.Optional[PathState] = None) -> PathState:
+        """
+        Get the part of the state of the current timestep that is needed to
+        calculate the differences to the previous timestep: which satellites
+        are in the bounding box and all paths. Only valid after a `step` with
+        `calculate_diffs` or `calculate_paths`.
+
+        :param out: Arrays to copy the path state into, e.g., in shared
+            memory, instead of allocating new ones.
+        :return: A copy of the bounding box flags and path arrays of the shell.
+        """
+        if out is not None:
+            for dst, src in zip(
+                out,
+                (
+                    self.satellites_array["in_bbox"],
+                    self.path_active,
+                    self.path_next_hop,
+                    self.path_prev_hop,
+                    self.path_delay_us,
+                    self.path_bandwidth_kbits,
+                ),
+            ):
+                dst[:] = src
+
+            return out
+
+        return (
+            self.satellites_array["in_bbox"].copy(),
+            self.path_active.copy(),
+            self.path_next_hop.copy(),
+            self.path_prev_hop.copy(),
+            self.path_delay_us.copy(),
+            self.path_bandwidth_kbits.copy(),
+        )
 
-        self._update_paths()
+    def step_from_path_state(
+        self,
+        time: celestial.types.timestamp_s,
+        path_state: PathState,
+        delay_update_threshold_us: int = 0,
+    ) -> None:
+        """
+        Advance the simulation to a given timestep using a path state that
+        was calculated elsewhere, e.g., in a worker process, and calculate
+        the differences to the previous timestep. Satellite positions and
+        links are not updated.
+
+        :param time: The timestep to advance the simulation to.
+        :param path_state: The path state of that timestep as returned by
+            `get_path_state`.
+        :param delay_update_threshold_us: The threshold for the delay in
+            microseconds. Link differences will only be calculated if the
+            delay is above this threshold.
+        """
+        self.current_time = int(time)
+
+        self.old_machines = self.satellites_array.copy()
+
+        (
+            self.satellites_array["in_bbox"],
+            self.path_active[:],
+            self.path_next_hop[:],
+            self.path_prev_hop[:],
+            self.path_delay_us[:],
+            self.path_bandwidth_kbits[:],
+        ) = path_state
 
-        self.link_diff = {}
+        self._calculate_diffs(delay_update_threshold_us)
 
-        path_diff = np.zeros(
-            (self.total_sats + self.total_gst) ** 2, dtype=PATH_LINK_DTYPE
+    def _calculate_diffs(self, delay_update_threshold_us: int) -> None:
+        """
+        Calculate the node and link differences between the current and the
+        previous timestep.
+
+        :param delay_update_threshold_us: The threshold for the delay in
+            microseconds.
+        """
+        # calculate the node diffs
+        changed_sats = np.flatnonzero(
+            self.satellites_array["in_bbox"] != self.old_machines["in_bbox"]
         )
 
-        total_link_diff = self._numba_get_link_diff(
-            delay_update_threshold_us=delay_update_threshold_us,
-            total_sats=self.total_sats,
-            total_gst=self.total_gst,
-            curr_paths=self.curr_paths,
-            path_matrix=self.path_matrix,
-            path_diff=path_diff,
-        )[0]
+        self.nodes_diff_array = np.empty(
+            len(changed_sats), dtype=celestial.types.MACHINE_DIFF_DTYPE
+        )
+        self.nodes_diff_array["group"] = self.shell_identifier
+        self.nodes_diff_array["id"] = self.satellites_array["ID"][changed_sats]
+        self.nodes_diff_array["state"] = np.where(
+            self.satellites_array["in_bbox"][changed_sats],
+            celestial.types.VMState.ACTIVE.value,
+            celestial.types.VMState.STOPPED.value,
+        )
 
-        for link in path_diff[:total_link_diff]:
-            n1 = self._get_machine_id(link["node_1"])
+        total_link_diff = self._get_link_diff(delay_update_threshold_us)
+        self.total_link_diff = total_link_diff
 
-            n2 = self._get_machine_id(link["node_2"])
+        link_diff = self.path_diff[:total_link_diff]
+        changed = link_diff["index"]
 
-            self.link_diff.setdefault(n1, {})[n2] = celestial.types.Link(
-                latency_us=link["path"]["delay_us"],
-                bandwidth_kbits=link["path"]["bandwidth_kbits"],
-                blocked=not link["path"]["active"],
-                next_hop=self._get_machine_id(link["path"]["next_hop"]),
-                prev_hop=self._get_machine_id(link["path"]["prev_hop"]),
-            )
+        next_hop = self.path_next_hop[changed]
+        prev_hop = self.path_prev_hop[changed]
 
-            self.curr_paths[link["node_1"]][link["node_2"]] = link["path"]
+        self.link_diff_array = np.empty(
+            total_link_diff, dtype=celestial.types.LINK_DIFF_DTYPE
+        )
+        self.link_diff_array["source_group"] = self.machine_id_groups[
+            link_diff["node_1"]
+        ]
+        self.link_diff_array["source_id"] = self.machine_id_ids[link_diff["node_1"]]
+        self.link_diff_array["target_group"] = self.machine_id_groups[
+            link_diff["node_2"]
+        ]
+        self.link_diff_array["target_id"] = self.machine_id_ids[link_diff["node_2"]]
+        self.link_diff_array["latency_us"] = self.path_delay_us[changed]
+        self.link_diff_array["bandwidth_kbits"] = self.path_bandwidth_kbits[changed]
+        self.link_diff_array["blocked"] = ~self.path_active[changed]
+        # a next hop of -1 (no path) is the last node, as it always has been
+        self.link_diff_array["next_hop_group"] = self.machine_id_groups[next_hop]
+        self.link_diff_array["next_hop_id"] = self.machine_id_ids[next_hop]
+        self.link_diff_array["prev_hop_group"] = self.machine_id_groups[prev_hop]
+        self.link_diff_array["prev_hop_id"] = self.machine_id_ids[prev_hop]
+
+        self.curr_path_active[changed] = self.path_active[changed]
+        self.curr_path_next_hop[changed] = self.path_next_hop[changed]
+        self.curr_path_delay_us[changed] = self.path_delay_us[changed]
+        self.curr_path_bandwidth_kbits[changed] = self.path_bandwidth_kbits[changed]
+
+    def get_positions(
+        self, times: typing.Sequence[celestial.types.timestamp_s]
+    ) -> npt.NDArray[np.int32]:
+        """
+        Calculate the satellite positions for a number of timesteps at once.
+
+        :param times: The timesteps to calculate positions for.
+        :return: An array of shape (len(times), total_sats, 3) with the x, y,
+            and z positions of all satellites in meters.
+        """
+        return self.solver.get_positions(np.asarray(times, dtype=np.int64))
+
+    def precompute_positions(
+        self, times: typing.Sequence[celestial.types.timestamp_s]
+    ) -> None:
+        """
+        Calculate the satellite positions for a window of timesteps ahead of
+        time. Subsequent calls to `step` with one of these timesteps use the
+        precomputed positions instead of propagating the orbits again. Any
+        previously precomputed window is discarded.
+
+        :param times: The timesteps to calculate positions for.
+        """
+        self.position_block = self.get_positions(times)
+        self.position_window = {int(t): i for i, t in enumerate(times)}
 
     def _get_machine_id(self, node: int) -> celestial.types.MachineID_dtype:
         """
@@ -373,16 +916,59 @@ class Shell:
 
         :return: A dictionary of machine IDs to their new state.
         """
-        return self.nodes_diff
+        return {
+            celestial.types.MachineID(
+                group=self.shell_identifier, id=n["id"]
+            ): celestial.types.VMState(n["state"])
+            for n in self.nodes_diff_array
+        }
+
+    def get_sat_node_diffs_array(self) -> np.ndarray:  # type: ignore
+        """
+        Get all differences in satellite state since the last timestep as a
+        structured array with one row per satellite.
+
+        :return: An array of machine differences with dtype
+            celestial.types.MACHINE_DIFF_DTYPE.
+        """
+        return self.nodes_diff_array
 
     def get_link_diff(self) -> celestial.types.LinkDiff:
         """
-        Get all differences in links since the last timestep.
+        Get all differences in links since the last timestep. This builds one
+        Python object per link, use get_link_diff_array for large diffs.
 
         :return: A dictionary of machine IDs to a dictionary of machine IDs to
             the link between them.
         """
-        return self.link_diff
+        link_diff: celestial.types.LinkDiff = {}
+
+        for link in self.path_diff[: self.total_link_diff]:
+            n1 = self._get_machine_id(link["node_1"])
+
+            n2 = self._get_machine_id(link["node_2"])
+
+            i = link["index"]
+
+            link_diff.setdefault(n1, {})[n2] = celestial.types.Link(
+                latency_us=self.path_delay_us[i],
+                bandwidth_kbits=self.path_bandwidth_kbits[i],
+                blocked=not self.path_active[i],
+                next_hop=self._get_machine_id(self.path_next_hop[i]),
+                prev_hop=self._get_machine_id(self.path_prev_hop[i]),
+            )
+
+        return link_diff
+
+    def get_link_diff_array(self) -> np.ndarray:  # type: ignore
+        """
+        Get all differences in links since the last timestep as a structured
+        array with one row per link.
+
+        :return: An array of link differences with dtype
+            celestial.types.LINK_DIFF_DTYPE.
+        """
+        return self.link_diff_array
 
     def get_sat_positions(self) -> np.ndarray:  # type: ignore
         """
@@ -449,79 +1035,46 @@ class Shell:
 
     def _is_in_bbox(
         self,
-        pos: typing.Tuple[np.int32, np.int32, np.int32],
+        positions: npt.NDArray[np.int32],
         rotation_matrix: npt.NDArray[np.float64],
-    ) -> np.bool_:
-        """Find out whether a given position is in the bounding box of the constellation."""
+    ) -> npt.NDArray[np.bool_]:
+        """
+        Find out for a number of positions whether they are in the bounding
+        box of the constellation.
+
+        :param positions: The positions as an array of shape (N, 3).
+        :param rotation_matrix: The rotation matrix to apply to the positions.
+        :return: A boolean array of shape (N,).
+        """
 
         # take cartesian coordinates and convert to lat long
-        xyz_pos = np.dot(rotation_matrix, np.array(pos))
+        xyz_pos = positions @ rotation_matrix.T
 
-        x = xyz_pos[0]
-        y = xyz_pos[1]
-        z = xyz_pos[2]
+        x = xyz_pos[:, 0]
+        y = xyz_pos[:, 1]
+        z = xyz_pos[:, 2]
 
         # convert that position into lat lon
 
         div = z / self.semi_major_axis
-        if np.abs(div) > 1:
-            lat = np.degrees(np.arccos(1 if div > 0 else -1))
-        else:
-            lat = np.degrees(np.arcsin(z / self.semi_major_axis))
+        lat = np.where(
+            np.abs(div) > 1,
+            np.degrees(np.arccos(np.sign(div))),
+            np.degrees(np.arcsin(np.clip(div, -1, 1))),
+        )
         lon = np.degrees(np.arctan2(y, x))
 
         # check if lat long is in bounding box
         if self.bbox.lon2 < self.bbox.lon1:
-            if lon < self.bbox.lon1 and lon > self.bbox.lon2:
-                return np.bool_(False)
+            in_lon = ~((lon < self.bbox.lon1) & (lon > self.bbox.lon2))
         else:
-            if lon < self.bbox.lon1 or lon > self.bbox.lon2:
-                return np.bool_(False)
-
-        return np.bool_(lat >= self.bbox.lat1 and lat <= self.bbox.lat2)
-
-    # @staticmethod
-    # # @numba.njit  # type: ignore
-    # def _numba_is_in_bbox(
-    #     bbox_lat1: float,
-    #     bbox_lat2: float,
-    #     bbox_lon1: float,
-    #     bbox_lon2: float,
-    #     semi_major_axis: float,
-    #     satellites_array: np.ndarray,  # type: ignore
-    #     xyz_pos: typing.List[typing.Tuple[np.int32, np.int32, np.int32]],
-    # ) -> None:
-    #     """Find out for each satellite whether its position is in the bounding box of the constellation."""
-
-    #     for sat_id in range(len(satellites_array)):
-    #         # take cartesian coordinates and convert to lat long
-
-    #         x = xyz_pos[sat_id][0]
-    #         y = xyz_pos[sat_id][1]
-    #         z = xyz_pos[sat_id][2]
-
-    #         # convert that position into lat lon
-
-    #         div = z / semi_major_axis
-    #         if np.abs(div) > 1:
-    #             lat = np.degrees(np.arccos(1 if div > 0 else -1))
-    #         else:
-    #             lat = np.degrees(np.arcsin(z / semi_major_axis))
-    #         lon = np.degrees(np.arctan2(y, x))
-
-    #         # check if lat long is in bounding box
-    #         if bbox_lon2 < bbox_lon1:
-    #             if lon < bbox_lon1 and lon > bbox_lon2:
-    #                 satellites_array[sat_id]["in_bbox"] = np.bool_(False)
-    #                 continue
-    #         else:
-    #             if lon < bbox_lon1 or lon > bbox_lon2:
-    #                 satellites_array[sat_id]["in_bbox"] = np.bool_(False)
-    #                 continue
-
-    #         satellites_array[sat_id]["in_bbox"] = np.bool_(
-    #             lat >= bbox_lat1 and lat <= bbox_lat2
-    #         )
+            in_lon = (lon >= self.bbox.lon1) & (lon <= self.bbox.lon2)
+
+        in_bbox: npt.NDArray[np.bool_] = (
+            in_lon & (lat >= self.bbox.lat1) & (lat <= self.bbox.lat2)
+        )
+
+        return in_bbox
 
     def _init_ground_stations(
         self, groundstations: typing.List[celestial.config.GroundStation]
@@ -618,7 +1171,7 @@ class Shell:
             self.total_isl_links = temp[0]
 
     @staticmethod
-    @numba.njit  # type: ignore
+    @numba.njit(nogil=True)  # type: ignore
     def _numba_init_plus_grid_links(
         link_array: np.ndarray,  # type: ignore
         number_of_planes: int,
@@ -676,13 +1229,15 @@ class Shell:
             total_isl_links=self.total_isl_links,
             gst_array=self.gst_array,
             gst_links_array=self.gst_links_array,
+            gst_link_offsets=self.gst_link_offsets,
+            gst_grid_cell_size=self.gst_grid_cell_size,
             max_isl_range=self.max_isl_range,
         )
 
         self.total_gst_links = temp[0]
 
     @staticmethod
-    @numba.njit  # type: ignore
+    @numba.njit(nogil=True)  # type: ignore
     def _numba_update_plus_grid_links(
         total_sats: int,
         satellites_array: np.ndarray,  # type: ignore
@@ -690,11 +1245,17 @@ class Shell:
         total_isl_links: int,
         gst_array: np.ndarray,  # type: ignore
         gst_links_array: np.ndarray,  # type: ignore
+        gst_link_offsets: np.ndarray,  # type: ignore
+        gst_grid_cell_size: int,
         max_isl_range: int = (2**31) - 1,
     ) -> typing.Tuple[int]:
         """
         Actual implementation of _update_plus_grid_links optimized with
-        numba.
+        numba. To find the satellites in range of each ground station, we
+        sort the satellites into a grid once and only check the satellites
+        in nearby cells. Links are written one ground station after the
+        other, and gst_link_offsets is set to where the links of each ground
+        station start.
         """
 
         for isl_idx in range(total_isl_links):
@@ -717,11 +1278,41 @@ class Shell:
             link_array[isl_idx]["distance_m"] = np.uint32(d)
 
         gst_link_id = 0
+
+        if len(gst_array) == 0:
+            gst_link_offsets[0] = gst_link_id
+            return (gst_link_id,)
+
+        origin, dims, cell_offsets, cell_sats = _numba_sat_grid(
+            satellites_array, total_sats, gst_grid_cell_size
+        )
+        candidates = np.empty(total_sats, dtype=np.int64)
+
         MAX_INT32 = np.uint32(np.iinfo(np.uint32).max)
-        for gst in gst_array:
+        for g in range(len(gst_array)):
+            gst = gst_array[g]
+            gst_link_offsets[g] = gst_link_id
+
             shortest_d = MAX_INT32
 
-            for sat_idx in range(total_sats):
+            # distances are rounded down, so also consider satellites that are
+            # up to one meter further away
+            total_candidates = _numba_sat_grid_candidates(
+                origin,
+                dims,
+                gst_grid_cell_size,
+                cell_offsets,
+                cell_sats,
+                gst["x"],
+                gst["y"],
+                gst["z"],
+                gst["max_stg_range"] + 1,
+                candidates,
+            )
+
+            for c in range(total_candidates):
+                sat_idx = candidates[c]
+
                 # calculate distance
                 d = np.uint32(
                     math.sqrt(
@@ -760,6 +1351,7 @@ class Shell:
                 gst_link_id = gst_link_id + 1
 
         total_gst_links = gst_link_id
+        gst_link_offsets[len(gst_array)] = total_gst_links
 
         return (total_gst_links,)
 
@@ -768,38 +1360,148 @@ class Shell:
         Update the network topology of the constellation and re-calculate
         all paths between nodes. Just calls the numba-optimized code.
         """
-        self._numba_update_paths(
-            sat_link_array=self.link_array,
-            total_isl_links=self.total_isl_links,
+        # the number of threads is set per calling thread, so we set it here
+        # to allow different settings for different shells
+        numba.set_num_threads(self.threads)
+
+        if self.incremental_paths:
+            self._update_incremental_sat_paths()
+            dist_matrix, next_hops = self.dist_matrix, self.next_hops
+        else:
+            dist_matrix, next_hops = self._calculate_sat_paths()
+
+        self._numba_update_sat_paths(
+            dist_matrix=dist_matrix,
+            next_hops=next_hops,
             total_sats=self.total_sats,
-            path_matrix=self.path_matrix,
-            gst_array=self.gst_array,
-            total_gst=self.total_gst,
-            gst_links_array=self.gst_links_array,
-            total_gst_links=self.total_gst_links,
+            total_nodes=self.total_nodes,
+            path_active=self.path_active,
+            path_next_hop=self.path_next_hop,
+            path_prev_hop=self.path_prev_hop,
+            path_delay_us=self.path_delay_us,
+            path_bandwidth_kbits=self.path_bandwidth_kbits,
             isl_bandwidth_kbits=self.isl_bandwidth_kbits,
         )
 
+        # with Dijkstra, ground stations are virtual nodes in the search
+        # instead of combining all their uplinks with all satellite paths
+        if self.path_engine == celestial.config.PathEngine.DIJKSTRA:
+            self._numba_update_gst_paths_dijkstra(
+                sat_link_array=self.link_array,
+                total_isl_links=self.total_isl_links,
+                total_sats=self.total_sats,
+                total_nodes=self.total_nodes,
+                path_active=self.path_active,
+                path_next_hop=self.path_next_hop,
+                path_prev_hop=self.path_prev_hop,
+                path_delay_us=self.path_delay_us,
+                path_bandwidth_kbits=self.path_bandwidth_kbits,
+                gst_array=self.gst_array,
+                total_gst=self.total_gst,
+                gst_links_array=self.gst_links_array,
+                gst_link_offsets=self.gst_link_offsets,
+                isl_bandwidth_kbits=self.isl_bandwidth_kbits,
+            )
+        else:
+            self._numba_update_gst_paths(
+                dist_matrix=dist_matrix,
+                next_hops=next_hops,
+                total_sats=self.total_sats,
+                total_nodes=self.total_nodes,
+                path_active=self.path_active,
+                path_next_hop=self.path_next_hop,
+                path_prev_hop=self.path_prev_hop,
+                path_delay_us=self.path_delay_us,
+                path_bandwidth_kbits=self.path_bandwidth_kbits,
+                gst_array=self.gst_array,
+                total_gst=self.total_gst,
+                gst_links_array=self.gst_links_array,
+                gst_link_offsets=self.gst_link_offsets,
+                isl_bandwidth_kbits=self.isl_bandwidth_kbits,
+            )
+
+    def _calculate_sat_paths(self) -> typing.Tuple[np.ndarray, np.ndarray]:  # type: ignore
+        """
+        Calculate shortest paths between all pairs of satellites with the
+        path engine.
+
+        :return: The distance matrix and the next hops.
+        """
+        dist_matrix = np.empty((self.total_sats, self.total_sats), dtype=np.float32)
+        next_hops = np.empty((self.total_sats, self.total_sats), dtype=np.int16)
+
+        if self.path_engine == celestial.config.PathEngine.DIJKSTRA:
+            self._numba_dijkstra(
+                sat_link_array=self.link_array,
+                total_isl_links=self.total_isl_links,
+                total_sats=self.total_sats,
+                dist_matrix=dist_matrix,
+                next_hops=next_hops,
+            )
+        else:
+            self._numba_floyd_warshall(
+                sat_link_array=self.link_array,
+                total_isl_links=self.total_isl_links,
+                total_sats=self.total_sats,
+                dist_matrix=dist_matrix,
+                next_hops=next_hops,
+            )
+
+        return dist_matrix, next_hops
+
+    def _update_incremental_sat_paths(self) -> None:
+        """
+        Keep the paths between satellites of the previous timestep if they
+        are still within the tolerance, otherwise recalculate them.
+        """
+        # incremental updates are only possible if exactly the same links are
+        # active as at the last full calculation
+        if self.paths_valid and np.array_equal(
+            self.link_array["active"][: self.total_isl_links],
+            self.path_isl_active[: self.total_isl_links],
+        ):
+            (valid,) = self._numba_incremental_paths(
+                sat_link_array=self.link_array,
+                total_isl_links=self.total_isl_links,
+                total_sats=self.total_sats,
+                dist_matrix=self.dist_matrix,
+                next_hops=self.next_hops,
+                path_order=self.path_order,
+                tolerance_m=self.incremental_tolerance_m,
+            )
+
+            if valid:
+                return
+
+            logging.debug(
+                f"shell {self.shell_identifier}: paths exceed the tolerance, recalculating"
+            )
+
+        self.dist_matrix, self.next_hops = self._calculate_sat_paths()
+
+        self._numba_path_order(
+            total_sats=self.total_sats,
+            dist_matrix=self.dist_matrix,
+            path_order=self.path_order,
+        )
+        self.path_isl_active[:] = self.link_array["active"]
+        self.paths_valid = True
+
     @staticmethod
-    @numba.njit  # type: ignore
-    def _numba_update_paths(
+    @numba.njit(parallel=True, nogil=True)  # type: ignore
+    def _numba_floyd_warshall(
         sat_link_array: np.ndarray,  # type: ignore
         total_isl_links: int,
         total_sats: int,
-        path_matrix: np.ndarray,  # type: ignore
-        gst_array: np.ndarray,  # type: ignore
-        total_gst: int,
-        gst_links_array: np.ndarray,  # type: ignore
-        total_gst_links: int,
-        isl_bandwidth_kbits: int,
+        dist_matrix: np.ndarray,  # type: ignore
+        next_hops: np.ndarray,  # type: ignore
     ) -> None:
         """
-        Actual implementation of _update_paths optimized with numba.
+        Calculate shortest paths between all pairs of satellites with the
+        Floyd-Warshall algorithm. Optimized with numba, rows are updated in
+        parallel.
         """
-        dist_matrix = np.empty((total_sats, total_sats), dtype=np.float32)
-        next_hops = np.empty((total_sats, total_sats), dtype=np.int16)
-
-        for i in range(total_sats):
+        for i in numba.prange(total_sats):
             for j in range(total_sats):
                 dist_matrix[i, j] = np.inf
                 next_hops[i, j] = -1
@@ -820,8 +1522,12 @@ class Shell:
         # Floyd-Warshall algorithm
         # Note that with numba, this is slightly faster than scipy for large
         # matrices. But it's only half a second or so for 1584 nodes.
+        # Within one iteration of k, row k and column k do not change (a path
+        # via k cannot make a path to k shorter), so all rows can be updated in
+        # parallel. Each pair (i, j) with i < j is only written by the thread
+        # for row i, which makes the result independent of the thread count.
         for k in range(total_sats):
-            for i in range(total_sats):
+            for i in numba.prange(total_sats):
                 # we can optimize this for symmetrics matrices
                 # see fw_test.py for some tests on this
                 for j in range(i + 1, total_sats):
@@ -834,49 +1540,206 @@ class Shell:
                         next_hops[i, j] = next_hops[i, k]
                         next_hops[j, i] = next_hops[j, k]
 
-        for i in range(total_sats):
-            for j in range(i + 1, total_sats):
-                # if i == j:
-                # continue
+    @staticmethod
+    @numba.njit(parallel=True, nogil=True)  # type: ignore
+    def _numba_dijkstra(
+        sat_link_array: np.ndarray,  # type: ignore
+        total_isl_links: int,
+        total_sats: int,
+        dist_matrix: np.ndarray,  # type: ignore
+        next_hops: np.ndarray,  # type: ignore
+    ) -> None:
+        """
+        Calculate shortest paths between all pairs of satellites with one
+        run of Dijkstra's algorithm per satellite on a sparse (CSR) adjacency
+        list of the active inter-satellite links. This is O(N*E*log(N))
+        instead of O(N^3) for Floyd-Warshall, which pays off for large shells
+        as a +GRID topology has at most four links per satellite. Paths of
+        equal length are chosen like Floyd-Warshall does, so results are the
+        same except for float32 rounding, which only affects paths longer
+        than 2^24 meters (see shell_test.py). Optimized with numba, sources
+        are distributed across threads.
+        """
+        offsets, neighbors, weights = _numba_isl_adjacency(
+            sat_link_array, total_isl_links, total_sats
+        )
 
-                active = dist_matrix[i, j] != np.inf
-                path_matrix[i, j]["active"] = active
-                # path_matrix[j, i]["active"] = active
+        # each source only writes its own row, so we can split the sources into
+        # one chunk per thread, and each chunk gets its own heap
+        threads = numba.get_num_threads()
+        chunk_size = (total_sats + threads - 1) // threads
+
+        for c in numba.prange(threads):
+            prev_row = np.empty(total_sats, dtype=np.int16)
+            via_row = np.empty(total_sats, dtype=np.int16)
+            heap_d = np.empty(len(neighbors) + 1, dtype=np.float32)
+            heap_v = np.empty(len(neighbors) + 1, dtype=np.int32)
+
+            for s in range(c * chunk_size, min((c + 1) * chunk_size, total_sats)):
+                _numba_dijkstra_row(
+                    s,
+                    offsets,
+                    neighbors,
+                    weights,
+                    dist_matrix[s],
+                    next_hops[s],
+                    prev_row,
+                    via_row,
+                    heap_d,
+                    heap_v,
+                )
 
-                path_matrix[i, j]["next_hop"] = np.int16(
-                    next_hops[i, j]
-                )  # will be -1 if inactive
-                path_matrix[i, j]["prev_hop"] = np.int16(
-                    next_hops[j, i]
-                )  # will be -1 if inactive
+    @staticmethod
+    @numba.njit(parallel=True, nogil=True)  # type: ignore
+    def _numba_path_order(
+        total_sats: int,
+        dist_matrix: np.ndarray,  # type: ignore
+        path_order: np.ndarray,  # type: ignore
+    ) -> None:
+        """
+        For each target satellite, order all satellites by their distance to
+        the target. As all links have a positive length, the next hop towards
+        the target always comes before a satellite in this order. Optimized
+        with numba.
+        """
+        for v in numba.prange(total_sats):
+            path_order[v] = np.argsort(dist_matrix[:, v])
 
-                d = np.uint32(dist_matrix[i, j] * (LINK_PROPAGATION_S_M * 1e6))
-                path_matrix[i, j]["delay_us"] = d  # will be inf if inactive
-                # path_matrix[j, i]["delay_us"] = d  # will be inf if inactive
+    @staticmethod
+    @numba.njit(parallel=True, nogil=True)  # type: ignore
+    def _numba_incremental_paths(
+        sat_link_array: np.ndarray,  # type: ignore
+        total_isl_links: int,
+        total_sats: int,
+        dist_matrix: np.ndarray,  # type: ignore
+        next_hops: np.ndarray,  # type: ignore
+        path_order: np.ndarray,  # type: ignore
+        tolerance_m: float,
+    ) -> typing.Tuple[bool]:
+        """
+        Update the lengths of the paths of the previous timestep with the
+        current link lengths. For each target, the next hops towards it form a
+        tree, which we walk from the target outwards to update the distances.
+        The next hops are not changed.
+
+        The paths are still good enough if no satellite has a neighbor with a
+        path to a target that is shorter by more than the tolerance. Returns
+        whether that holds for all targets, otherwise all paths must be
+        recalculated. Optimized with numba, targets are distributed across
+        threads.
+        """
+        offsets, neighbors, weights = _numba_isl_adjacency(
+            sat_link_array, total_isl_links, total_sats
+        )
 
-                b = np.uint32(isl_bandwidth_kbits)
-                path_matrix[i, j]["bandwidth_kbits"] = b
-                # path_matrix[j, i]["bandwidth_kbits"] = b
+        valid = np.ones(total_sats, dtype=np.bool_)
 
-        g_valid_link_lens = np.zeros(total_gst, dtype=np.uint16)
-        g_valid_links = np.zeros((total_gst, total_gst_links), dtype=np.uint16)
+        # each target only reads and writes its own column
+        for v in numba.prange(total_sats):
+            # update distances along the tree, the next hop towards the target
+            # always comes before a satellite in the path order
+            for x in range(total_sats):
+                s = path_order[v, x]
+                n = next_hops[s, v]
 
-        for g in range(total_gst):
-            for x in range(total_gst_links):
-                if gst_links_array[x]["gst"] != gst_array[g]["ID"]:
+                # the target itself or not reachable
+                if s == v or n == -1:
                     continue
 
-                g_valid_links[g][g_valid_link_lens[g]] = x
-                g_valid_link_lens[g] += 1
+                for y in range(offsets[s], offsets[s + 1]):
+                    if neighbors[y] == n:
+                        dist_matrix[s, v] = weights[y] + dist_matrix[n, v]
+                        break
+
+            for s in range(total_sats):
+                for y in range(offsets[s], offsets[s + 1]):
+                    if (
+                        dist_matrix[s, v]
+                        > weights[y] + dist_matrix[neighbors[y], v] + tolerance_m
+                    ):
+                        valid[v] = False
+                        break
+
+                if not valid[v]:
+                    break
+
+        # the path from i to j is the path from j to i in reverse, but its
+        # length was summed up in a different order, which can round
+        # differently
+        for i in numba.prange(total_sats):
+            for j in range(i + 1, total_sats):
+                dist_matrix[j, i] = dist_matrix[i, j]
+
+        return (bool(valid.all()),)
+
+    @staticmethod
+    @numba.njit(parallel=True, nogil=True)  # type: ignore
+    def _numba_update_sat_paths(
+        dist_matrix: np.ndarray,  # type: ignore
+        next_hops: np.ndarray,  # type: ignore
+        total_sats: int,
+        total_nodes: int,
+        path_active: np.ndarray,  # type: ignore
+        path_next_hop: np.ndarray,  # type: ignore
+        path_prev_hop: np.ndarray,  # type: ignore
+        path_delay_us: np.ndarray,  # type: ignore
+        path_bandwidth_kbits: np.ndarray,  # type: ignore
+        isl_bandwidth_kbits: int,
+    ) -> None:
+        """
+        Fill the paths between satellites from the shortest paths calculated
+        by one of the path engines. Optimized with numba, paths from each
+        satellite are filled in parallel.
+        """
+        for i in numba.prange(total_sats):
+            for j in range(i + 1, total_sats):
+                p = _numba_pair_index(i, j, total_nodes)
+
+                active = dist_matrix[i, j] != np.inf
+                path_active[p] = active
+
+                path_next_hop[p] = np.int16(next_hops[i, j])  # will be -1 if inactive
+                path_prev_hop[p] = np.int16(next_hops[j, i])  # will be -1 if inactive
+
+                d = np.uint32(dist_matrix[i, j] * (LINK_PROPAGATION_S_M * 1e6))
+                path_delay_us[p] = d  # will be inf if inactive
+
+                b = np.uint32(isl_bandwidth_kbits)
+                path_bandwidth_kbits[p] = b
 
+    @staticmethod
+    @numba.njit(parallel=True, nogil=True)  # type: ignore
+    def _numba_update_gst_paths(
+        dist_matrix: np.ndarray,  # type: ignore
+        next_hops: np.ndarray,  # type: ignore
+        total_sats: int,
+        total_nodes: int,
+        path_active: np.ndarray,  # type: ignore
+        path_next_hop: np.ndarray,  # type: ignore
+        path_prev_hop: np.ndarray,  # type: ignore
+        path_delay_us: np.ndarray,  # type: ignore
+        path_bandwidth_kbits: np.ndarray,  # type: ignore
+        gst_array: np.ndarray,  # type: ignore
+        total_gst: int,
+        gst_links_array: np.ndarray,  # type: ignore
+        gst_link_offsets: np.ndarray,  # type: ignore
+        isl_bandwidth_kbits: int,
+    ) -> None:
+        """
+        Fill the paths from ground stations by combining the shortest paths
+        between satellites with the uplinks of the ground stations. For each
+        pair of ground station and satellite, this checks all uplinks of the
+        ground station, and for each pair of ground stations, all
+        combinations of their uplinks. Optimized with numba.
+        """
         for g in range(total_gst):
-            # I think this part could easily be parallelized, but numba does not
-            # want it!
-            for s1 in range(total_sats):
+            # there are usually far more satellites than ground stations, so we
+            # parallelize over the satellites
+            for s1 in numba.prange(total_sats):
                 _min_dist = np.float32(np.inf)
                 _min_x = -1
 
-                for x in g_valid_links[g, : g_valid_link_lens[g]]:
+                for x in range(gst_link_offsets[g], gst_link_offsets[g + 1]):
                     _s2 = gst_links_array[x]["sat"]
 
                     # there is a direct uplink between gst and sat! use that
@@ -904,34 +1767,35 @@ class Shell:
                 i = g + total_sats
                 j = s1
 
+                # the path goes from gs to sat, but the satellite has the lower
+                # index
+                p = _numba_pair_index(j, i, total_nodes)
+
                 # set both directions, sat->gs and gs->sat
-                path_matrix[i, j]["active"] = _min_x != -1
-                # path_matrix[j, i]["active"] = _min_x != -1
+                path_active[p] = _min_x != -1
 
                 # actually not active, can ignore the rest
                 if _min_x == -1:
                     continue
 
                 # from gs, next hop is simply the selected uplink sat
-                path_matrix[i, j]["next_hop"] = np.int16(gst_links_array[_min_x]["sat"])
+                path_next_hop[p] = np.int16(gst_links_array[_min_x]["sat"])
                 # from sat, next hop is the next hop from sat to uplink sat
                 # unless it's the uplink sat itself, then it's the gs
                 if gst_links_array[_min_x]["sat"] == s1:
-                    path_matrix[i, j]["prev_hop"] = np.int16(i)
+                    path_prev_hop[p] = np.int16(i)
                 else:
-                    path_matrix[i, j]["prev_hop"] = np.int16(
+                    path_prev_hop[p] = np.int16(
                         next_hops[s1, gst_links_array[_min_x]["sat"]]
                     )  # will be -1 if inactive
 
                 d = np.uint32(_min_dist * (LINK_PROPAGATION_S_M * 1e6))
-                path_matrix[i, j]["delay_us"] = d
-                # path_matrix[j, i]["delay_us"] = d
+                path_delay_us[p] = d
 
                 b = np.uint32(
                     min(gst_array[g]["bandwidth_kbits"], isl_bandwidth_kbits)  # type: ignore
                 )
-                path_matrix[i, j]["bandwidth_kbits"] = b
-                # path_matrix[j, i]["bandwidth_kbits"] = b
+                path_bandwidth_kbits[p] = b
 
         for g1 in range(total_gst):
             for g2 in range(g1 + 1, total_gst):
@@ -939,8 +1803,8 @@ class Shell:
                 _min_x1 = -1
                 _min_x2 = -1
 
-                for x1 in g_valid_links[g1, : g_valid_link_lens[g1]]:
-                    for x2 in g_valid_links[g2, : g_valid_link_lens[g2]]:
+                for x1 in range(gst_link_offsets[g1], gst_link_offsets[g1 + 1]):
+                    for x2 in range(gst_link_offsets[g2], gst_link_offsets[g2 + 1]):
                         _s1 = gst_links_array[x1]["sat"]
                         _s2 = gst_links_array[x2]["sat"]
 
@@ -965,22 +1829,18 @@ class Shell:
                 i = g1 + total_sats
                 j = g2 + total_sats
 
-                path_matrix[i, j]["active"] = _min_x1 != -1
-                # path_matrix[j, i]["active"] = _min_x1 != -1
+                p = _numba_pair_index(i, j, total_nodes)
+
+                path_active[p] = _min_x1 != -1
 
                 if _min_x1 == -1:
                     continue
 
-                path_matrix[i, j]["next_hop"] = np.int16(
-                    gst_links_array[_min_x1]["sat"]
-                )
-                path_matrix[i, j]["prev_hop"] = np.int16(
-                    gst_links_array[_min_x2]["sat"]
-                )
+                path_next_hop[p] = np.int16(gst_links_array[_min_x1]["sat"])
+                path_prev_hop[p] = np.int16(gst_links_array[_min_x2]["sat"])
 
                 d = np.uint32(_min_dist * (LINK_PROPAGATION_S_M * 1e6))
-                path_matrix[i, j]["delay_us"] = d
-                # path_matrix[j, i]["delay_us"] = d
+                path_delay_us[p] = d
 
                 b = np.uint32(
                     min(
@@ -990,42 +1850,232 @@ class Shell:
                     )  # type: ignore
                 )
 
-                path_matrix[i, j]["bandwidth_kbits"] = d
-                # path_matrix[j, i]["bandwidth_kbits"] = d
+                path_bandwidth_kbits[p] = b
+
+    @staticmethod
+    @numba.njit(parallel=True, nogil=True)  # type: ignore
+    def _numba_update_gst_paths_dijkstra(
+        sat_link_array: np.ndarray,  # type: ignore
+        total_isl_links: int,
+        total_sats: int,
+        total_nodes: int,
+        path_active: np.ndarray,  # type: ignore
+        path_next_hop: np.ndarray,  # type: ignore
+        path_prev_hop: np.ndarray,  # type: ignore
+        path_delay_us: np.ndarray,  # type: ignore
+        path_bandwidth_kbits: np.ndarray,  # type: ignore
+        gst_array: np.ndarray,  # type: ignore
+        total_gst: int,
+        gst_links_array: np.ndarray,  # type: ignore
+        gst_link_offsets: np.ndarray,  # type: ignore
+        isl_bandwidth_kbits: int,
+    ) -> None:
+        """
+        Fill the paths from ground stations with one run of Dijkstra's
+        algorithm per ground station. The ground station is a virtual node
+        whose uplinks are its edges to the satellite network, so we start the
+        search with all uplink satellites on the heap. This is
+        O(G*(N+E)*log(N)) instead of checking all uplinks for every pair of
+        ground station and satellite and all combinations of uplinks for
+        every pair of ground stations. Next and previous hops are the same as
+        with _numba_update_gst_paths except for the choice between paths of
+        exactly equal length and float32 rounding. Optimized with numba,
+        ground stations are distributed across threads.
+        """
+        offsets, neighbors, weights = _numba_isl_adjacency(
+            sat_link_array, total_isl_links, total_sats
+        )
+
+        # each ground station only writes the paths to satellites and to
+        # ground stations with a higher index
+        for g in numba.prange(total_gst):
+            i = g + total_sats
+
+            dist_row = np.full(total_sats, np.inf, dtype=np.float32)
+            first_row = np.full(total_sats, -1, dtype=np.int16)
+            prev_row = np.full(total_sats, -1, dtype=np.int16)
+            via_row = np.full(total_sats, -1, dtype=np.int16)
+            # each uplink and each improved distance pushes one entry
+            heap_size = (
+                len(neighbors) + gst_link_offsets[g + 1] - gst_link_offsets[g] + 1
+            )
+            heap_d = np.empty(heap_size, dtype=np.float32)
+            heap_v = np.empty(heap_size, dtype=np.int32)
+
+            size = 0
+
+            for x in range(gst_link_offsets[g], gst_link_offsets[g + 1]):
+                s = gst_links_array[x]["sat"]
+                uplink_dist = np.float32(gst_links_array[x]["distance_m"])
+
+                if uplink_dist >= dist_row[s]:
+                    continue
+
+                # from the ground station, the uplink satellite is the first
+                # hop, and from the satellite, the ground station is the next
+                dist_row[s] = uplink_dist
+                first_row[s] = s
+                prev_row[s] = i
+
+                size = _numba_heap_push(heap_d, heap_v, size, uplink_dist, s)
+
+            _numba_dijkstra_search(
+                offsets,
+                neighbors,
+                weights,
+                dist_row,
+                first_row,
+                prev_row,
+                via_row,
+                heap_d,
+                heap_v,
+                size,
+            )
+
+            b = np.uint32(
+                min(gst_array[g]["bandwidth_kbits"], isl_bandwidth_kbits)  # type: ignore
+            )
+
+            for s1 in range(total_sats):
+                # the path goes from gs to sat, but the satellite has the lower
+                # index
+                p = _numba_pair_index(s1, i, total_nodes)
+
+                path_active[p] = first_row[s1] != -1
+
+                # actually not active, can ignore the rest
+                if first_row[s1] == -1:
+                    continue
+
+                path_next_hop[p] = first_row[s1]
+                path_prev_hop[p] = prev_row[s1]
+
+                d = np.uint32(dist_row[s1] * (LINK_PROPAGATION_S_M * 1e6))
+                path_delay_us[p] = d
+
+                path_bandwidth_kbits[p] = b
+
+            for g2 in range(g + 1, total_gst):
+                _min_dist = np.float32(np.inf)
+                _min_x2 = -1
+
+                for x2 in range(gst_link_offsets[g2], gst_link_offsets[g2 + 1]):
+                    _s2 = gst_links_array[x2]["sat"]
+
+                    if dist_row[_s2] == np.float32(np.inf):
+                        continue
+
+                    path_dist = np.float32(
+                        dist_row[_s2] + gst_links_array[x2]["distance_m"]
+                    )
+
+                    if path_dist >= _min_dist:
+                        continue
+
+                    _min_dist = path_dist
+                    _min_x2 = x2
+
+                j = g2 + total_sats
+
+                p = _numba_pair_index(i, j, total_nodes)
+
+                path_active[p] = _min_x2 != -1
+
+                if _min_x2 == -1:
+                    continue
+
+                _s2 = gst_links_array[_min_x2]["sat"]
+
+                path_next_hop[p] = first_row[_s2]
+                path_prev_hop[p] = np.int16(_s2)
+
+                d = np.uint32(_min_dist * (LINK_PROPAGATION_S_M * 1e6))
+                path_delay_us[p] = d
+
+                # b is already the minimum of this ground station and the ISLs
+                path_bandwidth_kbits[p] = min(
+                    b, np.uint32(gst_array[g2]["bandwidth_kbits"])
+                )
+
+    def _get_link_diff(self, delay_update_threshold_us: int) -> int:
+        """
+        Find the paths that have changed since the last diff and write them
+        to the path diff buffer, which is grown if necessary. Just calls the
+        numba-optimized code.
+
+        :param delay_update_threshold_us: The threshold for the delay in
+            microseconds.
+        :return: The number of changed paths.
+        """
+        while True:
+            total_link_diff: int = self._numba_get_link_diff(
+                delay_update_threshold_us=delay_update_threshold_us,
+                total_sats=self.total_sats,
+                total_gst=self.total_gst,
+                total_nodes=self.total_nodes,
+                curr_path_active=self.curr_path_active,
+                curr_path_next_hop=self.curr_path_next_hop,
+                curr_path_delay_us=self.curr_path_delay_us,
+                curr_path_bandwidth_kbits=self.curr_path_bandwidth_kbits,
+                path_active=self.path_active,
+                path_next_hop=self.path_next_hop,
+                path_delay_us=self.path_delay_us,
+                path_bandwidth_kbits=self.path_bandwidth_kbits,
+                path_diff=self.path_diff,
+            )[0]
+
+            if total_link_diff <= len(self.path_diff):
+                return total_link_diff
+
+            # the buffer was too small, nothing has been changed yet so we
+            # can just try again with a larger buffer
+            self.path_diff = np.empty(
+                max(total_link_diff, 2 * len(self.path_diff)),
+                dtype=PATH_DIFF_DTYPE,
+            )
 
     @staticmethod
-    @numba.njit  # type: ignore
+    @numba.njit(nogil=True)  # type: ignore
     def _numba_get_link_diff(
         delay_update_threshold_us: int,
         total_sats: int,
         total_gst: int,
-        curr_paths: np.ndarray,  # type: ignore
-        path_matrix: np.ndarray,  # type: ignore
+        total_nodes: int,
+        curr_path_active: np.ndarray,  # type: ignore
+        curr_path_next_hop: np.ndarray,  # type: ignore
+        curr_path_delay_us: np.ndarray,  # type: ignore
+        curr_path_bandwidth_kbits: np.ndarray,  # type: ignore
+        path_active: np.ndarray,  # type: ignore
+        path_next_hop: np.ndarray,  # type: ignore
+        path_delay_us: np.ndarray,  # type: ignore
+        path_bandwidth_kbits: np.ndarray,  # type: ignore
         path_diff: np.ndarray,  # type: ignore
     ) -> typing.Tuple[int]:
         """
         Get the differences between links at the current timestep and the
-        previous timestep. Optimized with numba.
+        previous timestep. Optimized with numba. Returns the total number of
+        differences, even if they do not all fit into the path diff buffer.
         """
         total_link_diff = 0
+        max_link_diff = len(path_diff)
 
         # path diff for satellites
         for n1 in range(total_sats):
             for n2 in range(n1 + 1, total_sats):
-                p1 = curr_paths[n1][n2]
-                p2 = path_matrix[n1][n2]
+                p = _numba_pair_index(n1, n2, total_nodes)
 
                 if (
                     # note that converting to int32 is necessary for subtraction to work correctly
-                    np.abs(np.int32(p1["delay_us"]) - np.int32(p2["delay_us"]))
+                    np.abs(np.int32(curr_path_delay_us[p]) - np.int32(path_delay_us[p]))
                     > delay_update_threshold_us
-                    or p1["active"] != p2["active"]
-                    or p1["bandwidth_kbits"] != p2["bandwidth_kbits"]
-                    or p1["next_hop"] != p2["next_hop"]
+                    or curr_path_active[p] != path_active[p]
+                    or curr_path_bandwidth_kbits[p] != path_bandwidth_kbits[p]
+                    or curr_path_next_hop[p] != path_next_hop[p]
                 ):
-                    path_diff[total_link_diff]["node_1"] = np.int16(n1)
-                    path_diff[total_link_diff]["node_2"] = np.int16(n2)
-                    path_diff[total_link_diff]["path"] = p2
+                    if total_link_diff < max_link_diff:
+                        path_diff[total_link_diff]["node_1"] = np.int16(n1)
+                        path_diff[total_link_diff]["node_2"] = np.int16(n2)
+                        path_diff[total_link_diff]["index"] = np.int32(p)
                     total_link_diff += 1
 
         # path diff for ground stations to all
@@ -1039,20 +2089,23 @@ class Shell:
                 if n2 >= total_sats and n1 > n2:
                     continue
 
-                p1 = curr_paths[n1][n2]
-                p2 = path_matrix[n1][n2]
+                if n2 < n1:
+                    p = _numba_pair_index(n2, n1, total_nodes)
+                else:
+                    p = _numba_pair_index(n1, n2, total_nodes)
 
                 if (
-                    np.abs(np.int32(p1["delay_us"]) - np.int32(p2["delay_us"]))
+                    np.abs(np.int32(curr_path_delay_us[p]) - np.int32(path_delay_us[p]))
                     > delay_update_threshold_us
-                    or p1["active"] != p2["active"]
-                    or p1["bandwidth_kbits"] != p2["bandwidth_kbits"]
-                    or p1["next_hop"] != p2["next_hop"]
+                    or curr_path_active[p] != path_active[p]
+                    or curr_path_bandwidth_kbits[p] != path_bandwidth_kbits[p]
+                    or curr_path_next_hop[p] != path_next_hop[p]
                 ):
                     # print(f"n1 {n1} n2 {n2} changed")
-                    path_diff[total_link_diff]["node_1"] = np.int16(n1)
-                    path_diff[total_link_diff]["node_2"] = np.int16(n2)
-                    path_diff[total_link_diff]["path"] = p2
+                    if total_link_diff < max_link_diff:
+                        path_diff[total_link_diff]["node_1"] = np.int16(n1)
+                        path_diff[total_link_diff]["node_2"] = np.int16(n2)
+                        path_diff[total_link_diff]["index"] = np.int32(p)
                     total_link_diff += 1
 
         return (total_link_diff,)
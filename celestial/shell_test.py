@@ -0,0 +1,378 @@
+#
+# This file is part of Celestial (https://github.com/OpenFogStack/celestial).
+# Copyright (c) 2024 Tobias Pfandzelter, The OpenFogStack Team.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import numba
+import numpy as np
+import typing
+
+import celestial.config
+import celestial.shell
+
+# float32 sums of distances in meters are exact below this length
+EXACT_PATH_LENGTH_M = 2**24
+# relative difference in path length that we attribute to float32 rounding
+PATH_ROUNDING_TOLERANCE = 1e-6
+
+TIMESTEPS = [0, 1, 2, 60, 61, 600]
+
+
+def make_shell(
+    engine: celestial.config.PathEngine = celestial.config.PathEngine.FLOYD_WARSHALL,
+    planes: int = 12,
+    sats: int = 10,
+    ground_stations: int = 8,
+    **kwargs: typing.Any,
+) -> celestial.shell.Shell:
+    rng = np.random.default_rng(2)
+
+    return celestial.shell.Shell(
+        shell_identifier=1,
+        planes=planes,
+        sats=sats,
+        altitude_km=550,
+        inclination=53.0,
+        arc_of_ascending_nodes=360.0,
+        eccentricity=0.0,
+        isl_bandwidth_kbits=10_000_000,
+        bbox=celestial.config.BoundingBox(
+            lat1=-90.0, lon1=-180.0, lat2=90.0, lon2=180.0
+        ),
+        ground_stations=[
+            celestial.config.GroundStation(
+                name=f"gst{i}",
+                lat=rng.uniform(-60.0, 60.0),
+                lng=rng.uniform(-180.0, 180.0),
+                gts_bandwidth_kbits=1_000_000,
+                min_elevation=25.0,
+                connection_type=celestial.config.GroundStationConnectionType(i % 2),
+                machine_config=celestial.config.MachineConfig(
+                    vcpu_count=1,
+                    mem_size_mib=128,
+                    disk_size=1024,
+                    kernel="test.bin",
+                    rootfs="rootfs.img",
+                    boot_parameters=[],
+                ),
+            )
+            for i in range(ground_stations)
+        ],
+        path_engine=engine,
+        **kwargs,
+    )
+
+
+def check_next_hops(
+    s: celestial.shell.Shell,
+    dist_matrix: np.ndarray,  # type: ignore
+    next_hops: np.ndarray,  # type: ignore
+) -> None:
+    # every next hop must be a neighbor on a shortest path, up to float32
+    # rounding
+    links = s.link_array[: s.total_isl_links]
+    links = links[links["active"]]
+
+    weights = np.full((s.total_sats, s.total_sats), np.inf)
+    weights[links["node_1"], links["node_2"]] = links["distance_m"]
+    weights[links["node_2"], links["node_1"]] = links["distance_m"]
+
+    for i in range(s.total_sats):
+        reachable = np.flatnonzero(np.isfinite(dist_matrix[i]))
+        reachable = reachable[reachable != i]
+
+        n = next_hops[i, reachable]
+
+        assert np.all(np.isfinite(weights[i, n]))
+        assert np.allclose(
+            weights[i, n] + dist_matrix[n, reachable],
+            dist_matrix[i, reachable],
+            rtol=PATH_ROUNDING_TOLERANCE,
+            atol=0,
+        )
+
+        unreachable = ~np.isfinite(dist_matrix[i])
+        assert np.all(next_hops[i, unreachable] == -1)
+
+
+def test_dijkstra_floyd_warshall() -> None:
+    fw = make_shell(celestial.config.PathEngine.FLOYD_WARSHALL)
+    dijkstra = make_shell(celestial.config.PathEngine.DIJKSTRA)
+
+    for t in TIMESTEPS:
+        fw.step(t)
+        dijkstra.step(t)
+
+        fw_dist, fw_next = fw._calculate_sat_paths()
+        dijkstra_dist, dijkstra_next = dijkstra._calculate_sat_paths()
+
+        # as long as float32 sums are exact, both engines must agree exactly,
+        # including the choice between paths of the same length
+        exact = fw_dist < EXACT_PATH_LENGTH_M
+
+        assert np.array_equal(np.isfinite(fw_dist), np.isfinite(dijkstra_dist))
+        assert np.array_equal(fw_dist[exact], dijkstra_dist[exact])
+        assert np.array_equal(fw_next[exact], dijkstra_next[exact])
+
+        # longer paths are summed in a different order
+        finite = np.isfinite(fw_dist)
+        assert np.allclose(
+            fw_dist[finite],
+            dijkstra_dist[finite],
+            rtol=PATH_ROUNDING_TOLERANCE,
+            atol=0,
+        )
+
+        check_next_hops(fw, fw_dist, fw_next)
+        check_next_hops(dijkstra, dijkstra_dist, dijkstra_next)
+
+
+def test_parallel_kernels() -> None:
+    # the original serial kernels are the parallel kernels compiled without
+    # parallel mode, where numba.prange is a normal range
+    kernels = {
+        celestial.config.PathEngine.FLOYD_WARSHALL: (
+            numba.njit(celestial.shell.Shell._numba_floyd_warshall.py_func),
+            celestial.shell.Shell._numba_floyd_warshall,
+        ),
+        celestial.config.PathEngine.DIJKSTRA: (
+            numba.njit(celestial.shell.Shell._numba_dijkstra.py_func),
+            celestial.shell.Shell._numba_dijkstra,
+        ),
+    }
+
+    for engine, (serial_kernel, parallel_kernel) in kernels.items():
+        s = make_shell(engine)
+        s.step(60)
+
+        results = []
+
+        for kernel, threads in [
+            (serial_kernel, 1),
+            (parallel_kernel, 1),
+            (parallel_kernel, numba.config.NUMBA_NUM_THREADS),  # type: ignore
+        ]:
+            numba.set_num_threads(threads)
+
+            dist_matrix = np.empty((s.total_sats, s.total_sats), dtype=np.float32)
+            next_hops = np.empty((s.total_sats, s.total_sats), dtype=np.int16)
+
+            kernel(
+                sat_link_array=s.link_array,
+                total_isl_links=s.total_isl_links,
+                total_sats=s.total_sats,
+                dist_matrix=dist_matrix,
+                next_hops=next_hops,
+            )
+
+            results.append((dist_matrix, next_hops))
+
+        # the result must not depend on the kernel or number of threads
+        for dist_matrix, next_hops in results[1:]:
+            assert np.array_equal(dist_matrix, results[0][0])
+            assert np.array_equal(next_hops, results[0][1])
+
+    numba.set_num_threads(numba.config.NUMBA_NUM_THREADS)  # type: ignore
+
+    # the same goes for all paths, including those of ground stations
+    for engine in celestial.config.PathEngine:
+        one = make_shell(engine, threads=1)
+        parallel = make_shell(engine)
+
+        for t in TIMESTEPS:
+            one.step(t, calculate_diffs=True)
+            parallel.step(t, calculate_diffs=True)
+
+            assert np.array_equal(
+                one.get_link_diff_array(), parallel.get_link_diff_array()
+            )
+
+
+def walk(next_hops: np.ndarray, i: int, j: int) -> typing.List[int]:  # type: ignore
+    # follow the next hops from satellite i to satellite j
+    path = [i]
+
+    while path[-1] != j:
+        path.append(int(next_hops[path[-1], j]))
+        assert len(path) <= len(next_hops)
+
+    return path
+
+
+def check_kept_paths(
+    s: celestial.shell.Shell,
+    full_dist: np.ndarray,  # type: ignore
+    full_next: np.ndarray,  # type: ignore
+    tolerance_m: float,
+) -> None:
+    links = s.link_array[: s.total_isl_links]
+    links = links[links["active"]]
+
+    weights = np.full((s.total_sats, s.total_sats), np.inf)
+    weights[links["node_1"], links["node_2"]] = links["distance_m"]
+    weights[links["node_2"], links["node_1"]] = links["distance_m"]
+
+    assert np.array_equal(np.isfinite(s.dist_matrix), np.isfinite(full_dist))
+
+    # Dijkstra sums up the two directions of long paths differently
+    exact = full_dist < EXACT_PATH_LENGTH_M
+    assert np.array_equal(s.dist_matrix[exact], s.dist_matrix.T[exact])
+
+    for i in range(s.total_sats):
+        for j in range(i + 1, s.total_sats):
+            if not np.isfinite(s.dist_matrix[i, j]):
+                continue
+
+            # next and prev hops of a path are taken from the same path, which
+            # Dijkstra only guarantees while float32 sums are exact
+            path = walk(s.next_hops, i, j)
+
+            if exact[i, j]:
+                assert walk(s.next_hops, j, i) == path[::-1]
+
+            # the length is that of the current links along the path
+            assert np.isclose(
+                s.dist_matrix[i, j],
+                sum(weights[a, b] for a, b in zip(path, path[1:])),
+                rtol=PATH_ROUNDING_TOLERANCE,
+                atol=0,
+            )
+
+            # each hop of the shortest path may add the tolerance
+            hops = len(walk(full_next, i, j)) - 1
+
+            assert s.dist_matrix[i, j] <= (full_dist[i, j] + hops * tolerance_m) * (
+                1 + PATH_ROUNDING_TOLERANCE
+            )
+
+
+def test_incremental_paths() -> None:
+    timesteps = list(range(0, 30, 3))
+
+    for engine in celestial.config.PathEngine:
+        full = make_shell(engine)
+        exact = make_shell(engine, incremental_paths=True)
+        kept = make_shell(
+            engine, incremental_paths=True, incremental_tolerance_m=1_000.0
+        )
+
+        for t in timesteps:
+            full.step(t, calculate_diffs=True)
+            exact.step(t, calculate_diffs=True)
+            kept.step(t, calculate_diffs=True)
+
+            # without a tolerance, the output must be the same
+            assert np.array_equal(
+                full.get_link_diff_array(), exact.get_link_diff_array()
+            )
+
+            full_dist, full_next = full._calculate_sat_paths()
+            check_kept_paths(kept, full_dist, full_next, 1_000.0)
+
+        # with a tolerance, paths must actually be kept
+        assert np.any(kept.next_hops != full_next)
+
+
+def brute_force_gst_links(
+    s: celestial.shell.Shell,
+) -> typing.List[typing.Tuple[int, int, int]]:
+    # the links of ground stations to satellites by checking every satellite,
+    # as they were found before there was a grid
+    links: typing.List[typing.Tuple[int, int, int]] = []
+
+    sat_x = s.satellites_array["x"].astype(np.float64)
+    sat_y = s.satellites_array["y"].astype(np.float64)
+    sat_z = s.satellites_array["z"].astype(np.float64)
+
+    for gst in s.gst_array:
+        dx = sat_x - gst["x"]
+        dy = sat_y - gst["y"]
+        dz = sat_z - gst["z"]
+        d = np.sqrt(dx * dx + dy * dy + dz * dz).astype(np.uint32)
+
+        in_range = np.flatnonzero(d <= gst["max_stg_range"])
+
+        if (
+            gst["conn_type"] == celestial.config.GroundStationConnectionType.ONE.value
+            and len(in_range) > 0
+        ):
+            # of several equally short links, the last one is kept
+            shortest = in_range[d[in_range] == d[in_range].min()]
+            in_range = shortest[-1:]
+
+        links.extend(
+            (int(gst["ID"]), int(s.satellites_array[i]["ID"]), int(d[i]))
+            for i in in_range
+        )
+
+    return links
+
+
+def test_gst_links() -> None:
+    s = make_shell(planes=24, sats=20, ground_stations=32)
+    # many small cells so that the range of a ground station covers cells
+    # in every direction
+    small_cells = make_shell(planes=24, sats=20, ground_stations=32)
+    small_cells.gst_grid_cell_size = 200_000
+
+    for t in TIMESTEPS:
+        for shell in (s, small_cells):
+            shell.step(t)
+
+            links = shell.gst_links_array[: shell.total_gst_links]
+
+            assert [
+                (int(link["gst"]), int(link["sat"]), int(link["distance_m"]))
+                for link in links
+            ] == brute_force_gst_links(shell)
+
+
+def test_gst_gst_bandwidth() -> None:
+    for engine in celestial.config.PathEngine:
+        s = make_shell(engine, ground_stations=16)
+
+        # some ground stations have more bandwidth than the ISLs
+        s.isl_bandwidth_kbits = 100_000
+        s.gst_array["bandwidth_kbits"][::2] = 1_000_000
+        s.gst_array["bandwidth_kbits"][1::2] = 10_000
+
+        for t in TIMESTEPS:
+            s.step(t, calculate_paths=True)
+
+            for g1 in range(s.total_gst):
+                for g2 in range(g1 + 1, s.total_gst):
+                    p = celestial.shell._numba_pair_index(
+                        s.total_sats + g1, s.total_sats + g2, s.total_nodes
+                    )
+
+                    if not s.path_active[p]:
+                        continue
+
+                    # the bandwidth of a path is that of its slowest link
+                    assert s.path_bandwidth_kbits[p] == min(
+                        s.gst_array["bandwidth_kbits"][g1],
+                        s.gst_array["bandwidth_kbits"][g2],
+                        s.isl_bandwidth_kbits,
+                    )
+
+
+if __name__ == "__main__":
+    test_dijkstra_floyd_warshall()
+    test_parallel_kernels()
+    test_incremental_paths()
+    test_gst_links()
+    test_gst_gst_bandwidth()
+
+    print("Test passed successfully!")
@@ -0,0 +1,363 @@
+#
+# This file is part of Celestial (https://github.com/OpenFogStack/celestial).
+# Copyright (c) 2024 Tobias Pfandzelter, The OpenFogStack Team.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""Serialization of Celestial initialization and updates to a single trace file."""
+
+import typing
+
+import numpy as np
+
+import celestial.config
+import celestial.format_util
+import celestial.types
+
+# output files with this extension use the trace format
+FILE_EXTENSION = ".trace"
+
+# The trace file is an indexed file (see celestial.format_util). The data of
+# each timestep with diffs are all its link diffs followed by all its machine
+# diffs as fixed-width records in the same format as in the .zip files. The
+# index has the offset and number of the link and machine diffs of each
+# timestep.
+_MAGIC = b"CELTRACE"
+_VERSION = 1
+
+_INDEX_DTYPE = np.dtype(
+    [
+        ("t", "<i8"),
+        ("links_offset", "<u8"),
+        ("links_count", "<u8"),
+        ("machines_offset", "<u8"),
+        ("machines_count", "<u8"),
+    ]
+)
+
+
+class TraceSerializer:
+    """
+    The TraceSerializer implements the Serializer interface and serializes
+    Celestial initialization and updates to a single, append-only trace file.
+    Diffs of one timestep are collected in memory and written as one
+    contiguous block once the next timestep starts, so diffs must be
+    serialized in order of time.
+
+    Use the TraceDeserializer to restore the initialization and updates.
+    """
+
+    def __init__(
+        self, config: celestial.config.Config, output_file: typing.Optional[str] = None
+    ):
+        """
+        Initialize the serializer.
+
+        :param config: The Celestial configuration.
+        :param output_file: The output file to write to. If None, a filename
+            will be generated based on a hash of the configuration.
+        """
+        if output_file is None:
+            self.filename = "{:08x}{}".format(abs(hash(config)), FILE_EXTENSION)
+        else:
+            self.filename = output_file
+
+        self.f = celestial.format_util.IndexedFileWriter(
+            self.filename, _MAGIC, _VERSION, config
+        )
+
+        self.index: typing.List[typing.Tuple[int, int, int, int, int]] = []
+
+        self.current_t: typing.Optional[celestial.types.timestamp_s] = None
+        self.links: typing.List[bytes] = []
+        self.total_links = 0
+        self.machines: typing.List[bytes] = []
+        self.total_machines = 0
+
+    def _flush(self) -> None:
+        """
+        Write the diffs of the current timestep to the file.
+        """
+        if self.current_t is None:
+            return
+
+        links_offset = self.f.tell()
+        self.f.write(b"".join(self.links))
+
+        machines_offset = self.f.tell()
+        self.f.write(b"".join(self.machines))
+
+        self.index.append(
+            (
+                self.current_t,
+                links_offset,
+                self.total_links,
+                machines_offset,
+                self.total_machines,
+            )
+        )
+
+        self.current_t = None
+        self.links = []
+        self.total_links = 0
+        self.machines = []
+        self.total_machines = 0
+
+    def _start_timestep(self, t: celestial.types.timestamp_s) -> None:
+        """
+        Make t the current timestep, writing the diffs of the previous
+        timestep to the file if necessary.
+
+        :param t: The timestamp of the next diff.
+        :raises ValueError: If diffs of a later timestep were already written.
+        """
+        if t == self.current_t:
+            return
+
+        last_t = self.current_t
+
+        if last_t is None and len(self.index) > 0:
+            last_t = self.index[-1][0]
+
+        if last_t is not None and t < last_t:
+            raise ValueError(
+                f"Diffs must be serialized in order of time, got {t} after {last_t}"
+            )
+
+        self._flush()
+        self.current_t = t
+
+    def init_machine(
+        self,
+        machine: celestial.types.MachineID_dtype,
+        config: celestial.config.MachineConfig,
+    ) -> None:
+        """
+        Add an initialization for a machine, the initializations are written
+        at the end of the file.
+
+        :param machine: The machine ID of the machine to initialize.
+        :param config: The configuration of the machine to initialize.
+        """
+        self.f.init_machine(machine, config)
+
+    def diff_link(
+        self,
+        t: celestial.types.timestamp_s,
+        source: celestial.types.MachineID_dtype,
+        target: celestial.types.MachineID_dtype,
+        link: celestial.types.Link_dtype,
+    ) -> None:
+        """
+        Add a link diff to the current timestep.
+
+        :param t: The timestamp of the link diff.
+        :param source: The source machine ID of the link.
+        :param target: The target machine ID of the link.
+        :param link: The link to serialize.
+        """
+        self._start_timestep(t)
+
+        self.links.append(
+            celestial.format_util.diff_link_to_bytes(source, target, link)
+        )
+        self.total_links += 1
+
+    def diff_links_batch(
+        self,
+        t: celestial.types.timestamp_s,
+        links: np.ndarray,  # type: ignore
+    ) -> None:
+        """
+        Add a batch of link diffs to the current timestep.
+
+        :param t: The timestamp of the link diffs.
+        :param links: A structured array of links with dtype
+            celestial.types.LINK_DIFF_DTYPE.
+        """
+        if len(links) == 0:
+            return
+
+        self._start_timestep(t)
+
+        self.links.append(
+            links.astype(celestial.types.LINK_DIFF_DTYPE, copy=False).tobytes()
+        )
+        self.total_links += len(links)
+
+    def diff_machine(
+        self,
+        t: celestial.types.timestamp_s,
+        machine: celestial.types.MachineID_dtype,
+        s: celestial.types.VMState,
+    ) -> None:
+        """
+        Add a machine diff to the current timestep.
+
+        :param t: The timestamp of the machine diff.
+        :param machine: The machine ID of the machine to serialize.
+        :param s: The VM state of the machine to serialize.
+        """
+        self._start_timestep(t)
+
+        self.machines.append(celestial.format_util.diff_machine_to_bytes(machine, s))
+        self.total_machines += 1
+
+    def diff_machines_batch(
+        self,
+        t: celestial.types.timestamp_s,
+        machines: np.ndarray,  # type: ignore
+    ) -> None:
+        """
+        Add a batch of machine diffs to the current timestep.
+
+        :param t: The timestamp of the machine diffs.
+        :param machines: A structured array of machine states with dtype
+            celestial.types.MACHINE_DIFF_DTYPE.
+        """
+        if len(machines) == 0:
+            return
+
+        self._start_timestep(t)
+
+        self.machines.append(
+            machines.astype(celestial.types.MACHINE_DIFF_DTYPE, copy=False).tobytes()
+        )
+        self.total_machines += len(machines)
+
+    def persist(self) -> None:
+        """
+        Write the last timestep, the initializations, and the index and close
+        the trace file.
+        """
+        self._flush()
+
+        self.f.close(np.array(self.index, dtype=_INDEX_DTYPE))
+
+
+class TraceDeserializer:
+    """
+    The TraceDeserializer implements the Deserializer interface and
+    deserializes Celestial initialization and updates from a trace file
+    created by the TraceSerializer. The file is memory-mapped, and the diffs
+    of a timestep are found with a single lookup in the index.
+    """
+
+    def __init__(self, filename: str):
+        """
+        Initialize the deserializer.
+
+        :param filename: The filename of the trace file to deserialize from.
+
+        :raises ValueError: If the file is not a valid trace file.
+        """
+        self.filename = filename
+
+        self.f = celestial.format_util.IndexedFileReader(
+            self.filename, _MAGIC, _VERSION, _INDEX_DTYPE
+        )
+
+    def config(self) -> celestial.config.Config:
+        """
+        Restore the Celestial configuration from the header of the trace file.
+
+        :returns: The restored configuration.
+        """
+        return self.f.config()
+
+    def init_machines(
+        self,
+    ) -> typing.List[
+        typing.Tuple[celestial.types.MachineID_dtype, celestial.config.MachineConfig]
+    ]:
+        """
+        Restore the machine initializations from the trace file.
+
+        :returns: A list of the restored machine initializations.
+        """
+        return self.f.init_machines()
+
+    def diff_links(self, t: celestial.types.timestamp_s) -> typing.Iterator[
+        typing.Tuple[
+            celestial.types.MachineID_dtype,
+            celestial.types.MachineID_dtype,
+            celestial.types.Link_dtype,
+        ]
+    ]:
+        """
+        Restore the link diffs for a given timestep.
+
+        :param t: The timestep to restore the link diffs for.
+        :returns: An iterator of the restored link diffs.
+        """
+        yield from celestial.format_util.diff_link_from_bytes(
+            self.diff_links_array(t).tobytes()
+        )
+
+    def diff_links_array(self, t: celestial.types.timestamp_s) -> np.ndarray:  # type: ignore
+        """
+        Restore the link diffs for a given timestep as a structured array.
+        The array is a read-only view of the memory-mapped file.
+
+        :param t: The timestep to restore the link diffs for.
+        :returns: An array of link diffs with dtype
+            celestial.types.LINK_DIFF_DTYPE.
+        """
+        entry = self.f.entry(t)
+
+        if entry is None:
+            return np.empty(0, dtype=celestial.types.LINK_DIFF_DTYPE)
+
+        return np.frombuffer(
+            self.f.mm,
+            dtype=celestial.types.LINK_DIFF_DTYPE,
+            count=int(entry["links_count"]),
+            offset=int(entry["links_offset"]),
+        )
+
+    def diff_machines(
+        self, t: celestial.types.timestamp_s
+    ) -> typing.Iterator[
+        typing.Tuple[celestial.types.MachineID_dtype, celestial.types.VMState]
+    ]:
+        """
+        Restore the machine diffs for a given timestep.
+
+        :param t: The timestep to restore the machine diffs for.
+        :returns: An iterator of the restored machine diffs.
+        """
+        yield from celestial.format_util.diff_machine_from_bytes(
+            self.diff_machines_array(t).tobytes()
+        )
+
+    def diff_machines_array(self, t: celestial.types.timestamp_s) -> np.ndarray:  # type: ignore
+        """
+        Restore the machine diffs for a given timestep as a structured array.
+        The array is a read-only view of the memory-mapped file.
+
+        :param t: The timestep to restore the machine diffs for.
+        :returns: An array of machine diffs with dtype
+            celestial.types.MACHINE_DIFF_DTYPE.
+        """
+        entry = self.f.entry(t)
+
+        if entry is None:
+            return np.empty(0, dtype=celestial.types.MACHINE_DIFF_DTYPE)
+
+        return np.frombuffer(
+            self.f.mm,
+            dtype=celestial.types.MACHINE_DIFF_DTYPE,
+            count=int(entry["machines_count"]),
+            offset=int(entry["machines_offset"]),
+        )
@@ -0,0 +1,162 @@
+#
+# This file is part of Celestial (https://github.com/OpenFogStack/celestial).
+# Copyright (c) 2024 Tobias Pfandzelter, The OpenFogStack Team.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import os
+import tempfile
+import typing
+
+import numpy as np
+import toml
+
+import celestial.config
+import celestial.format_test
+import celestial.format_util
+import celestial.serializer
+import celestial.trace_serializer
+import celestial.types
+import celestial.zip_serializer
+
+CONFIG_FILE = os.path.join(os.path.dirname(__file__), "..", "config.toml")
+
+
+def make_config() -> celestial.config.Config:
+    return celestial.config.Config(toml.load(CONFIG_FILE))
+
+
+def make_link_diffs(n: int, seed: int) -> np.ndarray:  # type: ignore
+    rng = np.random.default_rng(seed)
+
+    links = np.zeros(n, dtype=celestial.types.LINK_DIFF_DTYPE)
+
+    for field in celestial.types.LINK_DIFF_DTYPE.names:  # type: ignore
+        if field == "blocked":
+            links[field] = rng.integers(0, 2, size=n)
+        else:
+            links[field] = rng.integers(
+                0, np.iinfo(links.dtype[field]).max, size=n, endpoint=True
+            )
+
+    return links
+
+
+def make_machine_diffs(n: int, seed: int) -> np.ndarray:  # type: ignore
+    rng = np.random.default_rng(seed)
+
+    machines = np.zeros(n, dtype=celestial.types.MACHINE_DIFF_DTYPE)
+    machines["group"] = rng.integers(0, 3, size=n)
+    machines["id"] = rng.permutation(n)
+    machines["state"] = rng.integers(0, 2, size=n)
+
+    return machines
+
+
+# the diffs of each timestep, timesteps without diffs are not in here
+STEPS: typing.Dict[int, typing.Tuple[np.ndarray, np.ndarray]] = {  # type: ignore
+    0: (make_link_diffs(50, 0), make_machine_diffs(20, 0)),
+    1: (make_link_diffs(3, 1), make_machine_diffs(0, 1)),
+    5: (make_link_diffs(0, 5), make_machine_diffs(4, 5)),
+    6: (make_link_diffs(7, 6), make_machine_diffs(2, 6)),
+}
+
+
+def write_diffs(s: celestial.serializer.Serializer) -> None:
+    for m, c in celestial.format_test.INITS:
+        s.init_machine(m, c)
+
+    for t, (links, machines) in STEPS.items():
+        # diffs can also be added one by one, mixed with batches
+        for source, target, link in celestial.format_util.diff_link_from_bytes(
+            links[:2].tobytes()
+        ):
+            s.diff_link(t, source, target, link)
+
+        for machine, state in celestial.format_util.diff_machine_from_bytes(
+            machines[:1].tobytes()
+        ):
+            s.diff_machine(t, machine, state)
+
+        s.diff_links_batch(t, links[2:])
+        s.diff_machines_batch(t, machines[1:])
+
+    s.persist()
+
+
+def check_diffs(
+    r: typing.Union[
+        celestial.trace_serializer.TraceDeserializer,
+        celestial.zip_serializer.ZipDeserializer,
+    ],
+    config: celestial.config.Config,
+) -> None:
+    assert r.config().duration == config.duration
+    assert r.config().resolution == config.resolution
+    assert len(r.config().shells) == len(config.shells)
+
+    celestial.format_test.check_inits(r.init_machines())
+
+    # including timesteps without diffs between and after the others
+    for t in range(8):
+        links, machines = STEPS.get(
+            t, (make_link_diffs(0, t), make_machine_diffs(0, t))
+        )
+
+        assert np.array_equal(r.diff_links_array(t), links)
+        assert np.array_equal(r.diff_machines_array(t), machines)
+
+        assert list(r.diff_links(t)) == list(
+            celestial.format_util.diff_link_from_bytes(links.tobytes())
+        )
+        assert list(r.diff_machines(t)) == list(
+            celestial.format_util.diff_machine_from_bytes(machines.tobytes())
+        )
+
+
+def test_trace_round_trip() -> None:
+    config = make_config()
+
+    with tempfile.TemporaryDirectory() as d:
+        filename = os.path.join(d, f"test{celestial.trace_serializer.FILE_EXTENSION}")
+
+        write_diffs(celestial.trace_serializer.TraceSerializer(config, filename))
+
+        check_diffs(celestial.trace_serializer.TraceDeserializer(filename), config)
+
+
+def test_trace_order() -> None:
+    with tempfile.TemporaryDirectory() as d:
+        filename = os.path.join(d, f"test{celestial.trace_serializer.FILE_EXTENSION}")
+
+        s = celestial.trace_serializer.TraceSerializer(make_config(), filename)
+
+        s.diff_machines_batch(1, make_machine_diffs(2, 1))
+        s.diff_machines_batch(2, make_machine_diffs(2, 2))
+
+        try:
+            s.diff_machines_batch(1, make_machine_diffs(2, 1))
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("diffs out of order must raise ValueError")
+
+        s.persist()
+
+
+if __name__ == "__main__":
+    test_trace_round_trip()
+    test_trace_order()
+
+    print("Test passed successfully!")
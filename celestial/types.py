@@ -159,6 +159,37 @@ def Link_prev_hop(link: Link_dtype) -> MachineID_dtype:
     return link[4]
 
 
+# a batch of link updates as a structured array, one row per link with the
+# same fields as a Link plus its source and target machine, names of machines
+# are not included
+# fields are packed in little-endian byte order without padding
+LINK_DIFF_DTYPE = np.dtype(
+    [
+        ("source_group", "<u1"),
+        ("source_id", "<u2"),
+        ("target_group", "<u1"),
+        ("target_id", "<u2"),
+        ("latency_us", "<u4"),
+        ("bandwidth_kbits", "<u4"),
+        ("blocked", "?"),
+        ("next_hop_group", "<u1"),
+        ("next_hop_id", "<u2"),
+        ("prev_hop_group", "<u1"),
+        ("prev_hop_id", "<u2"),
+    ]
+)
+
+# a batch of machine state updates as a structured array, one row per machine
+# with its group, ID, and new VMState value
+# fields are packed in little-endian byte order without padding
+MACHINE_DIFF_DTYPE = np.dtype(
+    [
+        ("group", "<u1"),
+        ("id", "<u2"),
+        ("state", "<u1"),
+    ]
+)
+
 MachineState = typing.Dict[
     MachineID_dtype,
     VMState,
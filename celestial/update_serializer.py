@@ -0,0 +1,187 @@
+#
+# This file is part of Celestial (https://github.com/OpenFogStack/celestial).
+# Copyright (c) 2024 Tobias Pfandzelter, The OpenFogStack Team.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+"""Serialization of pre-encoded Celestial update requests to a single file."""
+
+import struct
+import typing
+
+import numpy as np
+
+import celestial.config
+import celestial.format_util
+import celestial.types
+
+# output files with this extension contain pre-encoded updates
+FILE_EXTENSION = ".updates"
+
+# The updates file is an indexed file (see celestial.format_util). The data
+# of each timestep are the serialized StateUpdateRequest messages that are
+# sent to the hosts, each prefixed with its length. The index has the offset,
+# length in bytes, and number of update messages of each timestep.
+# we always force little-endian byte order
+_MAGIC = b"CELUPDTS"
+_VERSION = 1
+# (message_length:uint32/I)
+_MESSAGE_FMT = "<I"
+
+_INDEX_DTYPE = np.dtype(
+    [
+        ("t", "<i8"),
+        ("offset", "<u8"),
+        ("length", "<u8"),
+        ("count", "<u8"),
+    ]
+)
+
+
+class UpdateSerializer:
+    """
+    The UpdateSerializer writes already serialized update requests for each
+    timestep to a single, append-only file, together with the configuration
+    and machine initializations. Updates must be serialized in order of time.
+    This does not depend on the protobuf definitions, the update requests
+    must be encoded by the caller.
+
+    Use the UpdateDeserializer to restore the initialization and updates.
+    """
+
+    def __init__(self, config: celestial.config.Config, output_file: str):
+        """
+        Initialize the serializer.
+
+        :param config: The Celestial configuration.
+        :param output_file: The output file to write to.
+        """
+        self.filename = output_file
+
+        self.f = celestial.format_util.IndexedFileWriter(
+            self.filename, _MAGIC, _VERSION, config
+        )
+
+        self.index: typing.List[typing.Tuple[int, int, int, int]] = []
+
+    def init_machine(
+        self,
+        machine: celestial.types.MachineID_dtype,
+        config: celestial.config.MachineConfig,
+    ) -> None:
+        """
+        Add an initialization for a machine, the initializations are written
+        at the end of the file.
+
+        :param machine: The machine ID of the machine to initialize.
+        :param config: The configuration of the machine to initialize.
+        """
+        self.f.init_machine(machine, config)
+
+    def updates(
+        self, t: celestial.types.timestamp_s, messages: typing.Sequence[bytes]
+    ) -> None:
+        """
+        Write the serialized update requests of a timestep.
+
+        :param t: The timestamp of the updates.
+        :param messages: The serialized StateUpdateRequest messages.
+        :raises ValueError: If updates of this or a later timestep were
+            already written.
+        """
+        if len(self.index) > 0 and t <= self.index[-1][0]:
+            raise ValueError(
+                f"Updates must be serialized in order of time, got {t} after {self.index[-1][0]}"
+            )
+
+        offset = self.f.tell()
+
+        for m in messages:
+            self.f.write(struct.pack(_MESSAGE_FMT, len(m)))
+            self.f.write(m)
+
+        self.index.append((t, offset, self.f.tell() - offset, len(messages)))
+
+    def persist(self) -> None:
+        """
+        Write the initializations and the index and close the file.
+        """
+        self.f.close(np.array(self.index, dtype=_INDEX_DTYPE))
+
+
+class UpdateDeserializer:
+    """
+    The UpdateDeserializer restores the configuration, machine
+    initializations, and pre-encoded update requests from a file created by
+    the UpdateSerializer. The file is memory-mapped, and the update requests
+    of a timestep are found with a single lookup in the index.
+    """
+
+    def __init__(self, filename: str):
+        """
+        Initialize the deserializer.
+
+        :param filename: The filename of the updates file to deserialize from.
+
+        :raises ValueError: If the file is not a valid updates file.
+        """
+        self.filename = filename
+
+        self.f = celestial.format_util.IndexedFileReader(
+            self.filename, _MAGIC, _VERSION, _INDEX_DTYPE
+        )
+
+    def config(self) -> celestial.config.Config:
+        """
+        Restore the Celestial configuration from the header of the file.
+
+        :returns: The restored configuration.
+        """
+        return self.f.config()
+
+    def init_machines(
+        self,
+    ) -> typing.List[
+        typing.Tuple[celestial.types.MachineID_dtype, celestial.config.MachineConfig]
+    ]:
+        """
+        Restore the machine initializations from the file.
+
+        :returns: A list of the restored machine initializations.
+        """
+        return self.f.init_machines()
+
+    def updates(self, t: celestial.types.timestamp_s) -> typing.List[bytes]:
+        """
+        Restore the serialized update requests for a given timestep.
+
+        :param t: The timestep to restore the update requests for.
+        :returns: A list of serialized StateUpdateRequest messages that can be
+            sent to the hosts as they are.
+        """
+        entry = self.f.entry(t)
+
+        if entry is None:
+            return []
+
+        messages = []
+        offset = int(entry["offset"])
+        message_header_size = struct.calcsize(_MESSAGE_FMT)
+
+        for _ in range(int(entry["count"])):
+            (length,) = struct.unpack_from(_MESSAGE_FMT, self.f.mm, offset)
+            offset += message_header_size
+            messages.append(self.f.mm[offset : offset + length])
+            offset += length
+
+        return messages
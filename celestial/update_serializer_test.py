@@ -0,0 +1,202 @@
+#
+# This file is part of Celestial (https://github.com/OpenFogStack/celestial).
+# Copyright (c) 2024 Tobias Pfandzelter, The OpenFogStack Team.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import concurrent.futures
+import os
+import tempfile
+import typing
+
+import grpc
+import numpy as np
+
+import celestial.format_test
+import celestial.host
+import celestial.proto_util
+import celestial.proto_util_test
+import celestial.trace_serializer_test
+import celestial.update_serializer
+import proto.celestial.celestial_pb2
+import proto.celestial.celestial_pb2_grpc
+
+# the diffs of each timestep, including one with more link diffs than fit
+# into a single update request
+STEPS: typing.Dict[int, typing.Tuple[np.ndarray, np.ndarray]] = {  # type: ignore
+    t: (machines, links)
+    for t, (links, machines) in celestial.trace_serializer_test.STEPS.items()
+}
+STEPS[7] = (
+    celestial.trace_serializer_test.make_machine_diffs(3, 7),
+    celestial.trace_serializer_test.make_link_diffs(
+        celestial.proto_util.MAX_DIFF_UPDATE_SIZE + 1, 7
+    ),
+)
+
+
+def write_updates(filename: str) -> None:
+    s = celestial.update_serializer.UpdateSerializer(
+        celestial.trace_serializer_test.make_config(), filename
+    )
+
+    for m, c in celestial.format_test.INITS:
+        s.init_machine(m, c)
+
+    # as in encode.py
+    for t in range(9):
+        machines, links = STEPS.get(
+            t,
+            (
+                celestial.trace_serializer_test.make_machine_diffs(0, t),
+                celestial.trace_serializer_test.make_link_diffs(0, t),
+            ),
+        )
+
+        s.updates(
+            t,
+            [
+                r.SerializeToString()
+                for r in celestial.proto_util.make_packed_update_request_iter_from_arrays(
+                    machines, links
+                )
+            ],
+        )
+
+    s.persist()
+
+
+class _UpdateServicer(proto.celestial.celestial_pb2_grpc.CelestialServicer):
+    """
+    A host that keeps the update requests it receives.
+    """
+
+    def __init__(self) -> None:
+        self.updates: typing.List[
+            typing.List[proto.celestial.celestial_pb2.StateUpdateRequest]
+        ] = []
+
+    def Update(
+        self,
+        request_iterator: typing.Iterator[
+            proto.celestial.celestial_pb2.StateUpdateRequest
+        ],
+        context: grpc.ServicerContext,
+    ) -> proto.celestial.celestial_pb2.Empty:
+        self.updates.append(list(request_iterator))
+        return proto.celestial.celestial_pb2.Empty()
+
+
+def test_updates_round_trip() -> None:
+    config = celestial.trace_serializer_test.make_config()
+
+    with tempfile.TemporaryDirectory() as d:
+        filename = os.path.join(d, f"test{celestial.update_serializer.FILE_EXTENSION}")
+
+        write_updates(filename)
+
+        r = celestial.update_serializer.UpdateDeserializer(filename)
+
+        assert r.config().duration == config.duration
+        assert len(r.config().shells) == len(config.shells)
+        celestial.format_test.check_inits(r.init_machines())
+
+        # timesteps without diffs still have a machine diff request
+        for t in range(9):
+            machines, links = STEPS.get(
+                t,
+                (
+                    celestial.trace_serializer_test.make_machine_diffs(0, t),
+                    celestial.trace_serializer_test.make_link_diffs(0, t),
+                ),
+            )
+
+            celestial.proto_util_test.check_update_requests(
+                [
+                    proto.celestial.celestial_pb2.StateUpdateRequest.FromString(m)
+                    for m in r.updates(t)
+                ],
+                machines,
+                links,
+            )
+
+        # timesteps that were never written have no updates
+        assert r.updates(9) == []
+
+
+def test_updates_replay() -> None:
+    # only Update is needed
+    servicer = _UpdateServicer()  # type: ignore
+
+    server = grpc.server(concurrent.futures.ThreadPoolExecutor(max_workers=1))
+    proto.celestial.celestial_pb2_grpc.add_CelestialServicer_to_server(servicer, server)
+    port = server.add_insecure_port("localhost:0")
+    server.start()
+
+    try:
+        with tempfile.TemporaryDirectory() as d:
+            filename = os.path.join(
+                d, f"test{celestial.update_serializer.FILE_EXTENSION}"
+            )
+
+            write_updates(filename)
+
+            r = celestial.update_serializer.UpdateDeserializer(filename)
+            h = celestial.host.Host(0, f"localhost:{port}")
+
+            # the stored bytes are sent as they are, as by celestial.py
+            for t in STEPS:
+                h.update_raw(iter(r.updates(t)))
+
+            assert len(servicer.updates) == len(STEPS)
+
+            for received, (machines, links) in zip(servicer.updates, STEPS.values()):
+                celestial.proto_util_test.check_update_requests(
+                    received, machines, links
+                )
+    finally:
+        server.stop(None)
+
+
+def test_updates_order() -> None:
+    with tempfile.TemporaryDirectory() as d:
+        filename = os.path.join(d, f"test{celestial.update_serializer.FILE_EXTENSION}")
+
+        s = celestial.update_serializer.UpdateSerializer(
+            celestial.trace_serializer_test.make_config(), filename
+        )
+
+        s.updates(1, [b"a"])
+
+        for t in (0, 1):
+            try:
+                s.updates(t, [b"b"])
+            except ValueError:
+                pass
+            else:
+                raise AssertionError("updates out of order must raise ValueError")
+
+        s.persist()
+
+        assert celestial.update_serializer.UpdateDeserializer(filename).updates(1) == [
+            b"a"
+        ]
+
+
+if __name__ == "__main__":
+    test_updates_round_trip()
+    test_updates_replay()
+    test_updates_order()
+
+    print("Test passed successfully!")
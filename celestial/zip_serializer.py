@@ -18,14 +18,16 @@
 """Serialization of Celestial initialization and updates to a custom .zip format file."""
 
 import os
-import pickle
 import shutil
 import subprocess
-import struct
 import typing
+import zipfile
+
+import numpy as np
 
-import celestial.types
 import celestial.config
+import celestial.format_util
+import celestial.types
 
 _CONFIG_FILE = "c"
 _INIT_FILE = "i"
@@ -34,222 +36,9 @@ _DIFF_MACHINE_FILE_PREFIX = "m"
 
 _MAX_WRITERS = 100
 
-
-def _config_to_bytes(config: celestial.config.Config) -> bytes:
-    """
-    Serialize a Celestial configuration to bytes.
-
-    :param config: The configuration to serialize.
-    :returns: The serialized configuration.
-    """
-    return pickle.dumps(config)
-
-
-def _config_from_bytes(b: bytes) -> celestial.config.Config:
-    """
-    Restore a Celestial configuration from bytes.
-
-    :param b: The serialized configuration.
-    :returns: The restored configuration.
-    :raises TypeError: If the serialized configuration is not a valid
-        configuration.
-    """
-    c = pickle.loads(b)
-
-    if not isinstance(c, celestial.config.Config):
-        raise TypeError(f"Invalid config: {c}")
-
-    return c
-
-
-# INIT commands include too many strings, hence we use CSV
-_INIT_HEAD = "machine_id_group,machine_id_id,machine_id_name,config_vcpu_count,config_mem_size_mib,config_disk_size,config_kernel,config_rootfs,config_boot_parameters"
-_LIST_SEP = "|"
-
-
-def _init_to_str(
-    machine: celestial.types.MachineID_dtype, config: celestial.config.MachineConfig
-) -> str:
-    """
-    Serialize the initialization of a Celestial emulation VM to a string.
-    We serialize to CSV instead of a binary format as we may have to deal
-    with strings (mostly for VM parameters such as boot parameters, kernel
-    path, and image path). This is not optimal but good enough, as we only
-    have to read the initialization file once.
-
-    :param machine: The machine ID of the machine to initialize.
-    :param config: The configuration of the machine to initialize.
-    :returns: The serialized initialization.
-    """
-    b = _LIST_SEP.join(config.boot_parameters)
-
-    return f"{machine[0]},{machine[1]},{machine[2]},{config.vcpu_count},{config.mem_size_mib},{config.disk_size},{config.kernel},{config.rootfs},{b}"
-
-
-def _init_from_str(
-    s: str,
-) -> typing.Tuple[celestial.types.MachineID_dtype, celestial.config.MachineConfig]:
-    """
-    Restore the machine initialization parameters from a CSV line.
-
-    :param s: The serialized initialization.
-    :returns: The machine ID and its configuration.
-    :raises ValueError: If the serialized initialization is not a valid
-        initialization.
-    """
-
-    (
-        group,
-        id,
-        name,
-        vcpu_count,
-        mem_size_mib,
-        disk_size,
-        kernel,
-        rootfs,
-        boot_parameters,
-    ) = s.split(",")
-    try:
-        return (
-            celestial.types.MachineID(int(group), int(id), name),
-            celestial.config.MachineConfig(
-                int(vcpu_count),
-                int(mem_size_mib),
-                int(disk_size),
-                kernel,
-                rootfs,
-                boot_parameters.split(_LIST_SEP),
-            ),
-        )
-    except ValueError as e:
-        raise ValueError(f"Invalid init string: {s}: {e}")
-
-
-# struct format strings
-# https://docs.python.org/3/library/struct.html
-#  we always force little-endian byte order
-# diff_link
-# (source_machine_id_group:uint8/B,source_machine_id_id:uint16/H,target_machine_id_group:uint8/B,target_machine_id_id:uint16/H,link_latency:uint32/I,link_bandwidth:uint32/I,link_blocked:bool/?,link_next_hop_machine_id_group:uint8/B,link_next_hop_machine_id_id:uint16/H,link_prev_hop_machine_id_group:uint8/B,link_prev_hop_machine_id_id:uint16/H)
-_DIFF_LINK_FMT = "<BHBHII?BHBH"
-# diff_machine
-# (machine_id_group:uint8/B,machine_id_id:uint16/H,vm_state:uint8/B)
-_DIFF_MACHINE_FMT = "<BHB"
-
-
-def _diff_link_to_bytes(
-    source: celestial.types.MachineID_dtype,
-    target: celestial.types.MachineID_dtype,
-    link: celestial.types.Link_dtype,
-) -> bytes:
-    """
-    Serialize a link diff to bytes using the struct format string.
-
-    :param source: The source machine ID of the link.
-    :param target: The target machine ID of the link.
-    :param link: The link to serialize.
-    :returns: The serialized link as bytes.
-    """
-    return struct.pack(
-        _DIFF_LINK_FMT,
-        celestial.types.MachineID_group(source),
-        celestial.types.MachineID_id(source),
-        celestial.types.MachineID_group(target),
-        celestial.types.MachineID_id(target),
-        celestial.types.Link_latency_us(link),
-        celestial.types.Link_bandwidth_kbits(link),
-        celestial.types.Link_blocked(link),
-        celestial.types.MachineID_group(celestial.types.Link_next_hop(link)),
-        celestial.types.MachineID_id(celestial.types.Link_next_hop(link)),
-        celestial.types.MachineID_group(celestial.types.Link_prev_hop(link)),
-        celestial.types.MachineID_id(celestial.types.Link_prev_hop(link)),
-    )
-
-
-def _diff_link_from_bytes(
-    b: bytes,
-) -> typing.Iterator[
-    typing.Tuple[
-        celestial.types.MachineID_dtype,
-        celestial.types.MachineID_dtype,
-        celestial.types.Link_dtype,
-    ]
-]:
-    """
-    Restore link diffs from bytes using the struct format string.
-
-    :param b: Bytes of all serialized links in a timestep.
-    :returns: The restored links as an iterator.
-    """
-
-    # conveniently, we don't have to type-cast everything
-    # let's hope our types never change!
-    return (
-        (
-            (source_machine_id_group, source_machine_id_id, ""),
-            (target_machine_id_group, target_machine_id_id, ""),
-            (
-                link_latency_us,
-                link_bandwidth_kbits,
-                link_blocked,
-                (link_next_hop_machine_id_group, link_next_hop_machine_id_id, ""),
-                (link_prev_hop_machine_id_group, link_prev_hop_machine_id_id, ""),
-            ),
-        )
-        for (
-            source_machine_id_group,
-            source_machine_id_id,
-            target_machine_id_group,
-            target_machine_id_id,
-            link_latency_us,
-            link_bandwidth_kbits,
-            link_blocked,
-            link_next_hop_machine_id_group,
-            link_next_hop_machine_id_id,
-            link_prev_hop_machine_id_group,
-            link_prev_hop_machine_id_id,
-        ) in struct.iter_unpack(_DIFF_LINK_FMT, b)
-    )
-
-
-def _diff_machine_to_bytes(
-    machine: celestial.types.MachineID_dtype, s: celestial.types.VMState
-) -> bytes:
-    """
-    Serialize a machine diff to bytes using the struct format string.
-
-    :param machine: The machine ID of the machine to serialize.
-    :param s: The VM state of the machine to serialize.
-    :returns: The serialized machine diff as bytes.
-    """
-    return struct.pack(
-        _DIFF_MACHINE_FMT,
-        celestial.types.MachineID_group(machine),
-        celestial.types.MachineID_id(machine),
-        s.value,
-    )
-
-
-def _diff_machine_from_bytes(
-    b: bytes,
-) -> typing.Iterator[
-    typing.Tuple[celestial.types.MachineID_dtype, celestial.types.VMState]
-]:
-    """
-    Restore machine diffs from bytes using the struct format string.
-
-    :param b: Bytes of all serialized machines in a timestep.
-    :returns: The restored machines as an iterator.
-    """
-
-    return (
-        (
-            celestial.types.MachineID(machine_id_group, machine_id_id),
-            celestial.types.VMState(vm_state),
-        )
-        for machine_id_group, machine_id_id, vm_state in struct.iter_unpack(
-            _DIFF_MACHINE_FMT, b
-        )
-    )
+# members of streamed archives all get the same timestamp, so that the same
+# updates always result in the same archive
+_MEMBER_DATE_TIME = (1980, 1, 1, 0, 0, 0)
 
 
 class ZipSerializer:
@@ -264,10 +53,20 @@ class ZipSerializer:
     Note that the resulting .zip file is not meant for manual inspection
     but should be used with the ZipDeserializer to restore the initialization
     and updates.
+
+    By default, all updates are written to a temporary directory first and
+    compressed into a .zip file at the end. In streaming mode, the updates of
+    each timestep are instead compressed and added to the .zip file as soon
+    as the next timestep starts. This needs no temporary directory, but
+    updates must be serialized in order of time, and the .zip file is only
+    complete once persist has been called.
     """
 
     def __init__(
-        self, config: celestial.config.Config, output_file: typing.Optional[str] = None
+        self,
+        config: celestial.config.Config,
+        output_file: typing.Optional[str] = None,
+        streaming: bool = False,
     ):
         """
         Initialize the serializer.
@@ -275,6 +74,10 @@ class ZipSerializer:
         :param config: The Celestial configuration.
         :param output_file: The output file to write to. If None, a filename
             will be generated based on a hash of the configuration.
+        :param streaming: Whether to add updates to the .zip file while
+            serializing instead of using a temporary directory. Updates must
+            then be serialized in order of time, otherwise a ValueError is
+            raised.
 
         :raises FileExistsError: If `mktemp` fails and the temporary directory
             `./tmp` already exists.
@@ -286,6 +89,21 @@ class ZipSerializer:
             if self.filename.endswith(".zip"):
                 self.filename = self.filename[:-4]
 
+        self.streaming = streaming
+
+        if self.streaming:
+            self.zip_file = zipfile.ZipFile(
+                f"{self.filename}.zip", "w", compression=zipfile.ZIP_DEFLATED
+            )
+            self._write_member(_CONFIG_FILE, celestial.format_util.config_to_bytes(config))
+
+            self.inits: typing.List[str] = []
+
+            self.current_t: typing.Optional[celestial.types.timestamp_s] = None
+            self.links: typing.List[bytes] = []
+            self.machines: typing.List[bytes] = []
+            return
+
         # create a temporary directory
         # check if the `mktemp` command is available
         self.tmp_dir = "./.tmp"
@@ -308,10 +126,66 @@ class ZipSerializer:
 
         # write the config
         with open(os.path.join(self.write_dir, _CONFIG_FILE), "wb") as f:
-            f.write(_config_to_bytes(config))
+            f.write(celestial.format_util.config_to_bytes(config))
 
         self.writers: typing.Dict[str, typing.IO[bytes]] = {}
 
+    def _write_member(self, n: str, b: bytes) -> None:
+        """
+        Compress a file and add it to the .zip file when streaming.
+
+        :param n: The filename of the file.
+        :param b: The contents of the file.
+        """
+        info = zipfile.ZipInfo(n, date_time=_MEMBER_DATE_TIME)
+        info.compress_type = zipfile.ZIP_DEFLATED
+        info.external_attr = 0o644 << 16
+
+        self.zip_file.writestr(info, b)
+
+    def _flush(self) -> None:
+        """
+        Add the updates of the current timestep to the .zip file when
+        streaming.
+        """
+        if self.current_t is None:
+            return
+
+        if len(self.links) > 0:
+            self._write_member(
+                f"{_DIFF_LINK_FILE_PREFIX}{self.current_t}", b"".join(self.links)
+            )
+
+        if len(self.machines) > 0:
+            self._write_member(
+                f"{_DIFF_MACHINE_FILE_PREFIX}{self.current_t}",
+                b"".join(self.machines),
+            )
+
+        self.current_t = None
+        self.links = []
+        self.machines = []
+
+    def _start_timestep(self, t: celestial.types.timestamp_s) -> None:
+        """
+        Make t the current timestep when streaming, adding the updates of the
+        previous timestep to the .zip file if necessary.
+
+        :param t: The timestamp of the next update.
+        :raises ValueError: If updates of a later timestep were already
+            added to the .zip file.
+        """
+        if t == self.current_t:
+            return
+
+        if self.current_t is not None and t < self.current_t:
+            raise ValueError(
+                f"Updates must be serialized in order of time, got {t} after {self.current_t}"
+            )
+
+        self._flush()
+        self.current_t = t
+
     def _get_writer(self, n: str) -> typing.IO[bytes]:
         """
         Get the writer for a file.
@@ -343,8 +217,12 @@ class ZipSerializer:
         :param config: The configuration of the machine to initialize.
         """
 
+        if self.streaming:
+            self.inits.append(celestial.format_util.init_to_str(machine, config))
+            return
+
         with open(os.path.join(self.write_dir, _INIT_FILE), "a") as f:
-            f.write(f"{_init_to_str(machine, config)}\n")
+            f.write(f"{celestial.format_util.init_to_str(machine, config)}\n")
 
     def diff_link(
         self,
@@ -362,10 +240,40 @@ class ZipSerializer:
         :param link: The link to serialize.
         """
 
+        if self.streaming:
+            self._start_timestep(t)
+            self.links.append(celestial.format_util.diff_link_to_bytes(source, target, link))
+            return
+
         self._get_writer(f"{_DIFF_LINK_FILE_PREFIX}{t}").write(
-            _diff_link_to_bytes(source, target, link)
+            celestial.format_util.diff_link_to_bytes(source, target, link)
         )
 
+    def diff_links_batch(
+        self,
+        t: celestial.types.timestamp_s,
+        links: np.ndarray,  # type: ignore
+    ) -> None:
+        """
+        Write a batch of link diffs to the link diff file in one go.
+
+        :param t: The timestamp of the link diffs.
+        :param links: A structured array of links with dtype
+            celestial.types.LINK_DIFF_DTYPE.
+        """
+        # don't create a file if there is nothing to write
+        if len(links) == 0:
+            return
+
+        b = links.astype(celestial.types.LINK_DIFF_DTYPE, copy=False).tobytes()
+
+        if self.streaming:
+            self._start_timestep(t)
+            self.links.append(b)
+            return
+
+        self._get_writer(f"{_DIFF_LINK_FILE_PREFIX}{t}").write(b)
+
     def diff_machine(
         self,
         t: celestial.types.timestamp_s,
@@ -379,16 +287,57 @@ class ZipSerializer:
         :param machine: The machine ID of the machine to serialize.
         :param s: The VM state of the machine to serialize.
         """
+        if self.streaming:
+            self._start_timestep(t)
+            self.machines.append(celestial.format_util.diff_machine_to_bytes(machine, s))
+            return
+
         self._get_writer(f"{_DIFF_MACHINE_FILE_PREFIX}{t}").write(
-            _diff_machine_to_bytes(machine, s)
+            celestial.format_util.diff_machine_to_bytes(machine, s)
         )
 
+    def diff_machines_batch(
+        self,
+        t: celestial.types.timestamp_s,
+        machines: np.ndarray,  # type: ignore
+    ) -> None:
+        """
+        Write a batch of machine diffs to the machine diff file in one go.
+
+        :param t: The timestamp of the machine diffs.
+        :param machines: A structured array of machine states with dtype
+            celestial.types.MACHINE_DIFF_DTYPE.
+        """
+        # don't create a file if there is nothing to write
+        if len(machines) == 0:
+            return
+
+        b = machines.astype(celestial.types.MACHINE_DIFF_DTYPE, copy=False).tobytes()
+
+        if self.streaming:
+            self._start_timestep(t)
+            self.machines.append(b)
+            return
+
+        self._get_writer(f"{_DIFF_MACHINE_FILE_PREFIX}{t}").write(b)
+
     def persist(self) -> None:
         """
         Persist the serialized initialization and updates to a .zip file.
 
         :raises FileExistsError: If the output file already exists.
         """
+        if self.streaming:
+            self._flush()
+
+            if len(self.inits) > 0:
+                self._write_member(
+                    _INIT_FILE, celestial.format_util.inits_to_bytes(self.inits)
+                )
+
+            self.zip_file.close()
+            return
+
         # close all writers
         for w in self.writers.values():
             w.close()
@@ -406,18 +355,31 @@ class ZipDeserializer:
     The ZipDeserializer implements the Deserializer interface and deserializes
     Celestial initialization and updates from a custom .zip format file created
     by the ZipSerializer.
+
+    By default, files are read from the .zip file on demand, using its central
+    directory as an index, so startup time does not depend on the length of
+    the run. Alternatively, the .zip file can be extracted to a temporary
+    directory first.
     """
 
-    def __init__(self, filename: str):
+    def __init__(self, filename: str, extract: bool = False):
         """
         Initialize the deserializer.
 
         :param filename: The filename of the .zip file to deserialize from.
+        :param extract: Whether to extract the .zip file to a temporary
+            directory instead of reading from it directly.
 
         :raises FileExistsError: If `mktemp` fails and the temporary directory
             `./tmp` already exists.
         """
         self.filename = filename
+        self.extract = extract
+
+        if not self.extract:
+            self.zip_file = zipfile.ZipFile(self.filename, "r")
+            self.members = set(self.zip_file.namelist())
+            return
 
         # create a temporary directory
         # check if the `mktemp` command is available
@@ -439,16 +401,41 @@ class ZipDeserializer:
         # unzip the file
         shutil.unpack_archive(self.filename, self.tmp_dir)
 
+    def _read(self, n: str) -> typing.Optional[bytes]:
+        """
+        Read a file from the .zip file or the extracted files.
+
+        :param n: The filename of the file to read.
+        :returns: The contents of the file or None if there is no such file.
+        """
+        if not self.extract:
+            if n not in self.members:
+                return None
+
+            return self.zip_file.read(n)
+
+        p = os.path.join(self.tmp_dir, n)
+
+        if not os.path.exists(p):
+            return None
+
+        with open(p, "rb") as f:
+            return f.read()
+
     def config(self) -> celestial.config.Config:
         """
         Restore the Celestial configuration from the configuration file
         copied to the .zip file.
 
         :returns: The restored configuration.
+        :raises FileNotFoundError: If the .zip file has no configuration.
         """
-        p = os.path.join(self.tmp_dir, _CONFIG_FILE)
-        with open(p, "rb") as f:
-            return _config_from_bytes(f.read())
+        b = self._read(_CONFIG_FILE)
+
+        if b is None:
+            raise FileNotFoundError(f"No configuration in {self.filename}")
+
+        return celestial.format_util.config_from_bytes(b)
 
     def init_machines(
         self,
@@ -461,11 +448,12 @@ class ZipDeserializer:
 
         :returns: A list of the restored machine initializations.
         """
-        p = os.path.join(self.tmp_dir, _INIT_FILE)
-        if not os.path.exists(p):
+        b = self._read(_INIT_FILE)
+
+        if b is None:
             return []
-        with open(p, "r") as f:
-            return [_init_from_str(line) for line in f.readlines()]
+
+        return celestial.format_util.inits_from_bytes(b)
 
     def diff_links(
         self, t: celestial.types.timestamp_s
@@ -484,18 +472,34 @@ class ZipDeserializer:
         :returns: An iterator of the restored link diffs.
         """
 
-        p = os.path.join(self.tmp_dir, f"{_DIFF_LINK_FILE_PREFIX}{t}")
+        b = self._read(f"{_DIFF_LINK_FILE_PREFIX}{t}")
 
-        if not os.path.exists(p):
+        if b is None:
             yield from ()  # return empty iterator
             return
 
-        with open(p, "rb") as f:
-            for ld in _diff_link_from_bytes(f.read()):
-                yield ld
+        for ld in celestial.format_util.diff_link_from_bytes(b):
+            yield ld
 
         return
 
+    def diff_links_array(self, t: celestial.types.timestamp_s) -> np.ndarray:  # type: ignore
+        """
+        Restore the link diffs for a given timestep as a structured array.
+        The array is a read-only view of the file contents, no objects are
+        created for individual links.
+
+        :param t: The timestep to restore the link diffs for.
+        :returns: An array of link diffs with dtype
+            celestial.types.LINK_DIFF_DTYPE.
+        """
+        b = self._read(f"{_DIFF_LINK_FILE_PREFIX}{t}")
+
+        if b is None:
+            return np.empty(0, dtype=celestial.types.LINK_DIFF_DTYPE)
+
+        return np.frombuffer(b, dtype=celestial.types.LINK_DIFF_DTYPE)
+
     def diff_machines(
         self, t: celestial.types.timestamp_s
     ) -> typing.Iterator[
@@ -508,14 +512,29 @@ class ZipDeserializer:
         :param t: The timestep to restore the machine diffs for.
         :returns: An iterator of the restored machine diffs.
         """
-        p = os.path.join(self.tmp_dir, f"{_DIFF_MACHINE_FILE_PREFIX}{t}")
+        b = self._read(f"{_DIFF_MACHINE_FILE_PREFIX}{t}")
 
-        if not os.path.exists(p):
+        if b is None:
             yield from ()  # return empty iterator
             return
 
-        with open(p, "rb") as f:
-            for md in _diff_machine_from_bytes(f.read()):
-                yield md
+        for md in celestial.format_util.diff_machine_from_bytes(b):
+            yield md
 
         return
+
+    def diff_machines_array(self, t: celestial.types.timestamp_s) -> np.ndarray:  # type: ignore
+        """
+        Restore the machine diffs for a given timestep as a structured array.
+        The array is a read-only view of the file contents.
+
+        :param t: The timestep to restore the machine diffs for.
+        :returns: An array of machine diffs with dtype
+            celestial.types.MACHINE_DIFF_DTYPE.
+        """
+        b = self._read(f"{_DIFF_MACHINE_FILE_PREFIX}{t}")
+
+        if b is None:
+            return np.empty(0, dtype=celestial.types.MACHINE_DIFF_DTYPE)
+
+        return np.frombuffer(b, dtype=celestial.types.MACHINE_DIFF_DTYPE)
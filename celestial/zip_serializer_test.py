@@ -0,0 +1,87 @@
+#
+# This file is part of Celestial (https://github.com/OpenFogStack/celestial).
+# Copyright (c) 2024 Tobias Pfandzelter, The OpenFogStack Team.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import os
+import tempfile
+import zipfile
+
+import celestial.trace_serializer_test
+import celestial.zip_serializer
+
+
+def test_zip_round_trip() -> None:
+    config = celestial.trace_serializer_test.make_config()
+
+    for streaming in (False, True):
+        with tempfile.TemporaryDirectory() as d:
+            filename = os.path.join(d, "test.zip")
+
+            celestial.trace_serializer_test.write_diffs(
+                celestial.zip_serializer.ZipSerializer(
+                    config, filename, streaming=streaming
+                )
+            )
+
+            for extract in (False, True):
+                celestial.trace_serializer_test.check_diffs(
+                    celestial.zip_serializer.ZipDeserializer(filename, extract=extract),
+                    config,
+                )
+
+
+def test_zip_streaming_order() -> None:
+    config = celestial.trace_serializer_test.make_config()
+
+    with tempfile.TemporaryDirectory() as d:
+        filename = os.path.join(d, "test.zip")
+
+        s = celestial.zip_serializer.ZipSerializer(config, filename, streaming=True)
+
+        s.diff_machines_batch(
+            1, celestial.trace_serializer_test.make_machine_diffs(2, 1)
+        )
+        s.diff_machines_batch(
+            2, celestial.trace_serializer_test.make_machine_diffs(2, 2)
+        )
+
+        try:
+            s.diff_machines_batch(
+                1, celestial.trace_serializer_test.make_machine_diffs(2, 1)
+            )
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("diffs out of order must raise ValueError")
+
+        # the archive can only be read once it is complete
+        try:
+            zipfile.ZipFile(filename, "r")
+        except zipfile.BadZipFile:
+            pass
+        else:
+            raise AssertionError("incomplete archive must not be readable")
+
+        s.persist()
+
+        zipfile.ZipFile(filename, "r").close()
+
+
+if __name__ == "__main__":
+    test_zip_round_trip()
+    test_zip_streaming_order()
+
+    print("Test passed successfully!")
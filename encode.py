@@ -0,0 +1,96 @@
+#
+# This file is part of Celestial (https://github.com/OpenFogStack/celestial).
+# Copyright (c) 2024 Tobias Pfandzelter, The OpenFogStack Team.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Encode pre-computes the update requests that celestial.py sends to the hosts
+during an emulation run. It takes a .zip or .trace file generated by satgen.py
+as an input and generates a .updates file that contains the configuration,
+machine initializations, and the serialized update requests of each timestep.
+
+celestial.py can run an emulation directly from the .updates file. It then
+sends the update requests to the hosts as they are, without constructing
+any messages during the emulation run.
+
+Usage
+-----
+
+    python3 encode.py [celestial.zip] [output-file (optional)]
+
+The output will be in the specified path or in the input path with a .updates
+extension if no output path is specified.
+"""
+
+import os
+import sys
+import typing
+
+import tqdm
+
+import celestial.proto_util
+import celestial.trace_serializer
+import celestial.update_serializer
+import celestial.zip_serializer
+
+if __name__ == "__main__":
+    if len(sys.argv) > 3 or len(sys.argv) < 2:
+        exit("Usage: python3 encode.py [celestial.zip] [output-file (optional)]")
+
+    input_file = sys.argv[1]
+
+    if len(sys.argv) == 3:
+        output_file = sys.argv[2]
+    else:
+        output_file = (
+            os.path.splitext(input_file)[0] + celestial.update_serializer.FILE_EXTENSION
+        )
+
+    deserializer: typing.Union[
+        celestial.zip_serializer.ZipDeserializer,
+        celestial.trace_serializer.TraceDeserializer,
+    ]
+    if input_file.endswith(celestial.trace_serializer.FILE_EXTENSION):
+        deserializer = celestial.trace_serializer.TraceDeserializer(input_file)
+    else:
+        deserializer = celestial.zip_serializer.ZipDeserializer(input_file)
+
+    config = deserializer.config()
+
+    serializer = celestial.update_serializer.UpdateSerializer(config, output_file)
+
+    for m_id, m_config in deserializer.init_machines():
+        serializer.init_machine(m_id, m_config)
+
+    # the same timesteps that celestial.py sends updates for
+    timesteps = range(
+        config.offset, config.offset + config.duration + 1, config.resolution
+    )
+
+    for t in tqdm.tqdm(timesteps):
+        serializer.updates(
+            t,
+            [
+                r.SerializeToString()
+                for r in celestial.proto_util.make_packed_update_request_iter_from_arrays(
+                    deserializer.diff_machines_array(t),
+                    deserializer.diff_links_array(t),
+                )
+            ],
+        )
+
+    serializer.persist()
+
+    print(f"Output written to {serializer.filename}")
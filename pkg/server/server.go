@@ -185,53 +185,41 @@ func (s *Server) Update(stream celestial.Celestial_UpdateServer) error {
 					Id:    n.Source.Id,
 				}
 
-				if _, ok := ns[a]; !ok {
-					ns[a] = make(map[orchestrator.MachineID]*orchestrator.Link)
-				}
-
 				b := orchestrator.MachineID{
 					Group: uint8(n.Target.Group),
 					Id:    n.Target.Id,
 				}
 
-				if _, ok := ns[b]; !ok {
-					ns[b] = make(map[orchestrator.MachineID]*orchestrator.Link)
-				}
-
 				if n.Blocked {
-					ns[a][b] = &orchestrator.Link{
-						Blocked: true,
-					}
-					ns[b][a] = &orchestrator.Link{
-						Blocked: true,
-					}
-
+					setLink(ns, a, b, true, 0, 0, orchestrator.MachineID{}, orchestrator.MachineID{})
 					continue
 				}
 
-				ns[a][b] = &orchestrator.Link{
-					LatencyUs:     n.LatencyUs,
-					BandwidthKbps: n.BandwidthKbps,
-					Blocked:       false,
-					Next: orchestrator.MachineID{
+				setLink(ns, a, b, false, n.LatencyUs, n.BandwidthKbps,
+					orchestrator.MachineID{
 						Group: uint8(n.Next.Group),
 						Id:    n.Next.Id,
 					},
-				}
-				ns[b][a] = &orchestrator.Link{
-					LatencyUs:     n.LatencyUs,
-					BandwidthKbps: n.BandwidthKbps,
-					Blocked:       false,
-					Next: orchestrator.MachineID{
+					orchestrator.MachineID{
 						Group: uint8(n.Prev.Group),
 						Id:    n.Prev.Id,
 					},
-				}
-
+				)
 			}
 			log.Debugf("parse update time: %v", time.Since(parseUpdateStart))
 		}
 
+		// packed network diffs have one column per field
+		if p := update.PackedNetworkDiffs; p != nil {
+			parseUpdateStart := time.Now()
+
+			if err := setPackedLinks(ns, p); err != nil {
+				return err
+			}
+
+			log.Debugf("parse packed update time: %v", time.Since(parseUpdateStart))
+		}
+
 		if update.MachineDiffs == nil {
 			continue
 		}
@@ -264,3 +252,76 @@ func (s *Server) Update(stream celestial.Celestial_UpdateServer) error {
 
 	return stream.SendAndClose(&celestial.Empty{})
 }
+
+// setPackedLinks sets the links of packed network diffs, where the i-th entry
+// of each column belongs to the i-th diff. Returns an error if the columns have
+// different lengths.
+func setPackedLinks(ns orchestrator.NetworkState, p *celestial.StateUpdateRequest_PackedNetworkDiffs) error {
+	n := len(p.SourceGroup)
+	if len(p.Blocked) != n || len(p.SourceId) != n || len(p.TargetGroup) != n || len(p.TargetId) != n ||
+		len(p.LatencyUs) != n || len(p.BandwidthKbps) != n || len(p.NextGroup) != n || len(p.NextId) != n ||
+		len(p.PrevGroup) != n || len(p.PrevId) != n {
+		return errors.Errorf("packed network diffs have columns of different lengths")
+	}
+
+	for i := 0; i < n; i++ {
+		setLink(ns,
+			orchestrator.MachineID{
+				Group: uint8(p.SourceGroup[i]),
+				Id:    p.SourceId[i],
+			},
+			orchestrator.MachineID{
+				Group: uint8(p.TargetGroup[i]),
+				Id:    p.TargetId[i],
+			},
+			p.Blocked[i], p.LatencyUs[i], p.BandwidthKbps[i],
+			orchestrator.MachineID{
+				Group: uint8(p.NextGroup[i]),
+				Id:    p.NextId[i],
+			},
+			orchestrator.MachineID{
+				Group: uint8(p.PrevGroup[i]),
+				Id:    p.PrevId[i],
+			},
+		)
+	}
+
+	return nil
+}
+
+// setLink sets the link between machines a and b in both directions. next is
+// the next hop from a towards b, prev is the next hop from b towards a. Both
+// are ignored if the link is blocked.
+func setLink(ns orchestrator.NetworkState, a, b orchestrator.MachineID, blocked bool, latencyUs uint32, bandwidthKbps uint64, next, prev orchestrator.MachineID) {
+	if _, ok := ns[a]; !ok {
+		ns[a] = make(map[orchestrator.MachineID]*orchestrator.Link)
+	}
+
+	if _, ok := ns[b]; !ok {
+		ns[b] = make(map[orchestrator.MachineID]*orchestrator.Link)
+	}
+
+	if blocked {
+		ns[a][b] = &orchestrator.Link{
+			Blocked: true,
+		}
+		ns[b][a] = &orchestrator.Link{
+			Blocked: true,
+		}
+
+		return
+	}
+
+	ns[a][b] = &orchestrator.Link{
+		LatencyUs:     latencyUs,
+		BandwidthKbps: bandwidthKbps,
+		Blocked:       false,
+		Next:          next,
+	}
+	ns[b][a] = &orchestrator.Link{
+		LatencyUs:     latencyUs,
+		BandwidthKbps: bandwidthKbps,
+		Blocked:       false,
+		Next:          prev,
+	}
+}
@@ -0,0 +1,135 @@
+/*
+* This file is part of Celestial (https://github.com/OpenFogStack/celestial).
+* Copyright (c) 2024 Tobias Pfandzelter, The OpenFogStack Team.
+*
+* This program is free software: you can redistribute it and/or modify
+* it under the terms of the GNU General Public License as published by
+* the Free Software Foundation, version 3.
+*
+* This program is distributed in the hope that it will be useful, but
+* WITHOUT ANY WARRANTY; without even the implied warranty of
+* MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+* General Public License for more details.
+*
+* You should have received a copy of the GNU General Public License
+* along with this program. If not, see <http://www.gnu.org/licenses/>.
+**/
+
+package server
+
+import (
+	"reflect"
+	"testing"
+
+	"google.golang.org/protobuf/proto"
+
+	"github.com/OpenFogStack/celestial/pkg/orchestrator"
+	"github.com/OpenFogStack/celestial/proto/celestial"
+)
+
+func Test_setPackedLinks(t *testing.T) {
+	tests := []struct {
+		name    string
+		p       *celestial.StateUpdateRequest_PackedNetworkDiffs
+		want    orchestrator.NetworkState
+		wantErr bool
+	}{
+		{
+			name: "empty",
+			p:    &celestial.StateUpdateRequest_PackedNetworkDiffs{},
+			want: orchestrator.NetworkState{},
+		},
+		{
+			name: "links",
+			// a link from satellite 1.0 to ground station 0.1 via satellite 1.2,
+			// and a blocked link from satellite 1.2 to satellite 2.300
+			p: &celestial.StateUpdateRequest_PackedNetworkDiffs{
+				Blocked:       []bool{false, true},
+				SourceGroup:   []uint32{1, 1},
+				SourceId:      []uint32{0, 2},
+				TargetGroup:   []uint32{0, 2},
+				TargetId:      []uint32{1, 300},
+				LatencyUs:     []uint32{1500, 7},
+				BandwidthKbps: []uint64{10_000_000, 7},
+				NextGroup:     []uint32{1, 7},
+				NextId:        []uint32{2, 7},
+				PrevGroup:     []uint32{1, 7},
+				PrevId:        []uint32{3, 7},
+			},
+			want: orchestrator.NetworkState{
+				orchestrator.MachineID{Group: 1, Id: 0}: {
+					orchestrator.MachineID{Group: 0, Id: 1}: &orchestrator.Link{
+						LatencyUs:     1500,
+						BandwidthKbps: 10_000_000,
+						Next:          orchestrator.MachineID{Group: 1, Id: 2},
+					},
+				},
+				orchestrator.MachineID{Group: 0, Id: 1}: {
+					orchestrator.MachineID{Group: 1, Id: 0}: &orchestrator.Link{
+						LatencyUs:     1500,
+						BandwidthKbps: 10_000_000,
+						Next:          orchestrator.MachineID{Group: 1, Id: 3},
+					},
+				},
+				orchestrator.MachineID{Group: 1, Id: 2}: {
+					orchestrator.MachineID{Group: 2, Id: 300}: &orchestrator.Link{
+						Blocked: true,
+					},
+				},
+				orchestrator.MachineID{Group: 2, Id: 300}: {
+					orchestrator.MachineID{Group: 1, Id: 2}: &orchestrator.Link{
+						Blocked: true,
+					},
+				},
+			},
+		},
+		{
+			name: "column length mismatch",
+			p: &celestial.StateUpdateRequest_PackedNetworkDiffs{
+				Blocked:       []bool{false, false},
+				SourceGroup:   []uint32{1, 1},
+				SourceId:      []uint32{0, 2},
+				TargetGroup:   []uint32{0, 2},
+				TargetId:      []uint32{1, 300},
+				LatencyUs:     []uint32{1500, 7},
+				BandwidthKbps: []uint64{10_000_000, 7},
+				NextGroup:     []uint32{1, 7},
+				NextId:        []uint32{2, 7},
+				PrevGroup:     []uint32{1, 7},
+				PrevId:        []uint32{3},
+			},
+			// no link is set if the diffs are invalid
+			want:    orchestrator.NetworkState{},
+			wantErr: true,
+		},
+	}
+	for _, tt := range tests {
+		t.Run(tt.name, func(t *testing.T) {
+			// decode the diffs as the server receives them
+			b, err := proto.Marshal(&celestial.StateUpdateRequest{PackedNetworkDiffs: tt.p})
+			if err != nil {
+				t.Fatalf("proto.Marshal() error = %v", err)
+			}
+
+			u := &celestial.StateUpdateRequest{}
+			if err := proto.Unmarshal(b, u); err != nil {
+				t.Fatalf("proto.Unmarshal() error = %v", err)
+			}
+
+			ns := make(orchestrator.NetworkState)
+			p := u.PackedNetworkDiffs
+			if p == nil {
+				p = &celestial.StateUpdateRequest_PackedNetworkDiffs{}
+			}
+
+			err = setPackedLinks(ns, p)
+			if (err != nil) != tt.wantErr {
+				t.Errorf("setPackedLinks() error = %v, wantErr %v", err, tt.wantErr)
+				return
+			}
+			if !reflect.DeepEqual(ns, tt.want) {
+				t.Errorf("setPackedLinks() = %v, want %v", ns, tt.want)
+			}
+		})
+	}
+}
@@ -353,8 +353,9 @@ type StateUpdateRequest struct {
 	sizeCache     protoimpl.SizeCache
 	unknownFields protoimpl.UnknownFields
 
-	MachineDiffs []*StateUpdateRequest_MachineDiff `protobuf:"bytes,1,rep,name=machine_diffs,json=machineDiffs,proto3" json:"machine_diffs,omitempty"`
-	NetworkDiffs []*StateUpdateRequest_NetworkDiff `protobuf:"bytes,2,rep,name=network_diffs,json=networkDiffs,proto3" json:"network_diffs,omitempty"`
+	MachineDiffs       []*StateUpdateRequest_MachineDiff      `protobuf:"bytes,1,rep,name=machine_diffs,json=machineDiffs,proto3" json:"machine_diffs,omitempty"`
+	NetworkDiffs       []*StateUpdateRequest_NetworkDiff      `protobuf:"bytes,2,rep,name=network_diffs,json=networkDiffs,proto3" json:"network_diffs,omitempty"`
+	PackedNetworkDiffs *StateUpdateRequest_PackedNetworkDiffs `protobuf:"bytes,3,opt,name=packed_network_diffs,json=packedNetworkDiffs,proto3" json:"packed_network_diffs,omitempty"`
 }
 
 func (x *StateUpdateRequest) Reset() {
@@ -403,6 +404,13 @@ func (x *StateUpdateRequest) GetNetworkDiffs() []*StateUpdateRequest_NetworkDiff
 	return nil
 }
 
+func (x *StateUpdateRequest) GetPackedNetworkDiffs() *StateUpdateRequest_PackedNetworkDiffs {
+	if x != nil {
+		return x.PackedNetworkDiffs
+	}
+	return nil
+}
+
 type InitRequest_Host struct {
 	state         protoimpl.MessageState
 	sizeCache     protoimpl.SizeCache
@@ -777,6 +785,137 @@ func (x *StateUpdateRequest_NetworkDiff) GetPrev() *MachineID {
 	return nil
 }
 
+// network diffs as one column per field, which is much cheaper to
+// encode and decode than one message per diff
+// all fields have the same length, the i-th entry of each field belongs
+// to the i-th diff
+type StateUpdateRequest_PackedNetworkDiffs struct {
+	state         protoimpl.MessageState
+	sizeCache     protoimpl.SizeCache
+	unknownFields protoimpl.UnknownFields
+
+	Blocked       []bool   `protobuf:"varint,1,rep,packed,name=blocked,proto3" json:"blocked,omitempty"`
+	SourceGroup   []uint32 `protobuf:"varint,2,rep,packed,name=source_group,json=sourceGroup,proto3" json:"source_group,omitempty"`
+	SourceId      []uint32 `protobuf:"varint,3,rep,packed,name=source_id,json=sourceId,proto3" json:"source_id,omitempty"`
+	TargetGroup   []uint32 `protobuf:"varint,4,rep,packed,name=target_group,json=targetGroup,proto3" json:"target_group,omitempty"`
+	TargetId      []uint32 `protobuf:"varint,5,rep,packed,name=target_id,json=targetId,proto3" json:"target_id,omitempty"`
+	LatencyUs     []uint32 `protobuf:"varint,6,rep,packed,name=latency_us,json=latencyUs,proto3" json:"latency_us,omitempty"`
+	BandwidthKbps []uint64 `protobuf:"varint,7,rep,packed,name=bandwidth_kbps,json=bandwidthKbps,proto3" json:"bandwidth_kbps,omitempty"`
+	NextGroup     []uint32 `protobuf:"varint,8,rep,packed,name=next_group,json=nextGroup,proto3" json:"next_group,omitempty"`
+	NextId        []uint32 `protobuf:"varint,9,rep,packed,name=next_id,json=nextId,proto3" json:"next_id,omitempty"`
+	PrevGroup     []uint32 `protobuf:"varint,10,rep,packed,name=prev_group,json=prevGroup,proto3" json:"prev_group,omitempty"`
+	PrevId        []uint32 `protobuf:"varint,11,rep,packed,name=prev_id,json=prevId,proto3" json:"prev_id,omitempty"`
+}
+
+func (x *StateUpdateRequest_PackedNetworkDiffs) Reset() {
+	*x = StateUpdateRequest_PackedNetworkDiffs{}
+	if protoimpl.UnsafeEnabled {
+		mi := &file_celestial_proto_msgTypes[11]
+		ms := protoimpl.X.MessageStateOf(protoimpl.Pointer(x))
+		ms.StoreMessageInfo(mi)
+	}
+}
+
+func (x *StateUpdateRequest_PackedNetworkDiffs) String() string {
+	return protoimpl.X.MessageStringOf(x)
+}
+
+func (*StateUpdateRequest_PackedNetworkDiffs) ProtoMessage() {}
+
+func (x *StateUpdateRequest_PackedNetworkDiffs) ProtoReflect() protoreflect.Message {
+	mi := &file_celestial_proto_msgTypes[11]
+	if protoimpl.UnsafeEnabled && x != nil {
+		ms := protoimpl.X.MessageStateOf(protoimpl.Pointer(x))
+		if ms.LoadMessageInfo() == nil {
+			ms.StoreMessageInfo(mi)
+		}
+		return ms
+	}
+	return mi.MessageOf(x)
+}
+
+// Deprecated: Use StateUpdateRequest_PackedNetworkDiffs.ProtoReflect.Descriptor instead.
+func (*StateUpdateRequest_PackedNetworkDiffs) Descriptor() ([]byte, []int) {
+	return file_celestial_proto_rawDescGZIP(), []int{5, 2}
+}
+
+func (x *StateUpdateRequest_PackedNetworkDiffs) GetBlocked() []bool {
+	if x != nil {
+		return x.Blocked
+	}
+	return nil
+}
+
+func (x *StateUpdateRequest_PackedNetworkDiffs) GetSourceGroup() []uint32 {
+	if x != nil {
+		return x.SourceGroup
+	}
+	return nil
+}
+
+func (x *StateUpdateRequest_PackedNetworkDiffs) GetSourceId() []uint32 {
+	if x != nil {
+		return x.SourceId
+	}
+	return nil
+}
+
+func (x *StateUpdateRequest_PackedNetworkDiffs) GetTargetGroup() []uint32 {
+	if x != nil {
+		return x.TargetGroup
+	}
+	return nil
+}
+
+func (x *StateUpdateRequest_PackedNetworkDiffs) GetTargetId() []uint32 {
+	if x != nil {
+		return x.TargetId
+	}
+	return nil
+}
+
+func (x *StateUpdateRequest_PackedNetworkDiffs) GetLatencyUs() []uint32 {
+	if x != nil {
+		return x.LatencyUs
+	}
+	return nil
+}
+
+func (x *StateUpdateRequest_PackedNetworkDiffs) GetBandwidthKbps() []uint64 {
+	if x != nil {
+		return x.BandwidthKbps
+	}
+	return nil
+}
+
+func (x *StateUpdateRequest_PackedNetworkDiffs) GetNextGroup() []uint32 {
+	if x != nil {
+		return x.NextGroup
+	}
+	return nil
+}
+
+func (x *StateUpdateRequest_PackedNetworkDiffs) GetNextId() []uint32 {
+	if x != nil {
+		return x.NextId
+	}
+	return nil
+}
+
+func (x *StateUpdateRequest_PackedNetworkDiffs) GetPrevGroup() []uint32 {
+	if x != nil {
+		return x.PrevGroup
+	}
+	return nil
+}
+
+func (x *StateUpdateRequest_PackedNetworkDiffs) GetPrevId() []uint32 {
+	if x != nil {
+		return x.PrevId
+	}
+	return nil
+}
+
 var File_celestial_proto protoreflect.FileDescriptor
 
 var file_celestial_proto_rawDesc = []byte{
@@ -843,7 +982,7 @@ var file_celestial_proto_rawDesc = []byte{
 	0x28, 0x09, 0x52, 0x06, 0x6b, 0x65, 0x72, 0x6e, 0x65, 0x6c, 0x12, 0x27, 0x0a, 0x0f, 0x62, 0x6f,
 	0x6f, 0x74, 0x5f, 0x70, 0x61, 0x72, 0x61, 0x6d, 0x65, 0x74, 0x65, 0x72, 0x73, 0x18, 0x06, 0x20,
 	0x03, 0x28, 0x09, 0x52, 0x0e, 0x62, 0x6f, 0x6f, 0x74, 0x50, 0x61, 0x72, 0x61, 0x6d, 0x65, 0x74,
-	0x65, 0x72, 0x73, 0x42, 0x07, 0x0a, 0x05, 0x5f, 0x6e, 0x61, 0x6d, 0x65, 0x22, 0xee, 0x05, 0x0a,
+	0x65, 0x72, 0x73, 0x42, 0x07, 0x0a, 0x05, 0x5f, 0x6e, 0x61, 0x6d, 0x65, 0x22, 0xd0, 0x09, 0x0a,
 	0x12, 0x53, 0x74, 0x61, 0x74, 0x65, 0x55, 0x70, 0x64, 0x61, 0x74, 0x65, 0x52, 0x65, 0x71, 0x75,
 	0x65, 0x73, 0x74, 0x12, 0x65, 0x0a, 0x0d, 0x6d, 0x61, 0x63, 0x68, 0x69, 0x6e, 0x65, 0x5f, 0x64,
 	0x69, 0x66, 0x66, 0x73, 0x18, 0x01, 0x20, 0x03, 0x28, 0x0b, 0x32, 0x40, 0x2e, 0x6f, 0x70, 0x65,
@@ -858,71 +997,101 @@ var file_celestial_proto_rawDesc = []byte{
 	0x74, 0x69, 0x61, 0x6c, 0x2e, 0x53, 0x74, 0x61, 0x74, 0x65, 0x55, 0x70, 0x64, 0x61, 0x74, 0x65,
 	0x52, 0x65, 0x71, 0x75, 0x65, 0x73, 0x74, 0x2e, 0x4e, 0x65, 0x74, 0x77, 0x6f, 0x72, 0x6b, 0x44,
 	0x69, 0x66, 0x66, 0x52, 0x0c, 0x6e, 0x65, 0x74, 0x77, 0x6f, 0x72, 0x6b, 0x44, 0x69, 0x66, 0x66,
-	0x73, 0x1a, 0x8d, 0x01, 0x0a, 0x0b, 0x4d, 0x61, 0x63, 0x68, 0x69, 0x6e, 0x65, 0x44, 0x69, 0x66,
-	0x66, 0x12, 0x41, 0x0a, 0x06, 0x61, 0x63, 0x74, 0x69, 0x76, 0x65, 0x18, 0x01, 0x20, 0x01, 0x28,
-	0x0e, 0x32, 0x29, 0x2e, 0x6f, 0x70, 0x65, 0x6e, 0x66, 0x6f, 0x67, 0x73, 0x74, 0x61, 0x63, 0x6b,
-	0x2e, 0x63, 0x65, 0x6c, 0x65, 0x73, 0x74, 0x69, 0x61, 0x6c, 0x2e, 0x63, 0x65, 0x6c, 0x65, 0x73,
-	0x74, 0x69, 0x61, 0x6c, 0x2e, 0x56, 0x4d, 0x53, 0x74, 0x61, 0x74, 0x65, 0x52, 0x06, 0x61, 0x63,
-	0x74, 0x69, 0x76, 0x65, 0x12, 0x3b, 0x0a, 0x02, 0x69, 0x64, 0x18, 0x02, 0x20, 0x01, 0x28, 0x0b,
-	0x32, 0x2b, 0x2e, 0x6f, 0x70, 0x65, 0x6e, 0x66, 0x6f, 0x67, 0x73, 0x74, 0x61, 0x63, 0x6b, 0x2e,
-	0x63, 0x65, 0x6c, 0x65, 0x73, 0x74, 0x69, 0x61, 0x6c, 0x2e, 0x63, 0x65, 0x6c, 0x65, 0x73, 0x74,
-	0x69, 0x61, 0x6c, 0x2e, 0x4d, 0x61, 0x63, 0x68, 0x69, 0x6e, 0x65, 0x49, 0x44, 0x52, 0x02, 0x69,
-	0x64, 0x1a, 0xf9, 0x02, 0x0a, 0x0b, 0x4e, 0x65, 0x74, 0x77, 0x6f, 0x72, 0x6b, 0x44, 0x69, 0x66,
-	0x66, 0x12, 0x18, 0x0a, 0x07, 0x62, 0x6c, 0x6f, 0x63, 0x6b, 0x65, 0x64, 0x18, 0x01, 0x20, 0x01,
-	0x28, 0x08, 0x52, 0x07, 0x62, 0x6c, 0x6f, 0x63, 0x6b, 0x65, 0x64, 0x12, 0x43, 0x0a, 0x06, 0x73,
-	0x6f, 0x75, 0x72, 0x63, 0x65, 0x18, 0x02, 0x20, 0x01, 0x28, 0x0b, 0x32, 0x2b, 0x2e, 0x6f, 0x70,
-	0x65, 0x6e, 0x66, 0x6f, 0x67, 0x73, 0x74, 0x61, 0x63, 0x6b, 0x2e, 0x63, 0x65, 0x6c, 0x65, 0x73,
-	0x74, 0x69, 0x61, 0x6c, 0x2e, 0x63, 0x65, 0x6c, 0x65, 0x73, 0x74, 0x69, 0x61, 0x6c, 0x2e, 0x4d,
-	0x61, 0x63, 0x68, 0x69, 0x6e, 0x65, 0x49, 0x44, 0x52, 0x06, 0x73, 0x6f, 0x75, 0x72, 0x63, 0x65,
-	0x12, 0x43, 0x0a, 0x06, 0x74, 0x61, 0x72, 0x67, 0x65, 0x74, 0x18, 0x03, 0x20, 0x01, 0x28, 0x0b,
-	0x32, 0x2b, 0x2e, 0x6f, 0x70, 0x65, 0x6e, 0x66, 0x6f, 0x67, 0x73, 0x74, 0x61, 0x63, 0x6b, 0x2e,
-	0x63, 0x65, 0x6c, 0x65, 0x73, 0x74, 0x69, 0x61, 0x6c, 0x2e, 0x63, 0x65, 0x6c, 0x65, 0x73, 0x74,
-	0x69, 0x61, 0x6c, 0x2e, 0x4d, 0x61, 0x63, 0x68, 0x69, 0x6e, 0x65, 0x49, 0x44, 0x52, 0x06, 0x74,
-	0x61, 0x72, 0x67, 0x65, 0x74, 0x12, 0x1d, 0x0a, 0x0a, 0x6c, 0x61, 0x74, 0x65, 0x6e, 0x63, 0x79,
-	0x5f, 0x75, 0x73, 0x18, 0x04, 0x20, 0x01, 0x28, 0x0d, 0x52, 0x09, 0x6c, 0x61, 0x74, 0x65, 0x6e,
-	0x63, 0x79, 0x55, 0x73, 0x12, 0x25, 0x0a, 0x0e, 0x62, 0x61, 0x6e, 0x64, 0x77, 0x69, 0x64, 0x74,
-	0x68, 0x5f, 0x6b, 0x62, 0x70, 0x73, 0x18, 0x05, 0x20, 0x01, 0x28, 0x04, 0x52, 0x0d, 0x62, 0x61,
-	0x6e, 0x64, 0x77, 0x69, 0x64, 0x74, 0x68, 0x4b, 0x62, 0x70, 0x73, 0x12, 0x3f, 0x0a, 0x04, 0x6e,
-	0x65, 0x78, 0x74, 0x18, 0x06, 0x20, 0x01, 0x28, 0x0b, 0x32, 0x2b, 0x2e, 0x6f, 0x70, 0x65, 0x6e,
-	0x66, 0x6f, 0x67, 0x73, 0x74, 0x61, 0x63, 0x6b, 0x2e, 0x63, 0x65, 0x6c, 0x65, 0x73, 0x74, 0x69,
-	0x61, 0x6c, 0x2e, 0x63, 0x65, 0x6c, 0x65, 0x73, 0x74, 0x69, 0x61, 0x6c, 0x2e, 0x4d, 0x61, 0x63,
-	0x68, 0x69, 0x6e, 0x65, 0x49, 0x44, 0x52, 0x04, 0x6e, 0x65, 0x78, 0x74, 0x12, 0x3f, 0x0a, 0x04,
-	0x70, 0x72, 0x65, 0x76, 0x18, 0x07, 0x20, 0x01, 0x28, 0x0b, 0x32, 0x2b, 0x2e, 0x6f, 0x70, 0x65,
-	0x6e, 0x66, 0x6f, 0x67, 0x73, 0x74, 0x61, 0x63, 0x6b, 0x2e, 0x63, 0x65, 0x6c, 0x65, 0x73, 0x74,
-	0x69, 0x61, 0x6c, 0x2e, 0x63, 0x65, 0x6c, 0x65, 0x73, 0x74, 0x69, 0x61, 0x6c, 0x2e, 0x4d, 0x61,
-	0x63, 0x68, 0x69, 0x6e, 0x65, 0x49, 0x44, 0x52, 0x04, 0x70, 0x72, 0x65, 0x76, 0x2a, 0x34, 0x0a,
-	0x07, 0x56, 0x4d, 0x53, 0x74, 0x61, 0x74, 0x65, 0x12, 0x14, 0x0a, 0x10, 0x56, 0x4d, 0x5f, 0x53,
-	0x54, 0x41, 0x54, 0x45, 0x5f, 0x53, 0x54, 0x4f, 0x50, 0x50, 0x45, 0x44, 0x10, 0x00, 0x12, 0x13,
-	0x0a, 0x0f, 0x56, 0x4d, 0x5f, 0x53, 0x54, 0x41, 0x54, 0x45, 0x5f, 0x41, 0x43, 0x54, 0x49, 0x56,
-	0x45, 0x10, 0x01, 0x32, 0xa3, 0x03, 0x0a, 0x09, 0x43, 0x65, 0x6c, 0x65, 0x73, 0x74, 0x69, 0x61,
-	0x6c, 0x12, 0x71, 0x0a, 0x08, 0x52, 0x65, 0x67, 0x69, 0x73, 0x74, 0x65, 0x72, 0x12, 0x31, 0x2e,
-	0x6f, 0x70, 0x65, 0x6e, 0x66, 0x6f, 0x67, 0x73, 0x74, 0x61, 0x63, 0x6b, 0x2e, 0x63, 0x65, 0x6c,
-	0x65, 0x73, 0x74, 0x69, 0x61, 0x6c, 0x2e, 0x63, 0x65, 0x6c, 0x65, 0x73, 0x74, 0x69, 0x61, 0x6c,
-	0x2e, 0x52, 0x65, 0x67, 0x69, 0x73, 0x74, 0x65, 0x72, 0x52, 0x65, 0x71, 0x75, 0x65, 0x73, 0x74,
-	0x1a, 0x32, 0x2e, 0x6f, 0x70, 0x65, 0x6e, 0x66, 0x6f, 0x67, 0x73, 0x74, 0x61, 0x63, 0x6b, 0x2e,
-	0x63, 0x65, 0x6c, 0x65, 0x73, 0x74, 0x69, 0x61, 0x6c, 0x2e, 0x63, 0x65, 0x6c, 0x65, 0x73, 0x74,
-	0x69, 0x61, 0x6c, 0x2e, 0x52, 0x65, 0x67, 0x69, 0x73, 0x74, 0x65, 0x72, 0x52, 0x65, 0x73, 0x70,
-	0x6f, 0x6e, 0x73, 0x65, 0x12, 0x5e, 0x0a, 0x04, 0x49, 0x6e, 0x69, 0x74, 0x12, 0x2d, 0x2e, 0x6f,
+	0x73, 0x12, 0x79, 0x0a, 0x14, 0x70, 0x61, 0x63, 0x6b, 0x65, 0x64, 0x5f, 0x6e, 0x65, 0x74, 0x77,
+	0x6f, 0x72, 0x6b, 0x5f, 0x64, 0x69, 0x66, 0x66, 0x73, 0x18, 0x03, 0x20, 0x01, 0x28, 0x0b, 0x32,
+	0x47, 0x2e, 0x6f, 0x70, 0x65, 0x6e, 0x66, 0x6f, 0x67, 0x73, 0x74, 0x61, 0x63, 0x6b, 0x2e, 0x63,
+	0x65, 0x6c, 0x65, 0x73, 0x74, 0x69, 0x61, 0x6c, 0x2e, 0x63, 0x65, 0x6c, 0x65, 0x73, 0x74, 0x69,
+	0x61, 0x6c, 0x2e, 0x53, 0x74, 0x61, 0x74, 0x65, 0x55, 0x70, 0x64, 0x61, 0x74, 0x65, 0x52, 0x65,
+	0x71, 0x75, 0x65, 0x73, 0x74, 0x2e, 0x50, 0x61, 0x63, 0x6b, 0x65, 0x64, 0x4e, 0x65, 0x74, 0x77,
+	0x6f, 0x72, 0x6b, 0x44, 0x69, 0x66, 0x66, 0x73, 0x52, 0x12, 0x70, 0x61, 0x63, 0x6b, 0x65, 0x64,
+	0x4e, 0x65, 0x74, 0x77, 0x6f, 0x72, 0x6b, 0x44, 0x69, 0x66, 0x66, 0x73, 0x1a, 0x8d, 0x01, 0x0a,
+	0x0b, 0x4d, 0x61, 0x63, 0x68, 0x69, 0x6e, 0x65, 0x44, 0x69, 0x66, 0x66, 0x12, 0x41, 0x0a, 0x06,
+	0x61, 0x63, 0x74, 0x69, 0x76, 0x65, 0x18, 0x01, 0x20, 0x01, 0x28, 0x0e, 0x32, 0x29, 0x2e, 0x6f,
 	0x70, 0x65, 0x6e, 0x66, 0x6f, 0x67, 0x73, 0x74, 0x61, 0x63, 0x6b, 0x2e, 0x63, 0x65, 0x6c, 0x65,
 	0x73, 0x74, 0x69, 0x61, 0x6c, 0x2e, 0x63, 0x65, 0x6c, 0x65, 0x73, 0x74, 0x69, 0x61, 0x6c, 0x2e,
-	0x49, 0x6e, 0x69, 0x74, 0x52, 0x65, 0x71, 0x75, 0x65, 0x73, 0x74, 0x1a, 0x27, 0x2e, 0x6f, 0x70,
+	0x56, 0x4d, 0x53, 0x74, 0x61, 0x74, 0x65, 0x52, 0x06, 0x61, 0x63, 0x74, 0x69, 0x76, 0x65, 0x12,
+	0x3b, 0x0a, 0x02, 0x69, 0x64, 0x18, 0x02, 0x20, 0x01, 0x28, 0x0b, 0x32, 0x2b, 0x2e, 0x6f, 0x70,
+	0x65, 0x6e, 0x66, 0x6f, 0x67, 0x73, 0x74, 0x61, 0x63, 0x6b, 0x2e, 0x63, 0x65, 0x6c, 0x65, 0x73,
+	0x74, 0x69, 0x61, 0x6c, 0x2e, 0x63, 0x65, 0x6c, 0x65, 0x73, 0x74, 0x69, 0x61, 0x6c, 0x2e, 0x4d,
+	0x61, 0x63, 0x68, 0x69, 0x6e, 0x65, 0x49, 0x44, 0x52, 0x02, 0x69, 0x64, 0x1a, 0xf9, 0x02, 0x0a,
+	0x0b, 0x4e, 0x65, 0x74, 0x77, 0x6f, 0x72, 0x6b, 0x44, 0x69, 0x66, 0x66, 0x12, 0x18, 0x0a, 0x07,
+	0x62, 0x6c, 0x6f, 0x63, 0x6b, 0x65, 0x64, 0x18, 0x01, 0x20, 0x01, 0x28, 0x08, 0x52, 0x07, 0x62,
+	0x6c, 0x6f, 0x63, 0x6b, 0x65, 0x64, 0x12, 0x43, 0x0a, 0x06, 0x73, 0x6f, 0x75, 0x72, 0x63, 0x65,
+	0x18, 0x02, 0x20, 0x01, 0x28, 0x0b, 0x32, 0x2b, 0x2e, 0x6f, 0x70, 0x65, 0x6e, 0x66, 0x6f, 0x67,
+	0x73, 0x74, 0x61, 0x63, 0x6b, 0x2e, 0x63, 0x65, 0x6c, 0x65, 0x73, 0x74, 0x69, 0x61, 0x6c, 0x2e,
+	0x63, 0x65, 0x6c, 0x65, 0x73, 0x74, 0x69, 0x61, 0x6c, 0x2e, 0x4d, 0x61, 0x63, 0x68, 0x69, 0x6e,
+	0x65, 0x49, 0x44, 0x52, 0x06, 0x73, 0x6f, 0x75, 0x72, 0x63, 0x65, 0x12, 0x43, 0x0a, 0x06, 0x74,
+	0x61, 0x72, 0x67, 0x65, 0x74, 0x18, 0x03, 0x20, 0x01, 0x28, 0x0b, 0x32, 0x2b, 0x2e, 0x6f, 0x70,
 	0x65, 0x6e, 0x66, 0x6f, 0x67, 0x73, 0x74, 0x61, 0x63, 0x6b, 0x2e, 0x63, 0x65, 0x6c, 0x65, 0x73,
-	0x74, 0x69, 0x61, 0x6c, 0x2e, 0x63, 0x65, 0x6c, 0x65, 0x73, 0x74, 0x69, 0x61, 0x6c, 0x2e, 0x45,
-	0x6d, 0x70, 0x74, 0x79, 0x12, 0x69, 0x0a, 0x06, 0x55, 0x70, 0x64, 0x61, 0x74, 0x65, 0x12, 0x34,
+	0x74, 0x69, 0x61, 0x6c, 0x2e, 0x63, 0x65, 0x6c, 0x65, 0x73, 0x74, 0x69, 0x61, 0x6c, 0x2e, 0x4d,
+	0x61, 0x63, 0x68, 0x69, 0x6e, 0x65, 0x49, 0x44, 0x52, 0x06, 0x74, 0x61, 0x72, 0x67, 0x65, 0x74,
+	0x12, 0x1d, 0x0a, 0x0a, 0x6c, 0x61, 0x74, 0x65, 0x6e, 0x63, 0x79, 0x5f, 0x75, 0x73, 0x18, 0x04,
+	0x20, 0x01, 0x28, 0x0d, 0x52, 0x09, 0x6c, 0x61, 0x74, 0x65, 0x6e, 0x63, 0x79, 0x55, 0x73, 0x12,
+	0x25, 0x0a, 0x0e, 0x62, 0x61, 0x6e, 0x64, 0x77, 0x69, 0x64, 0x74, 0x68, 0x5f, 0x6b, 0x62, 0x70,
+	0x73, 0x18, 0x05, 0x20, 0x01, 0x28, 0x04, 0x52, 0x0d, 0x62, 0x61, 0x6e, 0x64, 0x77, 0x69, 0x64,
+	0x74, 0x68, 0x4b, 0x62, 0x70, 0x73, 0x12, 0x3f, 0x0a, 0x04, 0x6e, 0x65, 0x78, 0x74, 0x18, 0x06,
+	0x20, 0x01, 0x28, 0x0b, 0x32, 0x2b, 0x2e, 0x6f, 0x70, 0x65, 0x6e, 0x66, 0x6f, 0x67, 0x73, 0x74,
+	0x61, 0x63, 0x6b, 0x2e, 0x63, 0x65, 0x6c, 0x65, 0x73, 0x74, 0x69, 0x61, 0x6c, 0x2e, 0x63, 0x65,
+	0x6c, 0x65, 0x73, 0x74, 0x69, 0x61, 0x6c, 0x2e, 0x4d, 0x61, 0x63, 0x68, 0x69, 0x6e, 0x65, 0x49,
+	0x44, 0x52, 0x04, 0x6e, 0x65, 0x78, 0x74, 0x12, 0x3f, 0x0a, 0x04, 0x70, 0x72, 0x65, 0x76, 0x18,
+	0x07, 0x20, 0x01, 0x28, 0x0b, 0x32, 0x2b, 0x2e, 0x6f, 0x70, 0x65, 0x6e, 0x66, 0x6f, 0x67, 0x73,
+	0x74, 0x61, 0x63, 0x6b, 0x2e, 0x63, 0x65, 0x6c, 0x65, 0x73, 0x74, 0x69, 0x61, 0x6c, 0x2e, 0x63,
+	0x65, 0x6c, 0x65, 0x73, 0x74, 0x69, 0x61, 0x6c, 0x2e, 0x4d, 0x61, 0x63, 0x68, 0x69, 0x6e, 0x65,
+	0x49, 0x44, 0x52, 0x04, 0x70, 0x72, 0x65, 0x76, 0x1a, 0xe4, 0x02, 0x0a, 0x12, 0x50, 0x61, 0x63,
+	0x6b, 0x65, 0x64, 0x4e, 0x65, 0x74, 0x77, 0x6f, 0x72, 0x6b, 0x44, 0x69, 0x66, 0x66, 0x73, 0x12,
+	0x18, 0x0a, 0x07, 0x62, 0x6c, 0x6f, 0x63, 0x6b, 0x65, 0x64, 0x18, 0x01, 0x20, 0x03, 0x28, 0x08,
+	0x52, 0x07, 0x62, 0x6c, 0x6f, 0x63, 0x6b, 0x65, 0x64, 0x12, 0x21, 0x0a, 0x0c, 0x73, 0x6f, 0x75,
+	0x72, 0x63, 0x65, 0x5f, 0x67, 0x72, 0x6f, 0x75, 0x70, 0x18, 0x02, 0x20, 0x03, 0x28, 0x0d, 0x52,
+	0x0b, 0x73, 0x6f, 0x75, 0x72, 0x63, 0x65, 0x47, 0x72, 0x6f, 0x75, 0x70, 0x12, 0x1b, 0x0a, 0x09,
+	0x73, 0x6f, 0x75, 0x72, 0x63, 0x65, 0x5f, 0x69, 0x64, 0x18, 0x03, 0x20, 0x03, 0x28, 0x0d, 0x52,
+	0x08, 0x73, 0x6f, 0x75, 0x72, 0x63, 0x65, 0x49, 0x64, 0x12, 0x21, 0x0a, 0x0c, 0x74, 0x61, 0x72,
+	0x67, 0x65, 0x74, 0x5f, 0x67, 0x72, 0x6f, 0x75, 0x70, 0x18, 0x04, 0x20, 0x03, 0x28, 0x0d, 0x52,
+	0x0b, 0x74, 0x61, 0x72, 0x67, 0x65, 0x74, 0x47, 0x72, 0x6f, 0x75, 0x70, 0x12, 0x1b, 0x0a, 0x09,
+	0x74, 0x61, 0x72, 0x67, 0x65, 0x74, 0x5f, 0x69, 0x64, 0x18, 0x05, 0x20, 0x03, 0x28, 0x0d, 0x52,
+	0x08, 0x74, 0x61, 0x72, 0x67, 0x65, 0x74, 0x49, 0x64, 0x12, 0x1d, 0x0a, 0x0a, 0x6c, 0x61, 0x74,
+	0x65, 0x6e, 0x63, 0x79, 0x5f, 0x75, 0x73, 0x18, 0x06, 0x20, 0x03, 0x28, 0x0d, 0x52, 0x09, 0x6c,
+	0x61, 0x74, 0x65, 0x6e, 0x63, 0x79, 0x55, 0x73, 0x12, 0x25, 0x0a, 0x0e, 0x62, 0x61, 0x6e, 0x64,
+	0x77, 0x69, 0x64, 0x74, 0x68, 0x5f, 0x6b, 0x62, 0x70, 0x73, 0x18, 0x07, 0x20, 0x03, 0x28, 0x04,
+	0x52, 0x0d, 0x62, 0x61, 0x6e, 0x64, 0x77, 0x69, 0x64, 0x74, 0x68, 0x4b, 0x62, 0x70, 0x73, 0x12,
+	0x1d, 0x0a, 0x0a, 0x6e, 0x65, 0x78, 0x74, 0x5f, 0x67, 0x72, 0x6f, 0x75, 0x70, 0x18, 0x08, 0x20,
+	0x03, 0x28, 0x0d, 0x52, 0x09, 0x6e, 0x65, 0x78, 0x74, 0x47, 0x72, 0x6f, 0x75, 0x70, 0x12, 0x17,
+	0x0a, 0x07, 0x6e, 0x65, 0x78, 0x74, 0x5f, 0x69, 0x64, 0x18, 0x09, 0x20, 0x03, 0x28, 0x0d, 0x52,
+	0x06, 0x6e, 0x65, 0x78, 0x74, 0x49, 0x64, 0x12, 0x1d, 0x0a, 0x0a, 0x70, 0x72, 0x65, 0x76, 0x5f,
+	0x67, 0x72, 0x6f, 0x75, 0x70, 0x18, 0x0a, 0x20, 0x03, 0x28, 0x0d, 0x52, 0x09, 0x70, 0x72, 0x65,
+	0x76, 0x47, 0x72, 0x6f, 0x75, 0x70, 0x12, 0x17, 0x0a, 0x07, 0x70, 0x72, 0x65, 0x76, 0x5f, 0x69,
+	0x64, 0x18, 0x0b, 0x20, 0x03, 0x28, 0x0d, 0x52, 0x06, 0x70, 0x72, 0x65, 0x76, 0x49, 0x64, 0x2a,
+	0x34, 0x0a, 0x07, 0x56, 0x4d, 0x53, 0x74, 0x61, 0x74, 0x65, 0x12, 0x14, 0x0a, 0x10, 0x56, 0x4d,
+	0x5f, 0x53, 0x54, 0x41, 0x54, 0x45, 0x5f, 0x53, 0x54, 0x4f, 0x50, 0x50, 0x45, 0x44, 0x10, 0x00,
+	0x12, 0x13, 0x0a, 0x0f, 0x56, 0x4d, 0x5f, 0x53, 0x54, 0x41, 0x54, 0x45, 0x5f, 0x41, 0x43, 0x54,
+	0x49, 0x56, 0x45, 0x10, 0x01, 0x32, 0xa3, 0x03, 0x0a, 0x09, 0x43, 0x65, 0x6c, 0x65, 0x73, 0x74,
+	0x69, 0x61, 0x6c, 0x12, 0x71, 0x0a, 0x08, 0x52, 0x65, 0x67, 0x69, 0x73, 0x74, 0x65, 0x72, 0x12,
+	0x31, 0x2e, 0x6f, 0x70, 0x65, 0x6e, 0x66, 0x6f, 0x67, 0x73, 0x74, 0x61, 0x63, 0x6b, 0x2e, 0x63,
+	0x65, 0x6c, 0x65, 0x73, 0x74, 0x69, 0x61, 0x6c, 0x2e, 0x63, 0x65, 0x6c, 0x65, 0x73, 0x74, 0x69,
+	0x61, 0x6c, 0x2e, 0x52, 0x65, 0x67, 0x69, 0x73, 0x74, 0x65, 0x72, 0x52, 0x65, 0x71, 0x75, 0x65,
+	0x73, 0x74, 0x1a, 0x32, 0x2e, 0x6f, 0x70, 0x65, 0x6e, 0x66, 0x6f, 0x67, 0x73, 0x74, 0x61, 0x63,
+	0x6b, 0x2e, 0x63, 0x65, 0x6c, 0x65, 0x73, 0x74, 0x69, 0x61, 0x6c, 0x2e, 0x63, 0x65, 0x6c, 0x65,
+	0x73, 0x74, 0x69, 0x61, 0x6c, 0x2e, 0x52, 0x65, 0x67, 0x69, 0x73, 0x74, 0x65, 0x72, 0x52, 0x65,
+	0x73, 0x70, 0x6f, 0x6e, 0x73, 0x65, 0x12, 0x5e, 0x0a, 0x04, 0x49, 0x6e, 0x69, 0x74, 0x12, 0x2d,
 	0x2e, 0x6f, 0x70, 0x65, 0x6e, 0x66, 0x6f, 0x67, 0x73, 0x74, 0x61, 0x63, 0x6b, 0x2e, 0x63, 0x65,
 	0x6c, 0x65, 0x73, 0x74, 0x69, 0x61, 0x6c, 0x2e, 0x63, 0x65, 0x6c, 0x65, 0x73, 0x74, 0x69, 0x61,
-	0x6c, 0x2e, 0x53, 0x74, 0x61, 0x74, 0x65, 0x55, 0x70, 0x64, 0x61, 0x74, 0x65, 0x52, 0x65, 0x71,
-	0x75, 0x65, 0x73, 0x74, 0x1a, 0x27, 0x2e, 0x6f, 0x70, 0x65, 0x6e, 0x66, 0x6f, 0x67, 0x73, 0x74,
-	0x61, 0x63, 0x6b, 0x2e, 0x63, 0x65, 0x6c, 0x65, 0x73, 0x74, 0x69, 0x61, 0x6c, 0x2e, 0x63, 0x65,
-	0x6c, 0x65, 0x73, 0x74, 0x69, 0x61, 0x6c, 0x2e, 0x45, 0x6d, 0x70, 0x74, 0x79, 0x28, 0x01, 0x12,
-	0x58, 0x0a, 0x04, 0x53, 0x74, 0x6f, 0x70, 0x12, 0x27, 0x2e, 0x6f, 0x70, 0x65, 0x6e, 0x66, 0x6f,
-	0x67, 0x73, 0x74, 0x61, 0x63, 0x6b, 0x2e, 0x63, 0x65, 0x6c, 0x65, 0x73, 0x74, 0x69, 0x61, 0x6c,
-	0x2e, 0x63, 0x65, 0x6c, 0x65, 0x73, 0x74, 0x69, 0x61, 0x6c, 0x2e, 0x45, 0x6d, 0x70, 0x74, 0x79,
-	0x1a, 0x27, 0x2e, 0x6f, 0x70, 0x65, 0x6e, 0x66, 0x6f, 0x67, 0x73, 0x74, 0x61, 0x63, 0x6b, 0x2e,
+	0x6c, 0x2e, 0x49, 0x6e, 0x69, 0x74, 0x52, 0x65, 0x71, 0x75, 0x65, 0x73, 0x74, 0x1a, 0x27, 0x2e,
+	0x6f, 0x70, 0x65, 0x6e, 0x66, 0x6f, 0x67, 0x73, 0x74, 0x61, 0x63, 0x6b, 0x2e, 0x63, 0x65, 0x6c,
+	0x65, 0x73, 0x74, 0x69, 0x61, 0x6c, 0x2e, 0x63, 0x65, 0x6c, 0x65, 0x73, 0x74, 0x69, 0x61, 0x6c,
+	0x2e, 0x45, 0x6d, 0x70, 0x74, 0x79, 0x12, 0x69, 0x0a, 0x06, 0x55, 0x70, 0x64, 0x61, 0x74, 0x65,
+	0x12, 0x34, 0x2e, 0x6f, 0x70, 0x65, 0x6e, 0x66, 0x6f, 0x67, 0x73, 0x74, 0x61, 0x63, 0x6b, 0x2e,
 	0x63, 0x65, 0x6c, 0x65, 0x73, 0x74, 0x69, 0x61, 0x6c, 0x2e, 0x63, 0x65, 0x6c, 0x65, 0x73, 0x74,
-	0x69, 0x61, 0x6c, 0x2e, 0x45, 0x6d, 0x70, 0x74, 0x79, 0x42, 0x0e, 0x5a, 0x0c, 0x2e, 0x2f, 0x3b,
-	0x63, 0x65, 0x6c, 0x65, 0x73, 0x74, 0x69, 0x61, 0x6c, 0x62, 0x06, 0x70, 0x72, 0x6f, 0x74, 0x6f,
-	0x33,
+	0x69, 0x61, 0x6c, 0x2e, 0x53, 0x74, 0x61, 0x74, 0x65, 0x55, 0x70, 0x64, 0x61, 0x74, 0x65, 0x52,
+	0x65, 0x71, 0x75, 0x65, 0x73, 0x74, 0x1a, 0x27, 0x2e, 0x6f, 0x70, 0x65, 0x6e, 0x66, 0x6f, 0x67,
+	0x73, 0x74, 0x61, 0x63, 0x6b, 0x2e, 0x63, 0x65, 0x6c, 0x65, 0x73, 0x74, 0x69, 0x61, 0x6c, 0x2e,
+	0x63, 0x65, 0x6c, 0x65, 0x73, 0x74, 0x69, 0x61, 0x6c, 0x2e, 0x45, 0x6d, 0x70, 0x74, 0x79, 0x28,
+	0x01, 0x12, 0x58, 0x0a, 0x04, 0x53, 0x74, 0x6f, 0x70, 0x12, 0x27, 0x2e, 0x6f, 0x70, 0x65, 0x6e,
+	0x66, 0x6f, 0x67, 0x73, 0x74, 0x61, 0x63, 0x6b, 0x2e, 0x63, 0x65, 0x6c, 0x65, 0x73, 0x74, 0x69,
+	0x61, 0x6c, 0x2e, 0x63, 0x65, 0x6c, 0x65, 0x73, 0x74, 0x69, 0x61, 0x6c, 0x2e, 0x45, 0x6d, 0x70,
+	0x74, 0x79, 0x1a, 0x27, 0x2e, 0x6f, 0x70, 0x65, 0x6e, 0x66, 0x6f, 0x67, 0x73, 0x74, 0x61, 0x63,
+	0x6b, 0x2e, 0x63, 0x65, 0x6c, 0x65, 0x73, 0x74, 0x69, 0x61, 0x6c, 0x2e, 0x63, 0x65, 0x6c, 0x65,
+	0x73, 0x74, 0x69, 0x61, 0x6c, 0x2e, 0x45, 0x6d, 0x70, 0x74, 0x79, 0x42, 0x0e, 0x5a, 0x0c, 0x2e,
+	0x2f, 0x3b, 0x63, 0x65, 0x6c, 0x65, 0x73, 0x74, 0x69, 0x61, 0x6c, 0x62, 0x06, 0x70, 0x72, 0x6f,
+	0x74, 0x6f, 0x33,
 }
 
 var (
@@ -938,47 +1107,49 @@ func file_celestial_proto_rawDescGZIP() []byte {
 }
 
 var file_celestial_proto_enumTypes = make([]protoimpl.EnumInfo, 1)
-var file_celestial_proto_msgTypes = make([]protoimpl.MessageInfo, 11)
+var file_celestial_proto_msgTypes = make([]protoimpl.MessageInfo, 12)
 var file_celestial_proto_goTypes = []interface{}{
-	(VMState)(0),                              // 0: openfogstack.celestial.celestial.VMState
-	(*MachineID)(nil),                         // 1: openfogstack.celestial.celestial.MachineID
-	(*Empty)(nil),                             // 2: openfogstack.celestial.celestial.Empty
-	(*RegisterRequest)(nil),                   // 3: openfogstack.celestial.celestial.RegisterRequest
-	(*RegisterResponse)(nil),                  // 4: openfogstack.celestial.celestial.RegisterResponse
-	(*InitRequest)(nil),                       // 5: openfogstack.celestial.celestial.InitRequest
-	(*StateUpdateRequest)(nil),                // 6: openfogstack.celestial.celestial.StateUpdateRequest
-	(*InitRequest_Host)(nil),                  // 7: openfogstack.celestial.celestial.InitRequest.Host
-	(*InitRequest_Machine)(nil),               // 8: openfogstack.celestial.celestial.InitRequest.Machine
-	(*InitRequest_Machine_MachineConfig)(nil), // 9: openfogstack.celestial.celestial.InitRequest.Machine.MachineConfig
-	(*StateUpdateRequest_MachineDiff)(nil),    // 10: openfogstack.celestial.celestial.StateUpdateRequest.MachineDiff
-	(*StateUpdateRequest_NetworkDiff)(nil),    // 11: openfogstack.celestial.celestial.StateUpdateRequest.NetworkDiff
+	(VMState)(0),                                  // 0: openfogstack.celestial.celestial.VMState
+	(*MachineID)(nil),                             // 1: openfogstack.celestial.celestial.MachineID
+	(*Empty)(nil),                                 // 2: openfogstack.celestial.celestial.Empty
+	(*RegisterRequest)(nil),                       // 3: openfogstack.celestial.celestial.RegisterRequest
+	(*RegisterResponse)(nil),                      // 4: openfogstack.celestial.celestial.RegisterResponse
+	(*InitRequest)(nil),                           // 5: openfogstack.celestial.celestial.InitRequest
+	(*StateUpdateRequest)(nil),                    // 6: openfogstack.celestial.celestial.StateUpdateRequest
+	(*InitRequest_Host)(nil),                      // 7: openfogstack.celestial.celestial.InitRequest.Host
+	(*InitRequest_Machine)(nil),                   // 8: openfogstack.celestial.celestial.InitRequest.Machine
+	(*InitRequest_Machine_MachineConfig)(nil),     // 9: openfogstack.celestial.celestial.InitRequest.Machine.MachineConfig
+	(*StateUpdateRequest_MachineDiff)(nil),        // 10: openfogstack.celestial.celestial.StateUpdateRequest.MachineDiff
+	(*StateUpdateRequest_NetworkDiff)(nil),        // 11: openfogstack.celestial.celestial.StateUpdateRequest.NetworkDiff
+	(*StateUpdateRequest_PackedNetworkDiffs)(nil), // 12: openfogstack.celestial.celestial.StateUpdateRequest.PackedNetworkDiffs
 }
 var file_celestial_proto_depIdxs = []int32{
 	7,  // 0: openfogstack.celestial.celestial.InitRequest.hosts:type_name -> openfogstack.celestial.celestial.InitRequest.Host
 	8,  // 1: openfogstack.celestial.celestial.InitRequest.machines:type_name -> openfogstack.celestial.celestial.InitRequest.Machine
 	10, // 2: openfogstack.celestial.celestial.StateUpdateRequest.machine_diffs:type_name -> openfogstack.celestial.celestial.StateUpdateRequest.MachineDiff
 	11, // 3: openfogstack.celestial.celestial.StateUpdateRequest.network_diffs:type_name -> openfogstack.celestial.celestial.StateUpdateRequest.NetworkDiff
-	1,  // 4: openfogstack.celestial.celestial.InitRequest.Machine.id:type_name -> openfogstack.celestial.celestial.MachineID
-	9,  // 5: openfogstack.celestial.celestial.InitRequest.Machine.config:type_name -> openfogstack.celestial.celestial.InitRequest.Machine.MachineConfig
-	0,  // 6: openfogstack.celestial.celestial.StateUpdateRequest.MachineDiff.active:type_name -> openfogstack.celestial.celestial.VMState
-	1,  // 7: openfogstack.celestial.celestial.StateUpdateRequest.MachineDiff.id:type_name -> openfogstack.celestial.celestial.MachineID
-	1,  // 8: openfogstack.celestial.celestial.StateUpdateRequest.NetworkDiff.source:type_name -> openfogstack.celestial.celestial.MachineID
-	1,  // 9: openfogstack.celestial.celestial.StateUpdateRequest.NetworkDiff.target:type_name -> openfogstack.celestial.celestial.MachineID
-	1,  // 10: openfogstack.celestial.celestial.StateUpdateRequest.NetworkDiff.next:type_name -> openfogstack.celestial.celestial.MachineID
-	1,  // 11: openfogstack.celestial.celestial.StateUpdateRequest.NetworkDiff.prev:type_name -> openfogstack.celestial.celestial.MachineID
-	3,  // 12: openfogstack.celestial.celestial.Celestial.Register:input_type -> openfogstack.celestial.celestial.RegisterRequest
-	5,  // 13: openfogstack.celestial.celestial.Celestial.Init:input_type -> openfogstack.celestial.celestial.InitRequest
-	6,  // 14: openfogstack.celestial.celestial.Celestial.Update:input_type -> openfogstack.celestial.celestial.StateUpdateRequest
-	2,  // 15: openfogstack.celestial.celestial.Celestial.Stop:input_type -> openfogstack.celestial.celestial.Empty
-	4,  // 16: openfogstack.celestial.celestial.Celestial.Register:output_type -> openfogstack.celestial.celestial.RegisterResponse
-	2,  // 17: openfogstack.celestial.celestial.Celestial.Init:output_type -> openfogstack.celestial.celestial.Empty
-	2,  // 18: openfogstack.celestial.celestial.Celestial.Update:output_type -> openfogstack.celestial.celestial.Empty
-	2,  // 19: openfogstack.celestial.celestial.Celestial.Stop:output_type -> openfogstack.celestial.celestial.Empty
-	16, // [16:20] is the sub-list for method output_type
-	12, // [12:16] is the sub-list for method input_type
-	12, // [12:12] is the sub-list for extension type_name
-	12, // [12:12] is the sub-list for extension extendee
-	0,  // [0:12] is the sub-list for field type_name
+	12, // 4: openfogstack.celestial.celestial.StateUpdateRequest.packed_network_diffs:type_name -> openfogstack.celestial.celestial.StateUpdateRequest.PackedNetworkDiffs
+	1,  // 5: openfogstack.celestial.celestial.InitRequest.Machine.id:type_name -> openfogstack.celestial.celestial.MachineID
+	9,  // 6: openfogstack.celestial.celestial.InitRequest.Machine.config:type_name -> openfogstack.celestial.celestial.InitRequest.Machine.MachineConfig
+	0,  // 7: openfogstack.celestial.celestial.StateUpdateRequest.MachineDiff.active:type_name -> openfogstack.celestial.celestial.VMState
+	1,  // 8: openfogstack.celestial.celestial.StateUpdateRequest.MachineDiff.id:type_name -> openfogstack.celestial.celestial.MachineID
+	1,  // 9: openfogstack.celestial.celestial.StateUpdateRequest.NetworkDiff.source:type_name -> openfogstack.celestial.celestial.MachineID
+	1,  // 10: openfogstack.celestial.celestial.StateUpdateRequest.NetworkDiff.target:type_name -> openfogstack.celestial.celestial.MachineID
+	1,  // 11: openfogstack.celestial.celestial.StateUpdateRequest.NetworkDiff.next:type_name -> openfogstack.celestial.celestial.MachineID
+	1,  // 12: openfogstack.celestial.celestial.StateUpdateRequest.NetworkDiff.prev:type_name -> openfogstack.celestial.celestial.MachineID
+	3,  // 13: openfogstack.celestial.celestial.Celestial.Register:input_type -> openfogstack.celestial.celestial.RegisterRequest
+	5,  // 14: openfogstack.celestial.celestial.Celestial.Init:input_type -> openfogstack.celestial.celestial.InitRequest
+	6,  // 15: openfogstack.celestial.celestial.Celestial.Update:input_type -> openfogstack.celestial.celestial.StateUpdateRequest
+	2,  // 16: openfogstack.celestial.celestial.Celestial.Stop:input_type -> openfogstack.celestial.celestial.Empty
+	4,  // 17: openfogstack.celestial.celestial.Celestial.Register:output_type -> openfogstack.celestial.celestial.RegisterResponse
+	2,  // 18: openfogstack.celestial.celestial.Celestial.Init:output_type -> openfogstack.celestial.celestial.Empty
+	2,  // 19: openfogstack.celestial.celestial.Celestial.Update:output_type -> openfogstack.celestial.celestial.Empty
+	2,  // 20: openfogstack.celestial.celestial.Celestial.Stop:output_type -> openfogstack.celestial.celestial.Empty
+	17, // [17:21] is the sub-list for method output_type
+	13, // [13:17] is the sub-list for method input_type
+	13, // [13:13] is the sub-list for extension type_name
+	13, // [13:13] is the sub-list for extension extendee
+	0,  // [0:13] is the sub-list for field type_name
 }
 
 func init() { file_celestial_proto_init() }
@@ -1119,6 +1290,18 @@ func file_celestial_proto_init() {
 				return nil
 			}
 		}
+		file_celestial_proto_msgTypes[11].Exporter = func(v interface{}, i int) interface{} {
+			switch v := v.(*StateUpdateRequest_PackedNetworkDiffs); i {
+			case 0:
+				return &v.state
+			case 1:
+				return &v.sizeCache
+			case 2:
+				return &v.unknownFields
+			default:
+				return nil
+			}
+		}
 	}
 	file_celestial_proto_msgTypes[7].OneofWrappers = []interface{}{}
 	type x struct{}
@@ -1127,7 +1310,7 @@ func file_celestial_proto_init() {
 			GoPackagePath: reflect.TypeOf(x{}).PkgPath(),
 			RawDescriptor: file_celestial_proto_rawDesc,
 			NumEnums:      1,
-			NumMessages:   11,
+			NumMessages:   12,
 			NumExtensions: 0,
 			NumServices:   1,
 		},
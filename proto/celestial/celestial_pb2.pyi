@@ -270,18 +270,83 @@ class StateUpdateRequest(google.protobuf.message.Message):
         def HasField(self, field_name: typing_extensions.Literal["next", b"next", "prev", b"prev", "source", b"source", "target", b"target"]) -> builtins.bool: ...
         def ClearField(self, field_name: typing_extensions.Literal["bandwidth_kbps", b"bandwidth_kbps", "blocked", b"blocked", "latency_us", b"latency_us", "next", b"next", "prev", b"prev", "source", b"source", "target", b"target"]) -> None: ...
 
+    @typing_extensions.final
+    class PackedNetworkDiffs(google.protobuf.message.Message):
+        """network diffs as one column per field, which is much cheaper to
+        encode and decode than one message per diff
+        all fields have the same length, the i-th entry of each field belongs
+        to the i-th diff
+        """
+
+        DESCRIPTOR: google.protobuf.descriptor.Descriptor
+
+        BLOCKED_FIELD_NUMBER: builtins.int
+        SOURCE_GROUP_FIELD_NUMBER: builtins.int
+        SOURCE_ID_FIELD_NUMBER: builtins.int
+        TARGET_GROUP_FIELD_NUMBER: builtins.int
+        TARGET_ID_FIELD_NUMBER: builtins.int
+        LATENCY_US_FIELD_NUMBER: builtins.int
+        BANDWIDTH_KBPS_FIELD_NUMBER: builtins.int
+        NEXT_GROUP_FIELD_NUMBER: builtins.int
+        NEXT_ID_FIELD_NUMBER: builtins.int
+        PREV_GROUP_FIELD_NUMBER: builtins.int
+        PREV_ID_FIELD_NUMBER: builtins.int
+        @property
+        def blocked(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.bool]: ...
+        @property
+        def source_group(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.int]: ...
+        @property
+        def source_id(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.int]: ...
+        @property
+        def target_group(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.int]: ...
+        @property
+        def target_id(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.int]: ...
+        @property
+        def latency_us(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.int]: ...
+        @property
+        def bandwidth_kbps(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.int]: ...
+        @property
+        def next_group(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.int]: ...
+        @property
+        def next_id(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.int]: ...
+        @property
+        def prev_group(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.int]: ...
+        @property
+        def prev_id(self) -> google.protobuf.internal.containers.RepeatedScalarFieldContainer[builtins.int]: ...
+        def __init__(
+            self,
+            *,
+            blocked: collections.abc.Iterable[builtins.bool] | None = ...,
+            source_group: collections.abc.Iterable[builtins.int] | None = ...,
+            source_id: collections.abc.Iterable[builtins.int] | None = ...,
+            target_group: collections.abc.Iterable[builtins.int] | None = ...,
+            target_id: collections.abc.Iterable[builtins.int] | None = ...,
+            latency_us: collections.abc.Iterable[builtins.int] | None = ...,
+            bandwidth_kbps: collections.abc.Iterable[builtins.int] | None = ...,
+            next_group: collections.abc.Iterable[builtins.int] | None = ...,
+            next_id: collections.abc.Iterable[builtins.int] | None = ...,
+            prev_group: collections.abc.Iterable[builtins.int] | None = ...,
+            prev_id: collections.abc.Iterable[builtins.int] | None = ...,
+        ) -> None: ...
+        def ClearField(self, field_name: typing_extensions.Literal["bandwidth_kbps", b"bandwidth_kbps", "blocked", b"blocked", "latency_us", b"latency_us", "next_group", b"next_group", "next_id", b"next_id", "prev_group", b"prev_group", "prev_id", b"prev_id", "source_group", b"source_group", "source_id", b"source_id", "target_group", b"target_group", "target_id", b"target_id"]) -> None: ...
+
     MACHINE_DIFFS_FIELD_NUMBER: builtins.int
     NETWORK_DIFFS_FIELD_NUMBER: builtins.int
+    PACKED_NETWORK_DIFFS_FIELD_NUMBER: builtins.int
     @property
     def machine_diffs(self) -> google.protobuf.internal.containers.RepeatedCompositeFieldContainer[global___StateUpdateRequest.MachineDiff]: ...
     @property
     def network_diffs(self) -> google.protobuf.internal.containers.RepeatedCompositeFieldContainer[global___StateUpdateRequest.NetworkDiff]: ...
+    @property
+    def packed_network_diffs(self) -> global___StateUpdateRequest.PackedNetworkDiffs: ...
     def __init__(
         self,
         *,
         machine_diffs: collections.abc.Iterable[global___StateUpdateRequest.MachineDiff] | None = ...,
         network_diffs: collections.abc.Iterable[global___StateUpdateRequest.NetworkDiff] | None = ...,
+        packed_network_diffs: global___StateUpdateRequest.PackedNetworkDiffs | None = ...,
     ) -> None: ...
-    def ClearField(self, field_name: typing_extensions.Literal["machine_diffs", b"machine_diffs", "network_diffs", b"network_diffs"]) -> None: ...
+    def HasField(self, field_name: typing_extensions.Literal["packed_network_diffs", b"packed_network_diffs"]) -> builtins.bool: ...
+    def ClearField(self, field_name: typing_extensions.Literal["machine_diffs", b"machine_diffs", "network_diffs", b"network_diffs", "packed_network_diffs", b"packed_network_diffs"]) -> None: ...
 
 global___StateUpdateRequest = StateUpdateRequest
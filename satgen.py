@@ -40,57 +40,135 @@ them using pip in a virtual environment:
 Usage
 -----
 
-    python3 satgen.py [config.toml] [output-file (optional)]
+    python3 satgen.py [config.toml] [output-file (optional)] [--workers N (optional)] [--parallel-shells (optional)] [--stream-zip (optional)]
 
 The output will be in the specified path or in a generated file based on a hash
-of the configuration file if no output path is specified.
+of the configuration file if no output path is specified. If the output path
+ends in .trace, the output is a single trace file that can be memory-mapped
+instead of a .zip file.
+
+With --workers N, the network paths are calculated in N worker processes in
+parallel. The workers write the paths to shared memory, at most 1 GiB ahead of
+the timestep that is being written. The output is the same as without workers.
+This is not possible with incremental paths.
+
+With --parallel-shells, the shells of the constellation are calculated
+concurrently in multiple threads, which share the available cores. The output
+is the same as without this option.
+
+With --stream-zip, the updates of each timestep are added to the .zip file
+right away instead of collecting them in a temporary directory first. The .zip
+file is only valid once satgen has finished.
 """
 
 import sys
+import typing
 
+import numba
 import toml
 import tqdm
 
 import celestial.config
+import celestial.trace_serializer
 import celestial.zip_serializer
 import celestial.satgen_connstellation
 
 if __name__ == "__main__":
-    if len(sys.argv) > 3 or len(sys.argv) < 2:
-        exit("Usage: python3 celestial.py [config.toml] [output-file (optional)]")
+    args = sys.argv[1:]
+
+    workers = 1
+    if "--workers" in args:
+        i = args.index("--workers")
+        try:
+            workers = int(args[i + 1])
+        except (IndexError, ValueError):
+            exit("--workers requires a number of worker processes")
+        if workers < 1:
+            exit("--workers requires at least one worker process")
+        del args[i : i + 2]
+
+    parallel_shells = "--parallel-shells" in args
+    if parallel_shells:
+        args.remove("--parallel-shells")
+
+        # parallel numba kernels may only be called from multiple threads
+        # with a threadsafe threading layer, we prefer omp as tbb can hang
+        # on exit after it has been used from multiple threads
+        try:
+            import numba.np.ufunc.omppool  # noqa: F401
+
+            numba.config.THREADING_LAYER = "omp"  # type: ignore
+        except ImportError:
+            numba.config.THREADING_LAYER = "threadsafe"  # type: ignore
+
+    stream_zip = "--stream-zip" in args
+    if stream_zip:
+        args.remove("--stream-zip")
+
+    if len(args) > 2 or len(args) < 1:
+        exit(
+            "Usage: python3 satgen.py [config.toml] [output-file (optional)] [--workers N (optional)] [--parallel-shells (optional)] [--stream-zip (optional)]"
+        )
 
     # read toml
     try:
-        text_config = toml.load(sys.argv[1])
+        text_config = toml.load(args[0])
     except Exception as e:
         exit(str(e))
 
     output_file = None
-    if len(sys.argv) == 3:
-        output_file = sys.argv[2]
+    if len(args) == 2:
+        output_file = args[1]
 
     # read the configuration
     config: celestial.config.Config = celestial.config.Config(text_config)
 
+    if workers > 1 and any(sc.incremental_paths for sc in config.shells):
+        exit("--workers cannot be used with incremental paths")
+
     # prepare serializer
     # serializer = celestial.json_serializer.JSONSerializer(config)
-    serializer = celestial.zip_serializer.ZipSerializer(config, output_file)
+    serializer: typing.Union[
+        celestial.zip_serializer.ZipSerializer,
+        celestial.trace_serializer.TraceSerializer,
+    ]
+    if output_file is not None and output_file.endswith(
+        celestial.trace_serializer.FILE_EXTENSION
+    ):
+        serializer = celestial.trace_serializer.TraceSerializer(config, output_file)
+    else:
+        serializer = celestial.zip_serializer.ZipSerializer(
+            config, output_file, streaming=stream_zip
+        )
 
     # init the constellation
     constellation = celestial.satgen_connstellation.SatgenConstellation(
-        config, serializer
+        config, serializer, parallel_shells=parallel_shells
     )
 
     # run the simulation
-    i = 0 + config.offset
     pbar = tqdm.tqdm(total=int(config.duration / config.resolution))
-    while i < config.duration + config.offset:
-        # import cProfile
-
-        # cProfile.run("constellation.step(i)", sort="cumtime")
-        constellation.step(i)
-        i += config.resolution
-        pbar.update(1)
+    try:
+        if workers > 1:
+            # paths are calculated in parallel, but diffs still have to be
+            # calculated in order
+            path_states_iter = celestial.satgen_connstellation.calculate_path_states(
+                config, workers
+            )
+            for t, path_states in path_states_iter:
+                constellation.step(t, path_states)
+                pbar.update(1)
+        else:
+            i = 0 + config.offset
+            while i < config.duration + config.offset:
+                # import cProfile
+
+                # cProfile.run("constellation.step(i)", sort="cumtime")
+                constellation.step(i)
+                i += config.resolution
+                pbar.update(1)
+    finally:
+        constellation.close()
 
     # serialize the state
     serializer.persist()